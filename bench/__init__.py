@@ -0,0 +1,8 @@
+"""
+# Benchmarks
+
+Run from the repo root, for example:
+```
+python -m bench.storage
+```
+"""
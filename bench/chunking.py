@@ -0,0 +1,131 @@
+"""
+# Week chunking speed
+
+Compares `Weeked.chunk_by_weeks` with the old
+implementation that made two `Range`s per day,
+on generated full-semester group and teacher pages.
+```
+python -m bench.chunking --weeks 18
+```
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable
+
+from bench.schedule import make_page
+
+
+def chunk_by_weeks_old(pack: list[Any]) -> list[Any]:
+    """
+    # `Weeked.chunk_by_weeks` as it used to be
+    """
+    from src.data import week
+    from src.data.schedule import Weeked
+
+    chunks = []
+    current_week = None
+    hold = []
+
+    for idx, day in enumerate(pack):
+        try:
+            next_day = pack[idx+1]
+            next_day_week = week.from_day(next_day.get_date())
+            is_last = False
+        except IndexError:
+            next_day_week = None
+            is_last = True
+
+        day_week = week.from_day(day.get_date())
+
+        if current_week is None:
+            current_week = day_week
+
+        hold.append(day)
+
+        if next_day_week != current_week or is_last:
+            chunks.append(Weeked(week=day_week, data=hold))
+            hold = []
+            current_week = next_day_week
+
+    return chunks
+
+
+def teachers_page(groups_page: dict[str, Any]) -> dict[str, Any]:
+    """
+    # Turn a groups page inside out
+    """
+    by_teacher: dict[str, dict[str, list[Any]]] = {}
+
+    for formation in groups_page["formations"]:
+        for day in formation["days"]:
+            for subject in day["subjects"]:
+                for attender in subject["attenders"]:
+                    days = by_teacher.setdefault(attender["name"], {})
+                    days.setdefault(day["date"], []).append(subject)
+
+    return {
+        "kind": "teachers",
+        "date": groups_page["date"],
+        "formations": [{
+            "raw": name,
+            "recovered": False,
+            "name": name,
+            "days": [{
+                "raw": "",
+                "recovered": False,
+                "date": date,
+                "subjects": subjects
+            } for (date, subjects) in sorted(days.items())]
+        } for (name, days) in by_teacher.items()]
+    }
+
+
+def timed(name: str, rounds: int, fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+
+    for _ in range(rounds):
+        fn()
+
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"  {name:<10} {elapsed * 1000:>8.1f} ms per page")
+    return elapsed
+
+
+def main() -> None:
+    from src.data.schedule import Page, Weeked
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    groups = make_page(args.weeks)
+    teachers = teachers_page(groups)
+
+    for doc in (groups, teachers):
+        page = Page.model_validate(doc)
+        packs = [form.days for form in page.formations]
+        days = sum(len(pack) for pack in packs)
+
+        print(f"{page.kind}: {len(packs)} formations, {days} days")
+
+        # both have to agree before timing them
+        for pack in packs:
+            old = chunk_by_weeks_old(pack)
+            new = Weeked.chunk_by_weeks(pack)
+            assert [(w.week, len(w.data)) for w in old] == \
+                [(w.week, len(w.data)) for w in new]
+
+        old = timed("old", args.rounds, lambda: [
+            chunk_by_weeks_old(pack) for pack in packs
+        ])
+        new = timed("new", args.rounds, lambda: [
+            Weeked.chunk_by_weeks(pack) for pack in packs
+        ])
+        print(f"  {old / new:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+# Memory taken by a cached schedule page
+
+Compares pydantic models `ScheduleApi` used to keep
+with `compact.Page` it keeps now.
+
+Uses a generated full-semester page by default.
+To measure a real one, save what ktmuscrap returns:
+```
+curl http://127.0.0.1:8080/schedule/groups > groups.json
+python -m bench.schedule --page groups.json
+```
+"""
+import argparse
+import datetime
+import gc
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+
+GROUPS = [f"{course}КДД{num}" for course in range(1, 5) for num in range(10, 40)]
+TEACHERS = [f"Преподаватель{num} А.Б." for num in range(300)]
+SUBJECTS = [f"Дисциплина {num}" for num in range(120)]
+CABINETS = [f"{num}{letter}" for num in range(1, 60) for letter in ("", "а", "б")]
+
+
+def make_subject(num: int) -> dict[str, Any]:
+    teachers = random.sample(TEACHERS, random.choice([1, 1, 1, 2]))
+    name = random.choice(SUBJECTS)
+    cabinet = random.choice(CABINETS)
+
+    return {
+        "raw": f"{name} {' '.join(teachers)} каб. {cabinet}",
+        "recovered": False,
+        "name": name,
+        "num": num,
+        "format": random.choice(["fulltime", "fulltime", "remote"]),
+        "attenders": [{
+            "raw": teacher,
+            "recovered": False,
+            "kind": "teacher",
+            "name": teacher,
+            "cabinet": {
+                "recovered": False,
+                "primary": f"каб. {cabinet}",
+                "opposite": random.choice([cabinet, cabinet, None])
+            }
+        } for teacher in teachers]
+    }
+
+
+def make_page(weeks: int) -> dict[str, Any]:
+    """
+    # Page-shaped document of a typical semester
+    """
+    first_monday = datetime.date(2024, 9, 2)
+    last_day = first_monday + datetime.timedelta(weeks=weeks, days=-1)
+    formations = []
+
+    for group in GROUPS:
+        days = []
+
+        for day_num in range(weeks * 7):
+            date = first_monday + datetime.timedelta(days=day_num)
+            if date.weekday() == 6:
+                continue
+
+            first = random.randint(1, 2)
+            count = random.randint(2, 5)
+            days.append({
+                "raw": "",
+                "recovered": False,
+                "date": date.isoformat(),
+                "subjects": [
+                    make_subject(num) for num in range(first, first + count)
+                ]
+            })
+
+        formations.append({
+            "raw": group,
+            "recovered": False,
+            "name": group,
+            "days": days
+        })
+
+    return {
+        "kind": "groups",
+        "date": {
+            "start": first_monday.isoformat(),
+            "end": last_day.isoformat()
+        },
+        "formations": formations
+    }
+
+
+def measure(name: str, fn: Callable[[], Any]) -> tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    result = fn()
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {name:<28} {size / 1_048_576:>8.1f} MiB   {elapsed:>6.2f} s")
+    return (result, size)
+
+
+def main() -> None:
+    from src.data.schedule import Page, compact
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", type=Path, default=None)
+    parser.add_argument("--weeks", type=int, default=18)
+    args = parser.parse_args()
+
+    if args.page:
+        doc = json.loads(args.page.read_text(encoding="utf8"))
+        # either a whole ktmuscrap response or just the page
+        doc = doc.get("data", {}).get("page", doc)
+    else:
+        random.seed(0)
+        doc = make_page(args.weeks)
+
+    text = json.dumps(doc, ensure_ascii=False)
+    print(f"page JSON: {len(text.encode('utf8')) / 1_048_576:.1f} MiB")
+
+    def validated() -> Page:
+        page = Page.model_validate_json(text)
+        page._chunk_formations_by_week()
+        return page
+
+    _page, pydantic_size = measure("pydantic models", validated)
+    del _page
+    # the validated page is dropped right after conversion,
+    # only what the compact one keeps is counted
+    _compact, compact_size = measure(
+        "compact.Page",
+        lambda: compact.Page.from_model(Page.model_validate_json(text))
+    )
+
+    print(f"  compact is {pydantic_size / max(compact_size, 1):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
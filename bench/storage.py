@@ -0,0 +1,142 @@
+"""
+# Ctx storage throughput and latency
+
+Compares `MemoryStorage` and `SqliteStorage`,
+plus `RedisStorage` if `--redis 127.0.0.1:6379` is given.
+```
+python -m bench.storage --ctxs 5000
+```
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from src.storage import Storage
+
+
+GROUPS = [f"{course}КДД{num}" for course in range(1, 5) for num in range(10, 60)]
+TEACHERS = [f"Преподаватель{num} А.Б." for num in range(300)]
+
+
+def make_doc(chat_id: int) -> dict[str, Any]:
+    """
+    # Ctx-shaped document of a typical size
+    """
+    mode = random.choice(["group", "teacher"])
+    return {
+        "chat_id": chat_id,
+        "is_registered": True,
+        "settings": {
+            "mode": mode,
+            "broadcast": random.random() < 0.8,
+            "group": {"typed": None, "valid": None, "confirmed": random.choice(GROUPS)},
+            "teacher": {"typed": None, "valid": None, "confirmed": random.choice(TEACHERS)},
+            "zoom": {"entries": {"list": [], "selected_name": None}},
+        },
+        "navigator": {"trace": ["hub.i_main"] * 5, "back_trace": [], "ignored": []},
+        "padding": "x" * 2000,
+    }
+
+
+async def timed(
+    name: str,
+    count: int,
+    fn: Callable[[int], Awaitable[Any]]
+) -> None:
+    latencies = []
+    started = time.perf_counter()
+
+    for i in range(count):
+        op_started = time.perf_counter()
+        await fn(i)
+        latencies.append(time.perf_counter() - op_started)
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+
+    print(
+        f"  {name:<22} {count / elapsed:>10.0f} ops/s   "
+        f"p50 {statistics.median(latencies) * 1e6:>8.0f} us   "
+        f"p99 {p99 * 1e6:>8.0f} us"
+    )
+
+
+async def run(storage: Storage, ctxs: int, queries: int) -> None:
+    print(type(storage).__name__)
+
+    await storage.connect()
+
+    keys = [f"TG_{chat_id}" for chat_id in range(ctxs)]
+    docs = [make_doc(chat_id) for chat_id in range(ctxs)]
+
+    await timed("put", ctxs, lambda i: storage.put(keys[i], docs[i]))
+    await timed("get", ctxs, lambda i: storage.get(random.choice(keys)))
+    await timed(
+        "update",
+        queries,
+        lambda i: storage.update(
+            random.choice(keys),
+            ("settings", "broadcast"),
+            bool(i % 2)
+        )
+    )
+    await timed(
+        "who_needs (5 groups)",
+        queries,
+        lambda i: storage.who_needs("group", random.sample(GROUPS, 5))
+    )
+    await timed(
+        "who_enabled_broadcast",
+        max(queries // 10, 1),
+        lambda i: storage.who_enabled_broadcast()
+    )
+
+    for key in keys:
+        await storage.delete(key)
+
+    await storage.close()
+
+
+async def main() -> None:
+    from src import defs
+    from src.settings import Settings, Tokens, Server, Database
+    from src.storage.memory import MemoryStorage
+    from src.storage.sqlite import SqliteStorage
+    from src.storage.redisdb import RedisStorage
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ctxs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--redis", type=str, default=None)
+    parser.add_argument("--redis-index", type=str, default="sets")
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    storages: list[Storage] = [
+        MemoryStorage(),
+        SqliteStorage(path=Path(tempfile.mkdtemp()).joinpath("ctx.sqlite3")),
+    ]
+
+    if args.redis:
+        # WARNING: uses the given instance as is,
+        # point it to an empty database
+        defs.settings = Settings(
+            tokens=Tokens(),
+            server=Server(addr=""),
+            database=Database(addr=args.redis, index=args.redis_index)
+        )
+        storages.append(RedisStorage())
+
+    for storage in storages:
+        await run(storage, args.ctxs, args.queries)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
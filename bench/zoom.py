@@ -0,0 +1,275 @@
+"""
+# Zoom data parsing speed
+
+Compares `parse.zoom.Parser` with the old implementation
+that split the text into sections and then parsed each of them,
+on generated mass-add messages for both modes.
+```
+python -m bench.zoom --entries 300
+```
+"""
+import argparse
+import importlib
+import random
+import re
+import time
+from typing import Any, Callable, Optional
+
+from bench.schedule import GROUPS, TEACHERS
+
+
+NOTES = [
+    "по средам",
+    "только для подгруппы 1",
+    "конференция создаётся за 5 минут до пары",
+    "вход по ссылке, без пароля не пустит",
+    "запись будет в беседе",
+]
+
+
+def zoom_url(conf_id: str) -> str:
+    host = random.choice(["us04web", "us05web", "us06web"])
+    pwd = "".join(random.choices("abcdefghijkLMNOPQRS0123456789", k=32))
+    return f"https://{host}.zoom.us/j/{conf_id}?pwd={pwd}"
+
+
+def make_entry(name: str, teacher: bool) -> str:
+    conf_id = "".join(random.choices("0123456789", k=random.choice([10, 11])))
+    spaced_id = f"{conf_id[:3]} {conf_id[3:7]} {conf_id[7:]}"
+    lines = [
+        f"{random.choice(['Имя', 'имя'])}: {name}",
+        f"Ссылка: {zoom_url(conf_id)}",
+        f"{random.choice(['Ид', 'ИД'])}: {random.choice([conf_id, spaced_id])}",
+        f"{random.choice(['Код', 'Пароль'])}: {random.randint(1000, 999999)}",
+    ]
+
+    if teacher and random.random() < 0.5:
+        lines.append(f"Ключ: {random.randint(100000, 999999)}")
+
+    if random.random() < 0.3:
+        # some notes go on for a couple of lines
+        notes = random.sample(NOTES, random.randint(1, 3))
+        lines.append(f"Заметки: {notes[0]}")
+        lines.extend(notes[1:])
+
+    return "\n".join(lines)
+
+
+def make_text(entries: int, teacher: bool) -> str:
+    """
+    # What a mass-add message usually looks like
+    Entries separated with blank lines, sometimes with
+    junk the chat client left around.
+    """
+    names = TEACHERS if teacher else GROUPS
+    chunks = ["Вот все конференции на семестр:"]
+
+    for name in random.sample(names, min(entries, len(names))):
+        chunks.append(make_entry(name, teacher))
+
+        if random.random() < 0.05:
+            chunks.append(" ​")
+
+    return "\n\n".join(chunks)
+
+
+class OldParser:
+    """
+    # `parse.zoom.Parser` as it used to be
+    Minus the never used `parse_name` and `parse_id`.
+    """
+    KEYS = ["имя", "ссылка", "ид", ["код", "пароль"], "ключ", "заметки"]
+    NAME, URL, ID, PWD, HOST_KEY, NOTES = KEYS
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    @classmethod
+    def is_relevant(cls, key: Any, line: str, group: bool) -> bool:
+        if group and cls.HOST_KEY in key:
+            return False
+        if isinstance(key, str):
+            return line.lower().startswith(f"{key}:")
+        return any(line.lower().startswith(var) for var in key)
+
+    @classmethod
+    def find(cls, line: str, group: bool) -> Optional[Any]:
+        for key in cls.KEYS:
+            key_vars = key if isinstance(key, list) else [key]
+            for var in key_vars:
+                if group and var == cls.HOST_KEY:
+                    continue
+                if cls.is_relevant(var, line, group):
+                    return key
+        return None
+
+    @classmethod
+    def remove(cls, key: Any, line: str, group: bool) -> Optional[str]:
+        def remove_str(key: str, line: str) -> str:
+            return re.sub(f"{key}:", "", line, flags=re.IGNORECASE).strip()
+
+        if isinstance(key, str):
+            return remove_str(key, line)
+        for var in key:
+            if cls.is_relevant(var, line, group):
+                return remove_str(var, line)
+        return None
+
+    def split_sections(self, text: str, group: bool) -> list[str]:
+        from src.parse import WHITESPACE_CHARS
+
+        lines = text.split("\n")
+        sections = []
+        found_name = False
+        prev_key = None
+        rows = []
+
+        for (idx, line) in enumerate(lines):
+            line = line.strip(WHITESPACE_CHARS)
+            key = self.find(line, group)
+
+            if key == self.NAME and not found_name:
+                found_name = True
+            elif key == self.NAME:
+                sections.append("\n".join(rows))
+                rows = []
+
+            if key is not None or prev_key == self.NOTES:
+                rows.append(line)
+            if idx + 1 == len(lines):
+                sections.append("\n".join(rows))
+            if key is not None:
+                prev_key = key
+
+        return sections
+
+    def parse_section(self, text: str, mode: str, group: bool) -> Optional[Any]:
+        from src.parse import WHITESPACE_CHARS
+        from src.parse.pattern import ZOOM_ID
+        from src.data import zoom, DataField
+
+        fields: dict[str, Optional[str]] = dict.fromkeys(
+            ["name", "url", "id", "pwd", "host_key"]
+        )
+        notes = None
+        prev_key = None
+
+        for line in text.split("\n"):
+            line = line.strip(WHITESPACE_CHARS)
+            if line == "":
+                continue
+
+            key = self.find(line, group)
+
+            for (field, field_key) in zip(fields, self.KEYS):
+                if self.is_relevant(field_key, line, group):
+                    fields[field] = self.remove(field_key, line, group)
+                    break
+            else:
+                if self.is_relevant(self.NOTES, line, group):
+                    notes = notes or ""
+                    without_key = self.remove(self.NOTES, line, group)
+                    if without_key != "":
+                        notes += without_key + "\n"
+                elif prev_key == self.NOTES:
+                    notes += line + "\n"
+
+            if key is not None:
+                prev_key = key
+
+        if fields["name"] is None or len(fields["name"]) > zoom.NAME_LIMIT:
+            return None
+        if fields["url"] is not None and fields["id"] is None:
+            matched = ZOOM_ID.search(fields["url"])
+            if matched is not None:
+                fields["id"] = matched.group()
+        if notes is not None:
+            notes = ", ".join([part for part in notes.split("\n") if part != ""])
+
+        model = zoom.Data(
+            name=DataField[str](value=fields.pop("name")),
+            notes=DataField[Optional[str]](value=notes),
+            **{
+                key: DataField[Optional[str]](value=value)
+                for (key, value) in fields.items()
+            }
+        )
+        model.check(mode)
+        return model
+
+    def parse(self, mode: str) -> list[Any]:
+        from src.parse.pattern import SPACE_NEWLINE
+
+        group = mode == "group"
+        text = SPACE_NEWLINE.sub("\n\n", self.text) if group else self.text
+        models = []
+
+        for section in self.split_sections(text, group):
+            parsed = self.parse_section(section, mode, group)
+            if parsed is not None:
+                models.append(parsed)
+
+        return models
+
+
+def bootstrap() -> None:
+    """
+    # Import zoom data without running the bot
+    It pulls in `svc.common`, which reads settings on import.
+    """
+    from src import defs
+    from src.settings import Settings, Tokens, Server, Database, Urls
+
+    defs.settings = Settings(
+        tokens=Tokens(),
+        server=Server(addr="127.0.0.1:8080"),
+        database=Database(),
+        urls=Urls()
+    )
+
+    # needed for its side effects only
+    importlib.import_module("src.svc.common")
+
+
+def timed(name: str, rounds: int, size: int, fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+
+    for _ in range(rounds):
+        fn()
+
+    elapsed = (time.perf_counter() - started) / rounds
+    throughput = size / elapsed / 1024
+    print(f"  {name:<10} {elapsed * 1000:>8.1f} ms   {throughput:>8.0f} KiB/s")
+    return elapsed
+
+
+def main() -> None:
+    bootstrap()
+    from src.parse.zoom import Parser
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    for mode in ("group", "teacher"):
+        text = make_text(args.entries, teacher=mode == "teacher")
+        size = len(text.encode("utf8"))
+
+        old = OldParser(text).parse(mode)
+        new = Parser(text).parse(mode)
+        # both have to agree before timing them
+        assert [entry.model_dump() for entry in old] == \
+            [entry.model_dump() for entry in new]
+
+        print(f"{mode}: {len(new)} entries, {size / 1024:.1f} KiB")
+
+        old = timed("old", args.rounds, size, lambda: OldParser(text).parse(mode))
+        new = timed("new", args.rounds, size, lambda: Parser(text).parse(mode))
+        print(f"  {old / new:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,42 @@
+from __future__ import annotations
 import asyncio
 import datetime
+import signal
 import re
-import aiofiles
 import warnings
 import asyncio
-from redis.asyncio import Redis
-from redis import exceptions as rexeptions
-from aiofiles.threadpool.text import AsyncTextIOWrapper
-from aiofiles import ospath
 from typing import Optional, Never, TYPE_CHECKING
-from vkbottle import Bot as VkBot
-from vkbottle_types.responses.groups import GroupsGroupFull
-from aiogram import Bot as TgBot, Dispatcher, Router
-from aiogram.types import User
-from aiohttp import ClientSession, client_exceptions as aiohttp_exc
+from aiohttp import ClientSession
 from loguru import logger
 from loguru._handler import Message
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from src.settings import Settings
+from src.logwriter import LogWriter
+from src.errordigest import ErrorDigest
 from src.weekcast import WeekCast
 from src.api.schedule import ScheduleApi, LastNotify
+from src.api.history import ScheduleHistory
 from src.data import week
 from src.data.range import Range
 from src.data.weekday import WEEKDAY_LITERAL
+from src.startup import Profiler
 
 
 if TYPE_CHECKING:
+    # platform SDKs are heavy,
+    # they're imported only for bots that have a token
+    from vkbottle import Bot as VkBot
+    from vkbottle_types.responses.groups import GroupsGroupFull
+    from aiogram import Bot as TgBot, Dispatcher, Router
+    from aiogram.types import User
     from src.svc.common import Ctx
+    from src.storage import Storage
     from src.svc.common.logsvc import Logger
-
-
-COLOR_ESCAPE_REGEX = re.compile(r"\x1b[[]\d{1,}m")
+    from src.zoomdir import ZoomDirectory
+    from src.workers import Coordinator, Worker, Supervisor
+    from src.broadcaster import BroadcastQueue, Broadcaster
+    from src.ratelimit import RateLimiter
 
 
 class RedisName:
@@ -51,57 +56,13 @@ def sink(message: Message):
     if record["exception"] or record["level"].name == "ERROR":
         is_error = True
 
-    async def write_out():
-        if not defs.log_path:
-            return
-
-        try:
-            await defs.log_file.write(no_escapes)
-            await defs.log_file.flush()
-
-            if (await ospath.getsize(defs.log_path)) > 1_048_576: # 1mb
-                now = datetime.datetime.now()
-                now_str = str(now)
-                now_str = now_str.replace(":", "_").replace("/", "_")
-
-                await defs.log_file.close()
-
-                defs.log_path.rename(
-                    defs.settings.logging.dir.joinpath(f"log_{now_str}.txt")
-                )
-                defs.log_file = await aiofiles.open(
-                    defs.log_path, mode="a", encoding="utf8", newline="\n"
-                )
-        except Exception:
-            ...
-
     print(message, end="")
 
-    no_escapes = COLOR_ESCAPE_REGEX.sub("", message)
+    if defs.log_writer is not None:
+        defs.log_writer.put(str(message))
 
-    if is_error:
-        from src.svc import vk, telegram
-        from src.svc.common import Source
-        
-        async def send_error():
-            for admin in defs.settings.logging.admins:
-                try:
-                    if admin.src == Source.VK:
-                        await vk.chunked_send(
-                            peer_id=admin.id,
-                            message=str(no_escapes),
-                        )
-                    elif admin.src == Source.TG:
-                        await telegram.chunked_send(
-                            chat_id=admin.id,
-                            text=str(no_escapes),
-                        )
-                except Exception as e:
-                    ...
-
-        defs.create_task(send_error())
-
-    defs.create_task(write_out())
+    if is_error and defs.error_digest is not None:
+        defs.error_digest.add(record, str(message))
 
 
 @dataclass
@@ -125,7 +86,8 @@ class Defs:
 
     http: Optional[ClientSession] = None
     ctx: Optional["Ctx"] = None
-    redis: Optional[Redis] = None
+    storage: Optional["Storage"] = None
+    zoom_directory: Optional["ZoomDirectory"] = None
     logger: Optional["Logger"] = None
 
     settings: Optional[Settings] = None
@@ -133,22 +95,63 @@ class Defs:
     schedule: Optional[ScheduleApi] = None
 
     data_dir: Optional[Path] = None
-    log_path: Optional[Path] = None
-    log_file: Optional[AsyncTextIOWrapper] = None
+    log_writer: Optional[LogWriter] = None
+    error_digest: Optional[ErrorDigest] = None
 
     time_mapping: Optional[dict["WEEKDAY_LITERAL", Range[datetime.time]]] = None
 
+    startup: Profiler = field(default_factory=Profiler)
+    """
+    # How long each part of `init_all` took
+    """
+
+    shard: Optional[int] = None
+    """
+    # Which worker this process is
+    `None` for the coordinator or a single process,
+    see `src.workers`.
+    """
+    is_broadcaster: bool = False
+    """
+    # Is this process only doing broadcasts
+    See `src.broadcaster`.
+    """
+    coordinator: Optional["Coordinator"] = None
+    worker: Optional["Worker"] = None
+    supervisor: Optional["Supervisor"] = None
+    broadcast_queue: Optional["BroadcastQueue"] = None
+    broadcaster: Optional["Broadcaster"] = None
+    rate_limiter: Optional["RateLimiter"] = None
+
+    @property
+    def is_worker(self) -> bool:
+        return self.shard is not None
+
+    @property
+    def is_main(self) -> bool:
+        """
+        ## Is this the process that listens to ktmuscrap
+        """
+        return not self.is_worker and not self.is_broadcaster
+
     def init_all(
         self, 
         init_handlers: bool = True,
         init_middlewares: bool = True,
     ) -> None:
+        self.startup = Profiler()
+
         self.init_loop()
         self.init_logger()
-        self.init_fs()
+
+        with self.startup.phase("settings and files"):
+            self.init_fs()
+
         self.init_vars(init_handlers, init_middlewares)
         self.init_periods()
 
+        self.startup.log()
+
     def init_loop(self) -> None:
         self.loop = asyncio.get_event_loop()
 
@@ -156,9 +159,46 @@ class Defs:
         self.http = ClientSession(loop=self.loop)
     
     async def init_schedule_api(self) -> None:
+        """
+        ## Start schedule tasks
+        History has to be connected by now,
+        see `init_services`.
+        """
         #await self.schedule.await_server()
+        if not self.is_main:
+            # the main process listens to ktmuscrap
+            # and saves snapshots for everyone
+            self.create_task(self.schedule.follow_snapshot())
+            return
+
+        if self.schedule.history is not None:
+            self.create_task(self.schedule.history.compact_loop())
+
+        self.create_task(self.schedule.load_snapshot())
         self.create_task(self.schedule.updates())
 
+    async def init_services(self) -> None:
+        """
+        ## Connect to everything we need before polling
+        None of these depend on each other,
+        so they're all waited at the same time.
+        """
+        phases = [
+            self.startup.run("storage", self.init_storage()),
+            self.startup.run("logger service", self.init_logger_svc()),
+        ]
+
+        if self.vk_bot is not None:
+            phases.append(self.startup.run("vk bot info", self.get_vk_bot_info()))
+        if self.tg_bot is not None:
+            phases.append(self.startup.run("tg bot info", self.get_tg_bot_info()))
+        if self.schedule.history is not None:
+            phases.append(self.startup.run(
+                "schedule history", self.schedule.history.connect()
+            ))
+
+        await asyncio.gather(*phases)
+
     async def get_vk_bot_info(self) -> None:
         groups_resp = await self.vk_bot.api.groups.get_by_id()
         group_data = groups_resp.groups[0]
@@ -173,110 +213,20 @@ class Defs:
         self.tg_bot_mention = "/nigga"
         self.tg_bot_commands = ["/nigga"]
 
-    async def wait_for_redis(self) -> None:
-        retry = 5
-        logged = False
+    async def init_storage(self) -> None:
+        from src import storage
 
-        host = self.redis.connection_pool.connection_kwargs["host"]
-        port = self.redis.connection_pool.connection_kwargs["port"]
+        from src import zoomdir
 
-        while True:
-            if not await self.is_redis_online():
-                if not logged:
-                    logger.opt(colors=True).error(
-                        f"unable to rech redis instance "
-                        f"at {host}:{port}, awaiting..."
-                    )
-                    logged = True
-                
-                await asyncio.sleep(retry)
-            else:
-                logger.info(f"redis connected on {host}:{port}")
-                break
-
-    async def is_redis_online(self) -> bool:
-        try:
-            await self.redis.ping()
-            return True
-        except rexeptions.ConnectionError:
-            return False
-
-    async def create_redisearch_group_broadcast_index(self) -> None:
-        await self.redis.execute_command(
-            "FT.CREATE",
-            RedisName.BROADCAST,
-            "ON",
-            "JSON",
-            "SCHEMA",
-            "$.is_registered", "AS", RedisName.IS_REGISTERED, "TAG",
-            "$.settings.broadcast", "AS", RedisName.BROADCAST, "TAG",
-            "$.settings.mode", "AS", RedisName.MODE, "TEXT",
-            "$.settings.group.confirmed", "AS", RedisName.GROUP, "TEXT"
-        )
-    
-    async def create_redisearch_tchr_broadcast_index(self) -> None:
-        await self.redis.execute_command(
-            "FT.CREATE",
-            RedisName.TCHR_BROADCAST,
-            "ON",
-            "JSON",
-            "SCHEMA",
-            "$.is_registered", "AS", RedisName.IS_REGISTERED, "TAG",
-            "$.settings.broadcast", "AS", RedisName.BROADCAST, "TAG",
-            "$.settings.mode", "AS", RedisName.MODE, "TEXT",
-            "$.settings.teacher.confirmed", "AS", RedisName.TEACHER, "TEXT"
-        )
-
-    async def create_redisearch_generic_broadcast_index(self) -> None:
-        await self.redis.execute_command(
-            "FT.CREATE",
-            RedisName.GENERIC_BROADCAST,
-            "ON",
-            "JSON",
-            "SCHEMA",
-            "$.is_registered", "AS", RedisName.IS_REGISTERED, "TAG",
-            "$.settings.broadcast", "AS", RedisName.BROADCAST, "TAG"
-        )
-
-    async def check_redisearch_index(self) -> None:
-        try:
-            await self.redis.ft(RedisName.BROADCAST).info()
-        except rexeptions.ResponseError:
-            await self.create_redisearch_group_broadcast_index()
-            logger.info(f"created redis \"{RedisName.BROADCAST}\" index")
-
-        try:
-            await self.redis.ft(RedisName.TCHR_BROADCAST).info()
-        except rexeptions.ResponseError:
-            await self.create_redisearch_tchr_broadcast_index()
-            logger.info(f"created redis \"{RedisName.TCHR_BROADCAST}\" index")
-            
-        try:
-            await self.redis.ft(RedisName.GENERIC_BROADCAST).info()
-        except rexeptions.ResponseError:
-            await self.create_redisearch_generic_broadcast_index()
-            logger.info(f"created redis \"{RedisName.GENERIC_BROADCAST}\" index")
-
-    def init_redis(self) -> None:
-        invalid_addr_error = ValueError(
-            "invalid database address, "
-            "make sure it follows this format: 127.0.0.1:6379"
-        )
-        
-        host_port = self.settings.database.addr.split(":")
-        if not host_port or len(host_port) < 2:
-            raise invalid_addr_error
-
-        host, port = host_port
-        password = self.settings.database.password
-
-        self.redis = Redis(host=host, port=port, password=password)
-        self.loop.run_until_complete(self.wait_for_redis())
-        self.loop.run_until_complete(self.check_redisearch_index())
+        self.storage = storage.load(self.settings.database, self.data_dir)
+        await self.storage.connect()
+        self.zoom_directory = zoomdir.load(self.settings.database, self.storage)
         
         from src.svc.common import DbBaseCtx
+        from src.svc.common.pagination import ZoomSource
         from src.data.zoom import Container
         from src.data.settings import MODE_LITERAL
+        ZoomSource.model_rebuild()
         DbBaseCtx.model_rebuild()
         Container.model_rebuild()
         
@@ -297,9 +247,14 @@ class Defs:
                 
                 logger.info("weekcast starts broadcasting")
                 
-                await self.ctx.broadcast_schedule_to_subscribes(
-                    header=messages.format_next_week()
-                )
+                if self.broadcast_queue is not None:
+                    await self.broadcast_queue.put_weekcast(
+                        messages.format_next_week()
+                    )
+                else:
+                    await self.ctx.broadcast_schedule_to_subscribes(
+                        header=messages.format_next_week()
+                    )
             
             now = datetime.datetime.now()
             next_broadcast_time = datetime.datetime.combine(
@@ -323,11 +278,8 @@ class Defs:
         if not logger_addr.startswith("http://"):
             logger_addr = "http://" + logger_addr
 
-        try:
-            await self.http.get(logger_addr)
-        except aiohttp_exc.ClientConnectorError:
-            ...
-
+        # used to be pinged here, but nothing
+        # was done with the answer anyway
         self.logger = Logger(addr=logger_addr)
 
     def init_logger(self) -> None:
@@ -380,24 +332,43 @@ class Defs:
         settings_path = self.data_dir.joinpath("settings.json")
         last_notify_path = self.data_dir.joinpath("last_notify.json")
         weekcast_path = self.data_dir.joinpath("weekcast.json")
+        schedule_snapshot_path = self.data_dir.joinpath("schedule.snapshot")
+        schedule_history_path = self.data_dir.joinpath("schedule_history.sqlite3")
         
         self.settings = Settings.load_or_init(path=settings_path)
         self.weekcast = WeekCast.load_or_init(path=weekcast_path)
         self.schedule = ScheduleApi(
             addr=self.settings.server.addr,
             last_notify=LastNotify.load_or_init(path=last_notify_path),
-            ready_channel=asyncio.Queue()
+            ready_channel=asyncio.Queue(),
+            snapshot_path=schedule_snapshot_path,
+            history=(
+                ScheduleHistory(path=schedule_history_path)
+                if self.is_main else None
+            )
         )
 
         if self.settings.logging and self.settings.logging.dir:
-            self.log_path = self.settings.logging.dir.joinpath("log.txt")
-            self.log_file = self.loop.run_until_complete(
-                aiofiles.open(
-                    self.log_path,
-                    mode="a",
-                    encoding="utf8",
-                    newline="\n"
-                )
+            logging = self.settings.logging
+            log_name = "log.txt"
+            if self.is_worker:
+                log_name = f"log.worker{self.shard}.txt"
+            elif self.is_broadcaster:
+                log_name = "log.broadcaster.txt"
+            self.log_writer = LogWriter(
+                path=logging.dir.joinpath(log_name),
+                max_size=logging.max_size,
+                flush_size=logging.flush_size,
+                flush_interval=logging.flush_interval,
+                queue_size=logging.queue_size,
+                overflow=logging.overflow
+            )
+            self.log_writer.start()
+
+        if self.settings.logging and self.settings.logging.admins:
+            self.error_digest = ErrorDigest(
+                interval=self.settings.logging.digest_interval,
+                max_per_minute=self.settings.logging.digest_max_per_minute
             )
 
     def init_vars(
@@ -408,36 +379,87 @@ class Defs:
         """
         ## Init variables/constants, by default they are all `None`
         """
-        from src.svc import vk, telegram
-
         self.loop.run_until_complete(self.init_http())
 
         if self.settings.tokens.vk:
-            self.vk_bot = vk.load(token=self.settings.tokens.vk, loop=self.loop)
-            self.loop.run_until_complete(self.get_vk_bot_info())
+            with self.startup.phase("vk bot"):
+                from src.svc import vk
+                self.vk_bot = vk.load(token=self.settings.tokens.vk, loop=self.loop)
         if self.settings.tokens.tg:
-            self.tg_bot = telegram.load_bot(token=self.settings.tokens.tg)
-            self.tg_router = telegram.load_router()
-            self.tg_dispatch = telegram.load_dispatch(self.tg_router)
-            self.loop.run_until_complete(self.get_tg_bot_info())
+            with self.startup.phase("tg bot"):
+                from src.svc import telegram
+                self.tg_bot = telegram.load_bot(token=self.settings.tokens.tg)
+                self.tg_router = telegram.load_router()
+                self.tg_dispatch = telegram.load_dispatch(self.tg_router)
 
         if init_middlewares:
-            from src.svc.common import middlewares
-            middlewares.router.assign()
+            with self.startup.phase("middlewares"):
+                from src.svc.common import middlewares
+                middlewares.router.assign()
         
         if init_handlers:
-            from src.svc.common.bps import admin, reset, settings, init, zoom, hub
+            with self.startup.phase("handlers"):
+                from src.svc.common.bps import admin, reset, settings, init, zoom, hub
         
         from src.svc.common import Ctx
 
         self.ctx = Ctx()
-        self.init_redis()
 
-        self.loop.run_until_complete(self.init_logger_svc())
+        self.loop.run_until_complete(self.init_services())
+
+        from src import workers, broadcaster, ratelimit
+        self.coordinator, self.worker = workers.load(self.shard)
+        self.broadcast_queue, self.broadcaster = broadcaster.load(
+            self.is_broadcaster
+        )
+
+        # workers only put jobs to the queue,
+        # the broadcaster is a child of the main process
+        if self.is_main and (self.coordinator or self.broadcast_queue):
+            self.supervisor = workers.Supervisor()
+
+        self.rate_limiter = ratelimit.load(
+            self.settings.rate_limits,
+            self.storage,
+            reserve=(
+                self.settings.broadcast.reserve
+                if self.broadcaster else 0.0
+            )
+        )
+
         self.loop.run_until_complete(self.init_schedule_api())
 
+    def reload_settings(self) -> None:
+        """
+        ## Read settings file again
+        Only `defs.settings` is replaced,
+        so only what's read from it on every use
+        picks up the changes: lesson time tables,
+        which are rebuilt on load.
+
+        Things built from settings at startup
+        (log writer, error digest, rate limiter,
+        ktmuscrap address, URL buttons, storage, bots)
+        keep the old values until a restart.
+        Nothing rendered is cached with lesson times,
+        so there's nothing to drop.
+        """
+        self.settings = Settings.load(self.settings.path)
+
+        logger.info("settings reloaded")
+
     def init_periods(self) -> None:
-        self.create_task(self.weekcast_loop())
+        if self.is_main:
+            self.create_task(self.weekcast_loop())
+
+        try:
+            self.loop.add_signal_handler(signal.SIGHUP, self.reload_settings)
+        except (AttributeError, NotImplementedError):
+            # no SIGHUP on windows
+            ...
+
+        if self.error_digest is not None:
+            self.create_task(self.error_digest.loop())
             
     def create_task(self, coro, *, name=None) -> None:
         task = self.loop.create_task(coro, name=name)
@@ -1,10 +1,31 @@
+import argparse
 import sys
 
 if __name__ == "__main__":
     sys.path.append(".")
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--shard",
+        type=int,
+        default=None,
+        help="run as a worker, started by the coordinator"
+    )
+    parser.add_argument(
+        "--broadcaster",
+        action="store_true",
+        help="only do broadcasts, started by the main process"
+    )
+    args = parser.parse_args()
+
     from src import defs
-    defs.init_all()
+    defs.shard = args.shard
+    defs.is_broadcaster = args.broadcaster
+    defs.init_all(
+        # the broadcaster never gets updates
+        init_handlers=not args.broadcaster,
+        init_middlewares=not args.broadcaster
+    )
 
     from svc import common
-    common.run_forever()
\ No newline at end of file
+    common.run_forever()
@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from src.data.duration import Duration
 from src.data.schedule import Page, Weeked
 from src.data.schedule.compare import PageCompare
-from src.data.range import Range
+from src.data.range import DateRange
 
 
 if TYPE_CHECKING:
@@ -25,11 +25,12 @@ class Notify(BaseModel):
     teachers: Optional[PageCompare] = None
     
     def _chunk_formations_by_week(self) -> None:
-        try:
+        # either one can be missing,
+        # e.g. in a catch-up made without a teachers snapshot
+        if self.groups is not None:
             self.groups._chunk_formations_by_week()
+        if self.teachers is not None:
             self.teachers._chunk_formations_by_week()
-        except AttributeError:
-            ...
     
     def is_eligible_for_broadcast(self) -> bool:
         flags = []
@@ -40,7 +41,7 @@ class Notify(BaseModel):
         
         return any(flags)
     
-    def get_week_self(self, rng: Range[datetime.date]) -> Self:
+    def get_week_self(self, rng: DateRange) -> Self:
         return Notify(
             random=self.random,
             groups=self.groups.get_week_self(rng) if self.groups else None,
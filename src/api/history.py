@@ -0,0 +1,485 @@
+"""
+# Schedule history
+
+Every page version received from ktmuscrap
+is recorded into an append-only SQLite database,
+so questions like "what did this group's schedule look like
+on Monday" or "what changed for this teacher this week"
+can be answered without the server.
+
+Only what changed is stored: each version
+adds rows for days and formations
+whose digest differs from the latest stored one.
+The first version (and every compaction) acts as the base.
+
+```
+versions   (id, random, at)
+formations (kind, formation, version_id, digest, doc)
+days       (kind, formation, date, version_id, digest, doc)
+meta       (key, value)
+```
+`doc` is zlib-compressed JSON, `NULL` means
+the formation or day was removed in that version.
+"""
+from __future__ import annotations
+import asyncio
+import datetime
+import hashlib
+import json
+import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Never, Optional, TypeVar
+from loguru import logger
+
+from src.data.schedule import Page, Formation, Day, diff
+from src.data.schedule.compare import FormationCompare
+
+
+T = TypeVar("T")
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS versions (
+        id INTEGER PRIMARY KEY,
+        random TEXT NOT NULL,
+        at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS versions_at ON versions (at)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS formations (
+        kind TEXT NOT NULL,
+        formation TEXT NOT NULL,
+        version_id INTEGER NOT NULL,
+        digest BLOB,
+        doc BLOB,
+        PRIMARY KEY (kind, formation, version_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS days (
+        kind TEXT NOT NULL,
+        formation TEXT NOT NULL,
+        date TEXT NOT NULL,
+        version_id INTEGER NOT NULL,
+        digest BLOB,
+        doc BLOB,
+        PRIMARY KEY (kind, formation, date, version_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value
+    ) WITHOUT ROWID
+    """,
+)
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+)
+COMPRESSION_LEVEL = 6
+
+LATEST_FORMATIONS = """
+    SELECT kind, formation, digest FROM (
+        SELECT kind, formation, digest, ROW_NUMBER() OVER (
+            PARTITION BY kind, formation ORDER BY version_id DESC
+        ) AS rn
+        FROM formations
+    ) WHERE rn = 1
+"""
+LATEST_DAYS = """
+    SELECT kind, formation, date, digest FROM (
+        SELECT kind, formation, date, digest, ROW_NUMBER() OVER (
+            PARTITION BY kind, formation, date ORDER BY version_id DESC
+        ) AS rn
+        FROM days
+    ) WHERE rn = 1
+"""
+FORMATION_AT = """
+    SELECT doc FROM formations
+    WHERE kind = ? AND formation = ? AND version_id <= ?
+    ORDER BY version_id DESC
+    LIMIT 1
+"""
+DAYS_AT = """
+    SELECT doc FROM (
+        SELECT date, doc, ROW_NUMBER() OVER (
+            PARTITION BY date ORDER BY version_id DESC
+        ) AS rn
+        FROM days
+        WHERE kind = ? AND formation = ? AND version_id <= ?
+    ) WHERE rn = 1 AND doc IS NOT NULL
+    ORDER BY date
+"""
+COMPACT = (
+    # rows replaced by a newer row
+    # that is also older than the cutoff
+    """
+    DELETE FROM {table} AS old WHERE version_id <= :cutoff AND EXISTS (
+        SELECT 1 FROM {table} AS newer
+        WHERE {same_as_newer}
+        AND newer.version_id > old.version_id
+        AND newer.version_id <= :cutoff
+    )
+    """,
+    # removals with nothing left to remove
+    """
+    DELETE FROM {table} AS old
+    WHERE version_id <= :cutoff AND doc IS NULL AND NOT EXISTS (
+        SELECT 1 FROM {table} AS older
+        WHERE {same_as_older}
+        AND older.version_id < old.version_id
+    )
+    """,
+)
+SAME_FORMATION = "{other}.kind = old.kind AND {other}.formation = old.formation"
+SAME_DAY = SAME_FORMATION + " AND {other}.date = old.date"
+
+
+def encode(doc: str) -> tuple[bytes, bytes]:
+    """
+    # Digest and compressed body of a JSON document
+    """
+    data = doc.encode("utf8")
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return (digest, zlib.compress(data, COMPRESSION_LEVEL))
+
+def decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+def formation_meta(form: Formation) -> str:
+    return json.dumps(
+        {"raw": form.raw, "recovered": form.recovered, "name": form.name},
+        ensure_ascii=False
+    )
+
+
+@dataclass
+class ScheduleHistory:
+    """
+    # Append-only history of schedule pages
+
+    Blocking `sqlite3` calls run in a single
+    dedicated thread, like in `SqliteStorage`.
+    Digests of the latest stored formations and days
+    are kept in memory, so recording a version
+    doesn't read anything back.
+    """
+    path: Path
+    keep: datetime.timedelta = datetime.timedelta(days=30)
+    """
+    # Versions older than this are folded into the base
+    """
+    compact_period: datetime.timedelta = datetime.timedelta(days=1)
+    _conn: Optional[sqlite3.Connection] = None
+    _cutoff: int = 0
+    """
+    # Version of the last compaction
+    Rows of older versions may be gone,
+    so nothing before it can be rebuilt.
+    """
+    _latest: dict[tuple[str, ...], bytes] = field(default_factory=dict)
+    """
+    # (kind, formation) or (kind, formation, date) -> digest
+    Removed ones aren't here.
+    """
+    _executor: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="history"
+        )
+    )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'cutoff'"
+        ).fetchone()
+        self._cutoff = row[0] if row else 0
+
+        self._latest = {}
+
+        for (kind, name, digest) in self._conn.execute(LATEST_FORMATIONS):
+            if digest is not None:
+                self._latest[(kind, name)] = digest
+        for (kind, name, date, digest) in self._conn.execute(LATEST_DAYS):
+            if digest is not None:
+                self._latest[(kind, name, date)] = digest
+
+    async def connect(self) -> None:
+        await self.run(self._connect)
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+
+        await self.run(self._conn.close)
+        self._conn = None
+        self._executor.shutdown(wait=False)
+
+    def _record(
+        self,
+        random: str,
+        at: datetime.datetime,
+        pages: list[Page]
+    ) -> int:
+        formation_rows = []
+        day_rows = []
+        seen: set[tuple[str, ...]] = set()
+
+        for page in pages:
+            kind = page.kind
+
+            for form in page.formations:
+                key = (kind, form.name)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                digest, doc = encode(formation_meta(form))
+                if self._latest.get(key) != digest:
+                    formation_rows.append((kind, form.name, digest, doc))
+
+                for day in form.days:
+                    date = day.date.isoformat()
+                    key = (kind, form.name, date)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                    digest, doc = encode(day.model_dump_json())
+                    if self._latest.get(key) != digest:
+                        day_rows.append((kind, form.name, date, digest, doc))
+
+        kinds = {page.kind for page in pages}
+
+        # whatever was there before but is missing now was removed
+        for key in list(self._latest.keys()):
+            if key[0] not in kinds or key in seen:
+                continue
+
+            if len(key) == 2:
+                formation_rows.append((*key, None, None))
+            else:
+                day_rows.append((*key, None, None))
+
+        if not formation_rows and not day_rows:
+            return 0
+
+        with self._conn:
+            self._conn.execute("BEGIN")
+            version_id = self._conn.execute(
+                "INSERT INTO versions (random, at) VALUES (?, ?)",
+                (random, at.timestamp())
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO formations VALUES (?, ?, ?, ?, ?)",
+                ((kind, name, version_id, digest, doc)
+                 for (kind, name, digest, doc) in formation_rows)
+            )
+            self._conn.executemany(
+                "INSERT INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                ((kind, name, date, version_id, digest, doc)
+                 for (kind, name, date, digest, doc) in day_rows)
+            )
+
+        # only once it's all stored
+        for (*key, digest, _doc) in formation_rows + day_rows:
+            if digest is None:
+                self._latest.pop(tuple(key), None)
+            else:
+                self._latest[tuple(key)] = digest
+
+        return len(formation_rows) + len(day_rows)
+
+    async def record(
+        self,
+        random: str,
+        pages: list[Page],
+        at: Optional[datetime.datetime] = None
+    ) -> int:
+        """
+        # Store a new version of `pages`
+        ## Returns
+        - number of changed formations and days,
+        nothing is stored if it's 0
+        """
+        at = at or datetime.datetime.now(datetime.UTC)
+        return await self.run(self._record, random, at, pages)
+
+    def _version_at(self, at: datetime.datetime) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT MAX(id) FROM versions WHERE at <= ?",
+            (at.timestamp(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _readable_version_at(self, at: datetime.datetime) -> Optional[int]:
+        version_id = self._version_at(at)
+        if version_id is None:
+            return None
+
+        # only the state at the cutoff is left of older versions
+        return max(version_id, self._cutoff)
+
+    def _formation_at(
+        self,
+        kind: str,
+        name: str,
+        at: datetime.datetime
+    ) -> Optional[Formation]:
+        version_id = self._readable_version_at(at)
+        if version_id is None:
+            return None
+
+        row = self._conn.execute(
+            FORMATION_AT,
+            (kind, name, version_id)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        days = [
+            Day.model_validate(decode(doc))
+            for (doc,) in self._conn.execute(DAYS_AT, (kind, name, version_id))
+        ]
+
+        return Formation(**decode(row[0]), days=days)
+
+    async def formation_at(
+        self,
+        kind: str,
+        name: str,
+        at: datetime.datetime
+    ) -> Optional[Formation]:
+        """
+        # State of a formation at `at`
+        Only reads rows of this formation.
+        """
+        return await self.run(self._formation_at, kind, name, at)
+
+    async def changes(
+        self,
+        kind: str,
+        name: str,
+        since: datetime.datetime,
+        until: Optional[datetime.datetime] = None
+    ) -> Optional[FormationCompare]:
+        """
+        # What changed for a formation between two moments
+        ## Example
+        ```
+        week_ago = now - datetime.timedelta(days=7)
+        form_cmp = await history.changes("groups", "1КДД69", week_ago)
+        ```
+        """
+        until = until or datetime.datetime.now(datetime.UTC)
+
+        old = await self.formation_at(kind, name, since)
+        new = await self.formation_at(kind, name, until)
+
+        if old is None and new is None:
+            return None
+        if old is None or new is None:
+            # appeared or disappeared as a whole
+            form = new or old
+            empty = Formation(raw=form.raw, recovered=form.recovered, name=form.name, days=[])
+            old = old or empty
+            new = new or empty
+
+        return diff.formation(old, new)
+
+    def _versions(
+        self,
+        since: datetime.datetime,
+        until: datetime.datetime
+    ) -> list[tuple[str, datetime.datetime]]:
+        rows = self._conn.execute(
+            "SELECT random, at FROM versions WHERE at > ? AND at <= ? ORDER BY id",
+            (since.timestamp(), until.timestamp())
+        ).fetchall()
+
+        return [
+            (random, datetime.datetime.fromtimestamp(at, datetime.UTC))
+            for (random, at) in rows
+        ]
+
+    async def versions(
+        self,
+        since: datetime.datetime,
+        until: Optional[datetime.datetime] = None
+    ) -> list[tuple[str, datetime.datetime]]:
+        """
+        # `(random, at)` of versions stored in this period
+        """
+        until = until or datetime.datetime.now(datetime.UTC)
+        return await self.run(self._versions, since, until)
+
+    def _compact(self, before: datetime.datetime) -> None:
+        cutoff = self._version_at(before)
+        if cutoff is None or cutoff <= self._cutoff:
+            return
+
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('cutoff', ?)",
+                (cutoff,)
+            )
+
+            for (table, same_key) in (
+                ("formations", SAME_FORMATION),
+                ("days", SAME_DAY),
+            ):
+                for statement in COMPACT:
+                    self._conn.execute(
+                        statement.format(
+                            table=table,
+                            same_as_newer=same_key.format(other="newer"),
+                            same_as_older=same_key.format(other="older")
+                        ),
+                        {"cutoff": cutoff}
+                    )
+
+        self._cutoff = cutoff
+
+    async def compact(self, before: Optional[datetime.datetime] = None) -> None:
+        """
+        # Fold versions older than `before` into one base state
+        Queries for moments before it (`formation_at`, `changes`)
+        get the state at `before` instead, the cutoff
+        is stored, so this holds after a restart too.
+        """
+        before = before or datetime.datetime.now(datetime.UTC) - self.keep
+        await self.run(self._compact, before)
+
+    async def compact_loop(self) -> Never:
+        while True:
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(
+                    f"unable to compact schedule history: {type(e).__name__}({e})"
+                )
+
+            await asyncio.sleep(self.compact_period.total_seconds())
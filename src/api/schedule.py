@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import datetime
+import uuid
 from loguru import logger
 from typing import Optional, Never
 from typing_extensions import Self
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from websockets import client, exceptions
 from websockets.legacy import client
 from aiohttp.client_exceptions import (
@@ -15,8 +16,11 @@ from aiohttp.client_exceptions import (
 )
 from src.api import get, Notify
 from src.data import week
-from src.data.schedule import Page
+from src.api import snapshot
+from src.api.history import ScheduleHistory
+from src.data.schedule import Page, compact, diff
 from src.data.duration import Duration
+from src.parse.nameindex import NameIndex
 from src.persistence import Persistence
 
 
@@ -76,13 +80,45 @@ class ScheduleApi:
     # A "ready" event channel
     Firing once all data is ready.
     """
+    snapshot_path: Optional[Path] = None
+    """
+    # Where the last good schedule is saved
+    Loaded at startup, so schedules can be shown
+    before ktmuscrap is reachable.
+    """
+    history: Optional[ScheduleHistory] = None
+    """
+    # Every version of received pages
+    """
 
-    _cached_groups: Optional[Page] = None
-    _cached_teachers: Optional[Page] = None
+    _cached_groups: Optional[compact.Page] = None
+    _cached_teachers: Optional[compact.Page] = None
 
     _cached_last_update: Optional[datetime.datetime] = None
     _cached_update_period: Optional[Duration] = None
 
+    _group_index: NameIndex = field(default_factory=NameIndex)
+    _teacher_index: NameIndex = field(default_factory=NameIndex)
+
+    _received_groups: Optional[Page] = None
+    _received_teachers: Optional[Page] = None
+    """
+    # Validated pages kept until they're snapshotted
+    """
+    _caught_up_last_update: Optional[datetime.datetime] = None
+    """
+    # Last update time of the schedule a catch-up was made for
+    """
+    _snapshot_mtime: Optional[int] = None
+    """
+    # When the loaded snapshot file was written, in ns
+    """
+    _is_fresh: bool = False
+    """
+    # Something from ktmuscrap was cached already
+    A snapshot loaded at startup must not replace it.
+    """
+
     async def schedule_from_url(self, url: str) -> Optional[Page]:
         response = await get(url)
         if response.data is None:
@@ -90,20 +126,33 @@ class ScheduleApi:
 
         return response.data.page
 
-    async def request_groups(self) -> Page:
+    @staticmethod
+    def to_compact(page: Optional[Page]) -> Optional[compact.Page]:
+        if page is None:
+            return None
+        return compact.Page.from_model(page)
+
+    async def request_groups(self) -> Optional[compact.Page]:
         """
         # Request groups schedule and cache it
         """
         url = "http://" + self.addr + "/schedule/groups"
-        self._cached_groups = await self.schedule_from_url(url)
+        self._received_groups = await self.schedule_from_url(url)
+        # converting a full page takes a while, keep polling going
+        groups = await asyncio.to_thread(self.to_compact, self._received_groups)
+        self._is_fresh = True
+        self._cached_groups = groups
         return self._cached_groups
         
-    async def request_teachers(self) -> Page:
+    async def request_teachers(self) -> Optional[compact.Page]:
         """
         # Request teachers schedule and cache it
         """
         url = "http://" + self.addr + "/schedule/teachers"
-        self._cached_teachers = await self.schedule_from_url(url)
+        self._received_teachers = await self.schedule_from_url(url)
+        teachers = await asyncio.to_thread(self.to_compact, self._received_teachers)
+        self._is_fresh = True
+        self._cached_teachers = teachers
         return self._cached_teachers
 
     async def request_last_update(self) -> datetime.datetime:
@@ -114,7 +163,7 @@ class ScheduleApi:
         self._cached_last_update = (await get(url)).data.updates.last
         return self._cached_last_update
 
-    async def request_update_period(self) -> Page:
+    async def request_update_period(self) -> Duration:
         """
         # Request update period and cache it
         """
@@ -122,25 +171,233 @@ class ScheduleApi:
         self._cached_update_period = (await get(url)).data.updates.period
         return self._cached_update_period
     
-    async def request_all(self):
+    async def request_all(
+        self,
+        catch_up: bool = False,
+        random: Optional[str] = None
+    ) -> Optional[Notify]:
         """
         # Request all data and cache it
+        ## Params
+        - `catch_up` - compare received pages
+        with the snapshot before replacing it
+        - `random` - `Notify.random` this request is made for,
+        recorded in history
+        ## Returns
+        - changes since the snapshot if `catch_up` is set
         """
         await self.request_groups()
-        try: self._cached_groups._chunk_formations_by_week()
-        except AttributeError: ...
-        
         await self.request_teachers()
-        try: self._cached_teachers._chunk_formations_by_week()
-        except AttributeError: ...
-        
         await self.request_last_update()
         await self.request_update_period()
+
+        self.rebuild_indexes()
+
+        missed = None
+        if catch_up:
+            missed = await self.compare_with_snapshot()
+
+        await self.record_history(random or f"fetch-{uuid.uuid4().hex}")
+        await self.save_snapshot()
+
+        return missed
+
+    async def record_history(self, random: str) -> None:
+        if self.history is None:
+            return
+
+        pages = [
+            page for page in (self._received_groups, self._received_teachers)
+            if page is not None
+        ]
+        if not pages:
+            return
+
+        try:
+            await self.history.record(random, pages)
+        except Exception as e:
+            logger.error(
+                f"unable to record schedule history: {type(e).__name__}({e})"
+            )
+
+    async def compare_with_snapshot(self) -> Optional[Notify]:
+        """
+        # Changes between the snapshot and just received pages
+        """
+        if self.snapshot_path is None:
+            return None
+
+        groups = self._received_groups
+        teachers = self._received_teachers
+
+        def compare() -> Optional[Notify]:
+            snap = snapshot.load(self.snapshot_path)
+            if snap is None:
+                return None
+
+            return Notify(
+                random=f"catch-up-{uuid.uuid4().hex}",
+                groups=diff.page(
+                    old=snap.groups,
+                    new=groups
+                ) if snap.groups and groups else None,
+                teachers=diff.page(
+                    old=snap.teachers,
+                    new=teachers
+                ) if snap.teachers and teachers else None
+            )
+
+        try:
+            return await asyncio.to_thread(compare)
+        except Exception as e:
+            logger.error(
+                f"unable to compare with schedule snapshot: {type(e).__name__}({e})"
+            )
+            return None
+
+    async def broadcast(self, notify: Notify) -> None:
+        """
+        # Send this week's changes to subscribers
+        Handed to the broadcaster if there's one.
+        """
+        from src import defs
+
+        if defs.broadcast_queue is not None:
+            await defs.broadcast_queue.put_notify(notify)
+            return
+
+        await self.broadcast_here(notify)
+
+    async def broadcast_here(self, notify: Notify) -> None:
+        from src import defs
+
+        notify._chunk_formations_by_week()
+        current_active_week = week.current_active()
+        notify = notify.get_week_self(current_active_week)
+
+        if not notify.is_eligible_for_broadcast():
+            return
+
+        await defs.storage.prepare()
+        await defs.ctx.broadcast(notify)
+
+    async def save_snapshot(self) -> None:
+        """
+        # Replace the snapshot with just received data
+        """
+        groups = self._received_groups
+        teachers = self._received_teachers
+        # compact pages are all we need from now on
+        self._received_groups = None
+        self._received_teachers = None
+
+        if self.snapshot_path is None:
+            return
+        if groups is None and teachers is None:
+            # don't replace a good snapshot with nothing
+            return
+
+        snap = snapshot.Snapshot(
+            random=self.last_notify.random if self.last_notify else None,
+            last_update=self._cached_last_update,
+            update_period=self._cached_update_period,
+            groups=groups,
+            teachers=teachers
+        )
+
+        try:
+            await asyncio.to_thread(snapshot.save, self.snapshot_path, snap)
+        except Exception as e:
+            logger.error(
+                f"unable to save schedule snapshot: {type(e).__name__}({e})"
+            )
+
+    async def load_snapshot(self, replace: bool = False) -> None:
+        """
+        # Serve the last saved schedule until fresh data arrives
+        ## Params
+        - `replace` - load it even if
+        there's something cached already
+        """
+        if self.snapshot_path is None:
+            return
+
+        def load() -> Optional[tuple[snapshot.Snapshot, Optional[compact.Page], Optional[compact.Page]]]:
+            snap = snapshot.load(self.snapshot_path)
+            if snap is None:
+                return None
+            return (snap, self.to_compact(snap.groups), self.to_compact(snap.teachers))
+
+        try:
+            loaded = await asyncio.to_thread(load)
+        except Exception as e:
+            logger.error(
+                f"unable to load schedule snapshot: {type(e).__name__}({e})"
+            )
+            return
+
+        if loaded is None:
+            return
+        # checked right before assigning, with no awaits in between,
+        # so pages received while loading are never replaced
+        if (self.is_cached_available or self._is_fresh) and not replace:
+            # ktmuscrap was faster
+            return
+
+        snap, groups, teachers = loaded
+
+        self._cached_groups = groups
+        self._cached_teachers = teachers
+        self._cached_last_update = snap.last_update
+        self._cached_update_period = snap.update_period
+        self.rebuild_indexes()
+        self.is_cached_available = True
+
+        logger.info(f"serving schedule snapshot saved at {snap.saved_at}")
+
+    async def follow_snapshot(self, interval: float = 1.0) -> Never:
+        """
+        # Load the snapshot every time it's replaced
+        For sharded workers, only the coordinator
+        talks to ktmuscrap and saves snapshots.
+        """
+        while True:
+            await self.refresh_snapshot()
+            await asyncio.sleep(interval)
+
+    async def refresh_snapshot(self) -> None:
+        """
+        # Load the snapshot if it was replaced since last time
+        """
+        try:
+            mtime = self.snapshot_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+
+        if mtime == self._snapshot_mtime:
+            return
+
+        self._snapshot_mtime = mtime
+        await self.load_snapshot(replace=True)
+
+    def rebuild_indexes(self):
+        """
+        # Rebuild name lookups from cached pages
+        """
+        groups = self.get_groups()
+        teachers = self.get_teachers()
+
+        self._group_index = NameIndex.from_names(
+            groups.names() if groups else []
+        )
+        self._teacher_index = NameIndex.from_names(
+            teachers.names() if teachers else []
+        )
     
-    def get_groups(self) -> Optional[Page]:
+    def get_groups(self) -> Optional[compact.Page]:
         return self._cached_groups
 
-    def get_teachers(self) -> Optional[Page]:
+    def get_teachers(self) -> Optional[compact.Page]:
         return self._cached_teachers
 
     def get_last_update(self) -> Optional[datetime.datetime]:
@@ -153,24 +410,30 @@ class ScheduleApi:
         """
         # Group names present in the schedule
         """
-        page = self.get_groups()
-        if page is None: return []
-        return page.names()
+        return self._group_index.names
     
     def teacher_names(self) -> list[str]:
         """
         # Teacher names present in the schedule
         """
-        page = self.get_teachers()
-        if page is None: return []
-        return page.names()
+        return self._teacher_index.names
+
+    def group_index(self) -> NameIndex:
+        """
+        # Lookup over group names present in the schedule
+        """
+        return self._group_index
+
+    def teacher_index(self) -> NameIndex:
+        """
+        # Lookup over teacher names present in the schedule
+        """
+        return self._teacher_index
 
     async def updates(self) -> Never:
         """
         # Listen to updates
         """
-        from src import defs
-
         retry_period = 5
         is_connection_attempt_logged = False
         is_connect_error_logged = False
@@ -197,7 +460,7 @@ class ScheduleApi:
                     create_protocol=protocol_factory
                 ) as socket:
                     try:
-                        await self.request_all()
+                        missed = await self.request_all(catch_up=True)
 
                         self.is_online = True
                         self.is_cached_available = True
@@ -205,6 +468,11 @@ class ScheduleApi:
                         is_connection_attempt_logged = False
                         await self.ready_channel.put(True)
 
+                        if missed is not None:
+                            logger.info("broadcasting changes missed while disconnected")
+                            self._caught_up_last_update = self._cached_last_update
+                            await self.broadcast(missed)
+
                         logger.info(f"awaiting schedule updates...")
                         async for message in socket:
                             notify = Notify.model_validate_json(message)
@@ -216,18 +484,24 @@ class ScheduleApi:
                                 continue
 
                             # update data cache
-                            await self.request_all()
-
-                            notify._chunk_formations_by_week()
-                            current_active_week = week.current_active()
-                            notify = notify.get_week_self(current_active_week)
+                            await self.request_all(random=notify.random)
                             self.last_notify.set_random(notify.random)
-                            
-                            if not notify.is_eligible_for_broadcast():
+
+                            caught_up_last_update = self._caught_up_last_update
+                            self._caught_up_last_update = None
+
+                            if (
+                                caught_up_last_update is not None and
+                                caught_up_last_update == self._cached_last_update
+                            ):
+                                # ktmuscrap resends its last notify on connect,
+                                # the catch-up already covered it
+                                logger.info(
+                                    f"notify {notify.random} was covered by catch-up, ignoring"
+                                )
                                 continue
 
-                            await defs.check_redisearch_index()
-                            await defs.ctx.broadcast(notify)
+                            await self.broadcast(notify)
                     except exceptions.ConnectionClosedError as e:
                         logger.info(e)
                         logger.info("reconnecting to ktmuscrap...")
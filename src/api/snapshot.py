@@ -0,0 +1,98 @@
+"""
+# Last good schedule on disk
+
+Lets the bot show schedules right after a restart,
+even if ktmuscrap is unreachable.
+
+The file is a short header followed by
+zlib-compressed JSON of `Snapshot`:
+```
+b"KTMS" | format version (u16, big endian) | zlib(json)
+```
+It is written to a temporary file next to it
+and then renamed over, so a crash mid-write
+never leaves a broken snapshot behind.
+"""
+from __future__ import annotations
+import datetime
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from src.data.duration import Duration
+from src.data.schedule import Page
+
+
+MAGIC = b"KTMS"
+VERSION = 1
+"""
+# Bump when `Snapshot` changes incompatibly
+Snapshots of other versions are ignored.
+"""
+HEADER = struct.Struct(">4sH")
+COMPRESSION_LEVEL = 6
+
+
+class Snapshot(BaseModel):
+    saved_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.UTC)
+    )
+    random: Optional[str] = None
+    """
+    # `Notify.random` of the last notify received before saving
+    """
+    last_update: Optional[datetime.datetime] = None
+    update_period: Optional[Duration] = None
+    groups: Optional[Page] = None
+    teachers: Optional[Page] = None
+
+
+def encode(snapshot: Snapshot) -> bytes:
+    payload = snapshot.model_dump_json().encode("utf8")
+    return HEADER.pack(MAGIC, VERSION) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def decode(data: bytes) -> Optional[Snapshot]:
+    """
+    # Parse a snapshot
+    ## Returns
+    - `None` if it's not a snapshot or has another version
+    """
+    if len(data) < HEADER.size:
+        return None
+
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+
+    payload = zlib.decompress(memoryview(data)[HEADER.size:])
+    return Snapshot.model_validate_json(payload)
+
+
+def save(path: Path, snapshot: Snapshot) -> None:
+    """
+    # Atomically replace the snapshot at `path`
+    Blocking, run it in a thread.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, mode="wb") as f:
+        f.write(encode(snapshot))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def load(path: Path) -> Optional[Snapshot]:
+    """
+    # Read the snapshot at `path`
+    Blocking, run it in a thread.
+    """
+    if not path.exists():
+        return None
+
+    return decode(path.read_bytes())
@@ -0,0 +1,140 @@
+"""
+# Broadcasts in a separate process
+
+With `broadcast.separate` set, the process that listens
+to ktmuscrap doesn't broadcast by itself,
+it puts a job to a Redis stream instead:
+- `notify` - changes from a notify, as JSON
+- `weekcast` - schedule for the next week, with this header
+
+The broadcaster (`python -m src --broadcaster`)
+takes jobs one by one: loads the snapshot
+saved along with the notify, finds who needs it,
+renders, sends and saves ctxs.
+Its sends leave a part of shared rate budgets
+to replies, see `src.ratelimit`.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Never, Optional, TYPE_CHECKING
+from loguru import logger
+from redis.asyncio import Redis
+
+
+if TYPE_CHECKING:
+    from src.api import Notify
+
+
+STREAM = "broadcast_jobs"
+GROUP = "broadcaster"
+CONSUMER = "broadcaster"
+STREAM_SIZE = 1000
+READ_BLOCK_MS = 5000
+
+
+class JobKind:
+    NOTIFY = "notify"
+    WEEKCAST = "weekcast"
+
+
+@dataclass
+class BroadcastQueue:
+    """
+    # Where broadcasts are sent to
+    """
+    redis: Redis
+
+    async def put(self, kind: str, payload: str) -> None:
+        await self.redis.xadd(
+            STREAM,
+            {"kind": kind, "payload": payload},
+            maxlen=STREAM_SIZE,
+            approximate=True
+        )
+
+    async def put_notify(self, notify: "Notify") -> None:
+        await self.put(JobKind.NOTIFY, notify.model_dump_json())
+
+    async def put_weekcast(self, header: str) -> None:
+        await self.put(JobKind.WEEKCAST, header)
+
+
+@dataclass
+class Broadcaster:
+    """
+    # Does broadcasts from the queue
+    """
+    redis: Redis
+
+    async def handle(self, kind: str, payload: str) -> None:
+        from src import defs
+        from src.api import Notify
+
+        # the job was put right after the snapshot was saved
+        await defs.schedule.refresh_snapshot()
+
+        if kind == JobKind.NOTIFY:
+            notify = Notify.model_validate_json(payload)
+            logger.info(f"broadcasting notify {notify.random}")
+            await defs.schedule.broadcast_here(notify)
+        elif kind == JobKind.WEEKCAST:
+            logger.info("broadcasting weekcast")
+            await defs.ctx.broadcast_schedule_to_subscribes(header=payload)
+        else:
+            logger.warning(f"unknown broadcast job {kind}, skipping")
+
+    async def handle_entry(self, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        try:
+            await self.handle(
+                fields[b"kind"].decode(),
+                fields[b"payload"].decode()
+            )
+        except Exception as e:
+            logger.exception(
+                f"broadcast job {entry_id} failed: {type(e).__name__}({e})"
+            )
+        finally:
+            await self.redis.xack(STREAM, GROUP, entry_id)
+
+    async def consume(self) -> Never:
+        """
+        # Do broadcasts one by one
+        Starts with the one the previous run didn't finish.
+        """
+        from src.workers import consume_group
+
+        await consume_group(
+            self.redis,
+            STREAM,
+            GROUP,
+            CONSUMER,
+            self.handle_entry,
+            count=1,
+            block=READ_BLOCK_MS
+        )
+
+
+def load(is_broadcaster: bool = False) -> tuple[Optional[BroadcastQueue], Optional[Broadcaster]]:
+    """
+    # Queue or broadcaster for this process
+    Both `None` if broadcasts are done in place.
+    Workers get a queue too, but only
+    the main process starts the broadcaster.
+    """
+    from src import defs
+    from src.storage.redisdb import RedisStorage
+
+    if not defs.settings.broadcast.separate:
+        return (None, None)
+
+    if not isinstance(defs.storage, RedisStorage):
+        logger.warning(
+            "separate broadcaster needs redis backend, "
+            "broadcasting in place"
+        )
+        return (None, None)
+
+    if is_broadcaster:
+        return (None, Broadcaster(redis=defs.storage.redis))
+
+    return (BroadcastQueue(redis=defs.storage.redis), None)
@@ -84,6 +84,15 @@ class DataWarning:
     anchor: str
     text: str
 
+    by_anchor: ClassVar[dict[str, DataWarning]] = {}
+    """
+    # Every warning defined, by its anchor
+    Lets warnings be stored as anchors only.
+    """
+
+    def __post_init__(self) -> None:
+        DataWarning.by_anchor[self.anchor] = self
+
     @staticmethod
     def format_multiple(warns: Iterable[DataWarning]) -> str:
         text_warns: list[str] = []
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import datetime
+from dataclasses import dataclass
 from typing import Generic, TypeVar, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic_core import core_schema
 from src.data import format as output
 
 
@@ -28,14 +30,7 @@ class Range(BaseModel, Generic[T]):
             isinstance(self.start, datetime.date)
             and isinstance(self.end, datetime.date)
         ):
-            start_day = output.zero_at_start(self.start.day)
-            start_month = output.zero_at_start(self.start.month)
-            start_year = str(self.start.year)
-            end_day = output.zero_at_start(self.end.day)
-            end_month = output.zero_at_start(self.end.month)
-            end_year = str(self.end.year)
-            
-            return f"{start_day}.{start_month}.{start_year} - {end_day}.{end_month}.{end_year}"
+            return format_dates(self.start, self.end)
 
         return f"{self.start} - {self.end}"
     
@@ -66,3 +61,76 @@ class Range(BaseModel, Generic[T]):
         else:
             rng = range(self.start, self.end)
             return item in rng
+
+
+def format_dates(start: datetime.date, end: datetime.date) -> str:
+    start_day = output.zero_at_start(start.day)
+    start_month = output.zero_at_start(start.month)
+    start_year = str(start.year)
+    end_day = output.zero_at_start(end.day)
+    end_month = output.zero_at_start(end.month)
+    end_year = str(end.year)
+
+    return f"{start_day}.{start_month}.{start_year} - {end_day}.{end_month}.{end_year}"
+
+
+@dataclass(frozen=True, slots=True)
+class DateRange:
+    """
+    # Immutable date range
+    Same as `Range`,
+    but cheap to make, compare and hash,
+    so weeks can be used as dict keys.
+
+    Validated and serialized by pydantic
+    as `{"start": ..., "end": ...}`,
+    just like `Range`.
+    """
+    start: datetime.date
+    end: datetime.date
+    """
+    # Non-inclusive
+    """
+
+    def __str__(self) -> str:
+        return format_dates(self.start, self.end)
+
+    def __gt__(self, value: object) -> bool:
+        if not isinstance(value, DateRange):
+            return NotImplemented
+        return self.start > value.start
+
+    def __lt__(self, value: object) -> bool:
+        if not isinstance(value, DateRange):
+            return NotImplemented
+        return self.start < value.start
+
+    def __contains__(self, item: Any) -> bool:
+        return self.start <= item < self.end
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls,
+        source: Any,
+        handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        fields_schema = core_schema.typed_dict_schema({
+            "start": core_schema.typed_dict_field(core_schema.date_schema()),
+            "end": core_schema.typed_dict_field(core_schema.date_schema()),
+        })
+        from_fields = core_schema.no_info_after_validator_function(
+            lambda fields: cls(start=fields["start"], end=fields["end"]),
+            fields_schema
+        )
+
+        return core_schema.json_or_python_schema(
+            json_schema=from_fields,
+            python_schema=core_schema.union_schema([
+                core_schema.is_instance_schema(cls),
+                from_fields
+            ]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda rng: {"start": rng.start, "end": rng.end},
+                return_schema=fields_schema
+            )
+        )
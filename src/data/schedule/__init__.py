@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import datetime
+import sys
 from typing import Literal, Optional, Generic, TypeVar
 from typing_extensions import Self
 from dataclasses import dataclass
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from src.parse import pattern
 from src.data import RepredBaseModel, week
 from src.data.weekday import WEEKDAYS
 from src.data.schedule import raw
-from src.data.range import Range
+from src.data.range import DateRange
 
 
 T = TypeVar("T")
@@ -48,7 +49,7 @@ class GetDate:
 
 @dataclass
 class Weeked(Generic[T]):
-    week: Range[datetime.date]
+    week: DateRange
     data: T
 
     @classmethod
@@ -57,33 +58,27 @@ class Weeked(Generic[T]):
         # Chunk a days container by weeks
         """
         chunks: list[Weeked] = []
-        
-        current_week: Optional[Range[datetime.date]] = None
+
+        current_key: Optional[int] = None
         hold: list[Day] = []
-        
-        for idx, day in enumerate(pack):
-            try:
-                next_day = pack[idx+1]
-                next_day_week = week.from_day(next_day.get_date())
-                is_last = False
-            except IndexError:
-                next_day = None
-                next_day_week = None
-                is_last = True
-            
-            day_week = week.from_day(day.get_date())
-            
-            if current_week is None:
-                current_week = day_week
-            
-            hold.append(day)
-            
-            if next_day_week != current_week or is_last:
-                weeked = Weeked(week=day_week, data=hold)
-                chunks.append(weeked)
+
+        # consecutive days with the same week key
+        # go to the same chunk, ranges are only
+        # made once per chunk
+        for day in pack:
+            key = week.key_of(day.get_date())
+
+            if key != current_key:
+                if hold:
+                    chunks.append(cls(week=week.from_key(current_key), data=hold))
+                current_key = key
                 hold = []
-                current_week = next_day_week
-        
+
+            hold.append(day)
+
+        if hold:
+            chunks.append(cls(week=week.from_key(current_key), data=hold))
+
         return chunks
 
 
@@ -128,7 +123,7 @@ class Schedule(BaseModel):
     This is set according to which identifier
     was requested: a group or a teacher.
     """
-    temp_week: Optional[Range[datetime.date]] = None
+    temp_week: Optional[DateRange] = None
     """
     # Temporary week range
     
@@ -162,7 +157,7 @@ class Schedule(BaseModel):
         self.reset_temp_mode()
         self.reset_temp_week()
     
-    def get_week_or_current(self) -> Range[datetime.date]:
+    def get_week_or_current(self) -> DateRange:
         """
         # Get `temp_week` or a current one
         """
@@ -170,6 +165,28 @@ class Schedule(BaseModel):
         else: return week.current_active()
     
 
+def normalize_cabinet(cabinet: Optional[str]) -> Optional[str]:
+    """
+    # Make a comparison key out of a cabinet
+    ## Example
+    ```
+    assert normalize_cabinet("каб. 39а") == normalize_cabinet("39а")
+    ```
+    """
+    if cabinet is None:
+        return None
+
+    if pattern.DIGIT.search(cabinet):
+        cabinet = cabinet.lower().replace("каб", "")
+
+    # remove punctuation
+    cabinet = pattern.SPACE.sub("", cabinet)
+    cabinet = pattern.PUNCTUATION.sub("", cabinet)
+
+    # the same few cabinets repeat all over the schedule
+    return sys.intern(cabinet)
+
+
 class Cabinet(BaseModel):
     recovered: bool
     primary: Optional[str]
@@ -189,6 +206,27 @@ class Cabinet(BaseModel):
     `opposite` would reference a cabinet found in
     teacher's schedule.
     """
+    _primary_key: Optional[str] = PrivateAttr(default=None)
+    _opposite_key: Optional[str] = PrivateAttr(default=None)
+    _versions_match: bool = PrivateAttr(default=True)
+    """
+    # Cached result of `do_versions_match_complex`
+    Computed once the page is loaded,
+    so formatting doesn't run regexes
+    on every attender.
+    """
+
+    def model_post_init(self, __context) -> None:
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        # Recompute normalized keys
+        Call it after changing `primary` or `opposite`.
+        """
+        self._primary_key = normalize_cabinet(self.primary)
+        self._opposite_key = normalize_cabinet(self.opposite)
+        self._versions_match = self._primary_key == self._opposite_key
 
     def do_versions_match(self) -> bool:
         """
@@ -206,7 +244,7 @@ class Cabinet(BaseModel):
         cab.do_version_match() // False
         ```
         """
-        self.primary == self.opposite
+        return self.primary == self.opposite
     
     def do_versions_match_complex(self) -> bool:
         """
@@ -220,6 +258,8 @@ class Cabinet(BaseModel):
         to remove excess garbage
         (like prefix and punctuation)
         and compares just the numbers.
+        The result is computed once on validation,
+        see `refresh()`.
         
         ## Example
         ```
@@ -230,30 +270,7 @@ class Cabinet(BaseModel):
         cab.do_version_match_complex() // False
         ```
         """
-        if self.primary is None and self.opposite is not None:
-            return False
-        if self.primary is not None and self.opposite is None:
-            return False
-        if self.primary is None and self.opposite is None:
-            return True
-
-        primary_contains_digits = pattern.DIGIT.search(self.primary)
-        opposite_contains_digits = pattern.DIGIT.search(self.opposite)
-        
-        clean_primary = self.primary.lower().replace(
-            "каб", ""
-        ) if primary_contains_digits else self.primary
-        clean_opposite = self.opposite.lower().replace(
-            "каб", ""
-        ) if opposite_contains_digits else self.opposite
-        
-        # remove punctuation
-        clean_primary = pattern.SPACE.sub("", clean_primary)
-        clean_opposite = pattern.SPACE.sub("", clean_opposite)
-        clean_primary = pattern.PUNCTUATION.sub("", clean_primary)
-        clean_opposite = pattern.PUNCTUATION.sub("", clean_opposite)
-        
-        return clean_primary == clean_opposite
+        return self._versions_match
 
 
 class Attender(RepredBaseModel):
@@ -343,7 +360,7 @@ class Formation(RepredBaseModel):
         )
         return Weeked(week=weeked.week, data=form)
     
-    def get_week_range(self) -> Optional[Range[datetime.date]]:
+    def get_week_range(self) -> Optional[DateRange]:
         try:
             return self.days_weekly_chunked[0].week
         except IndexError:
@@ -352,12 +369,12 @@ class Formation(RepredBaseModel):
     def get_days(self) -> list[GetDate]:
         return self.days
     
-    def get_week(self, rng: Range[datetime.date]) -> Optional[list[Day]]:
+    def get_week(self, rng: DateRange) -> Optional[list[Day]]:
         for weeked in self.days_weekly_chunked:
             if weeked.week == rng:
                 return weeked.data
     
-    def get_week_self(self, rng: Range[datetime.date]) -> Optional[Formation]:
+    def get_week_self(self, rng: DateRange) -> Optional[Formation]:
         w = self.get_week(rng)
         if w is None: return None
         return Formation(
@@ -368,19 +385,19 @@ class Formation(RepredBaseModel):
             days_weekly_chunked=[Weeked[list[Day]](week=rng, data=w)]
         )
     
-    def prev_week(self, rng: Range[datetime.date]) -> Optional[Weeked[list[Day]]]:
+    def prev_week(self, rng: DateRange) -> Optional[Weeked[list[Day]]]:
         for idx, weeked in enumerate(self.days_weekly_chunked):
             if weeked.week != rng: continue
             prev_idx = idx - 1
             if prev_idx < 0: return None
             return self.days_weekly_chunked[prev_idx]
     
-    def prev_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def prev_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.prev_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
     
-    def nearest_prev_week(self, rng: Range[datetime.date]) -> Optional[Weeked[list[Day]]]:
+    def nearest_prev_week(self, rng: DateRange) -> Optional[Weeked[list[Day]]]:
         try:
             return next(filter(
                 lambda weeked: rng > weeked.week,
@@ -389,23 +406,23 @@ class Formation(RepredBaseModel):
         except StopIteration:
             return None
     
-    def nearest_prev_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def nearest_prev_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.nearest_prev_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
     
-    def next_week(self, rng: Range[datetime.date]) -> Optional[Weeked[list[Day]]]:
+    def next_week(self, rng: DateRange) -> Optional[Weeked[list[Day]]]:
         for idx, weeked in enumerate(self.days_weekly_chunked):
             if weeked.week != rng: continue
             try: return self.days_weekly_chunked[idx+1]
             except IndexError: return None
     
-    def next_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def next_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.next_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
     
-    def nearest_next_week(self, rng: Range[datetime.date]) -> Optional[Weeked[list[Day]]]:
+    def nearest_next_week(self, rng: DateRange) -> Optional[Weeked[list[Day]]]:
         try:
             return next(filter(
                 lambda weeked: rng < weeked.week,
@@ -414,7 +431,7 @@ class Formation(RepredBaseModel):
         except StopIteration:
             return None
     
-    def nearest_next_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def nearest_next_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.nearest_next_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
@@ -423,7 +440,7 @@ class Formation(RepredBaseModel):
         try: return self.days_weekly_chunked[0]
         except: return None
     
-    def first_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def first_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.first_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
@@ -432,14 +449,14 @@ class Formation(RepredBaseModel):
         try: return self.days_weekly_chunked[-1]
         except: return None
 
-    def last_week_self(self, rng: Range[datetime.date]) -> Optional[Weeked[Formation]]:
+    def last_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
         w = self.last_week(rng)
         if w is None: return None
         return self._copy_weeked(w)
 
 class Page(BaseModel):
     kind: raw.KIND_LITERAL
-    date: Range[datetime.date]
+    date: DateRange
     formations: list[Formation]
     """
     # Either groups or teachers
@@ -0,0 +1,398 @@
+"""
+# Compact read-only schedule
+
+Pages received from ktmuscrap are validated
+into pydantic models (`src.data.schedule.Page`),
+but the ones `ScheduleApi` keeps cached
+for the whole uptime are converted into these
+slotted frozen dataclasses.
+
+- strings are interned
+- equal cabinets, attenders, subjects and dates
+are stored once and shared
+- week chunks are index spans into `Formation.days`
+instead of separate day lists
+
+Attribute names are the same as in pydantic models,
+so formatting code works with both.
+"""
+from __future__ import annotations
+import datetime
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional, TypeVar
+
+from src.data.range import DateRange
+from src.data.weekday import WEEKDAYS
+from src.data.schedule import (
+    NO_NAME,
+    ATTENDER_KIND_LITERAL,
+    FORMAT_LITERAL,
+    Weeked,
+    GetDate,
+    raw,
+)
+from src.data import schedule
+
+
+T = TypeVar("T")
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+@dataclass
+class Interner:
+    """
+    # Shares equal immutable objects
+    Lives only while a page is being converted.
+    """
+    objects: dict[Hashable, Any] = field(default_factory=dict)
+
+    def get(self, obj: T) -> T:
+        return self.objects.setdefault(obj, obj)
+
+
+@dataclass(frozen=True, slots=True)
+class Cabinet:
+    recovered: bool
+    primary: Optional[str]
+    opposite: Optional[str]
+    versions_match: bool
+
+    @classmethod
+    def from_model(
+        cls: type[Cabinet],
+        model: schedule.Cabinet,
+        interner: Interner
+    ) -> Cabinet:
+        return interner.get(cls(
+            recovered=model.recovered,
+            primary=intern(model.primary),
+            opposite=intern(model.opposite),
+            versions_match=model.do_versions_match_complex()
+        ))
+
+    def do_versions_match(self) -> bool:
+        return self.primary == self.opposite
+
+    def do_versions_match_complex(self) -> bool:
+        return self.versions_match
+
+
+@dataclass(frozen=True, slots=True)
+class Attender:
+    raw: str
+    recovered: bool
+    kind: ATTENDER_KIND_LITERAL
+    name: str
+    cabinet: Cabinet
+
+    @classmethod
+    def from_model(
+        cls: type[Attender],
+        model: schedule.Attender,
+        interner: Interner
+    ) -> Attender:
+        return interner.get(cls(
+            raw=intern(model.raw),
+            recovered=model.recovered,
+            kind=intern(model.kind),
+            name=intern(model.name),
+            cabinet=Cabinet.from_model(model.cabinet, interner)
+        ))
+
+    @property
+    def repr_name(self) -> str:
+        name = self.name.replace("\n", "").strip()
+        raw = self.raw.replace("\n", "").strip()
+        return name or raw or NO_NAME
+
+
+@dataclass(frozen=True, slots=True)
+class Subject:
+    raw: str
+    recovered: bool
+    name: str
+    num: int
+    format: FORMAT_LITERAL
+    attenders: tuple[Attender, ...]
+
+    @classmethod
+    def from_model(
+        cls: type[Subject],
+        model: schedule.Subject,
+        interner: Interner
+    ) -> Subject:
+        return interner.get(cls(
+            raw=intern(model.raw),
+            recovered=model.recovered,
+            name=intern(model.name),
+            num=model.num,
+            format=intern(model.format),
+            attenders=tuple(
+                Attender.from_model(att, interner)
+                for att in model.attenders
+            )
+        ))
+
+    @property
+    def repr_name(self) -> str:
+        name = self.name.replace("\n", "").strip()
+        raw = self.raw.replace("\n", "").strip()
+        return name or raw or NO_NAME
+
+    def is_unknown_window(self) -> bool:
+        return self.raw != "" and len(self.attenders) < 1
+
+
+@dataclass(frozen=True, slots=True)
+class Day:
+    raw: str
+    recovered: bool
+    date: datetime.date
+    subjects: tuple[Subject, ...]
+
+    @classmethod
+    def from_model(
+        cls: type[Day],
+        model: schedule.Day,
+        interner: Interner
+    ) -> Day:
+        return cls(
+            raw=intern(model.raw),
+            recovered=model.recovered,
+            date=interner.get(model.date),
+            subjects=tuple(
+                Subject.from_model(subj, interner)
+                for subj in model.subjects
+            )
+        )
+
+    @property
+    def repr_name(self) -> str:
+        return WEEKDAYS[self.date.weekday()]
+
+    def get_date(self) -> datetime.date:
+        return self.date
+
+
+@dataclass(frozen=True, slots=True)
+class WeekSpan:
+    """
+    # Days of a single week
+    `Formation.days[start:stop]`
+    """
+    week: DateRange
+    start: int
+    stop: int
+
+
+@dataclass(frozen=True, slots=True)
+class Formation:
+    """
+    # Either a group or a teacher
+    """
+    raw: str
+    recovered: bool
+    name: str
+    days: tuple[Day, ...]
+    weeks: tuple[WeekSpan, ...]
+    week_index: dict[DateRange, int] = field(
+        init=False,
+        repr=False,
+        compare=False
+    )
+    """
+    # Week -> its position in `weeks`
+    """
+
+    def __post_init__(self) -> None:
+        week_index = {span.week: idx for (idx, span) in enumerate(self.weeks)}
+        object.__setattr__(self, "week_index", week_index)
+
+    @classmethod
+    def from_model(
+        cls: type[Formation],
+        model: schedule.Formation,
+        interner: Interner
+    ) -> Formation:
+        days = tuple(Day.from_model(day, interner) for day in model.days)
+        weeks = []
+        start = 0
+
+        for weeked in Weeked[list[Day]].chunk_by_weeks(pack=days):
+            stop = start + len(weeked.data)
+            weeks.append(WeekSpan(
+                week=interner.get(weeked.week),
+                start=start,
+                stop=stop
+            ))
+            start = stop
+
+        return cls(
+            raw=intern(model.raw),
+            recovered=model.recovered,
+            name=intern(model.name),
+            days=days,
+            weeks=tuple(weeks)
+        )
+
+    @property
+    def repr_name(self) -> str:
+        return self.name or NO_NAME
+
+    @property
+    def days_weekly_chunked(self) -> list[Weeked[tuple[Day, ...]]]:
+        return [self._weeked(span) for span in self.weeks]
+
+    def _weeked(self, span: WeekSpan) -> Weeked[tuple[Day, ...]]:
+        return Weeked(week=span.week, data=self.days[span.start:span.stop])
+
+    def _copy_weeked(self, weeked: Weeked[tuple[Day, ...]]) -> Weeked[Formation]:
+        form = Formation(
+            raw=self.raw,
+            recovered=self.recovered,
+            name=self.name,
+            days=weeked.data,
+            weeks=(WeekSpan(week=weeked.week, start=0, stop=len(weeked.data)),)
+        )
+        return Weeked(week=weeked.week, data=form)
+
+    def _span_idx(self, rng: DateRange) -> Optional[int]:
+        return self.week_index.get(rng)
+
+    def week_count(self) -> int:
+        return len(self.weeks)
+
+    def week_position(self, rng: DateRange) -> Optional[int]:
+        """
+        # Index of `rng` among this formation's weeks
+        """
+        return self.week_index.get(rng)
+
+    def has_week_before(self, rng: DateRange) -> bool:
+        idx = self.week_index.get(rng)
+        if idx is not None:
+            return idx > 0
+        return bool(self.weeks) and self.weeks[0].week < rng
+
+    def has_week_after(self, rng: DateRange) -> bool:
+        idx = self.week_index.get(rng)
+        if idx is not None:
+            return idx + 1 < len(self.weeks)
+        return bool(self.weeks) and rng < self.weeks[-1].week
+
+    def get_week_range(self) -> Optional[DateRange]:
+        try:
+            return self.weeks[0].week
+        except IndexError:
+            return None
+
+    def get_days(self) -> list[GetDate]:
+        return list(self.days)
+
+    def get_week(self, rng: DateRange) -> Optional[tuple[Day, ...]]:
+        idx = self._span_idx(rng)
+        if idx is None: return None
+        return self._weeked(self.weeks[idx]).data
+
+    def get_week_self(self, rng: DateRange) -> Optional[Formation]:
+        idx = self._span_idx(rng)
+        if idx is None: return None
+        return self._copy_weeked(self._weeked(self.weeks[idx])).data
+
+    def prev_week(self, rng: DateRange) -> Optional[Weeked[tuple[Day, ...]]]:
+        idx = self._span_idx(rng)
+        if idx is None or idx - 1 < 0: return None
+        return self._weeked(self.weeks[idx - 1])
+
+    def prev_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
+        w = self.prev_week(rng)
+        if w is None: return None
+        return self._copy_weeked(w)
+
+    def nearest_prev_week(self, rng: DateRange) -> Optional[Weeked[tuple[Day, ...]]]:
+        for span in reversed(self.weeks):
+            if rng > span.week:
+                return self._weeked(span)
+
+    def nearest_prev_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
+        w = self.nearest_prev_week(rng)
+        if w is None: return None
+        return self._copy_weeked(w)
+
+    def next_week(self, rng: DateRange) -> Optional[Weeked[tuple[Day, ...]]]:
+        idx = self._span_idx(rng)
+        if idx is None or idx + 1 >= len(self.weeks): return None
+        return self._weeked(self.weeks[idx + 1])
+
+    def next_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
+        w = self.next_week(rng)
+        if w is None: return None
+        return self._copy_weeked(w)
+
+    def nearest_next_week(self, rng: DateRange) -> Optional[Weeked[tuple[Day, ...]]]:
+        for span in self.weeks:
+            if rng < span.week:
+                return self._weeked(span)
+
+    def nearest_next_week_self(self, rng: DateRange) -> Optional[Weeked[Formation]]:
+        w = self.nearest_next_week(rng)
+        if w is None: return None
+        return self._copy_weeked(w)
+
+    def first_week(self) -> Optional[Weeked[tuple[Day, ...]]]:
+        if not self.weeks: return None
+        return self._weeked(self.weeks[0])
+
+    def first_week_self(self) -> Optional[Weeked[Formation]]:
+        w = self.first_week()
+        if w is None: return None
+        return self._copy_weeked(w)
+
+    def last_week(self) -> Optional[Weeked[tuple[Day, ...]]]:
+        if not self.weeks: return None
+        return self._weeked(self.weeks[-1])
+
+    def last_week_self(self) -> Optional[Weeked[Formation]]:
+        w = self.last_week()
+        if w is None: return None
+        return self._copy_weeked(w)
+
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    kind: raw.KIND_LITERAL
+    date: DateRange
+    formations: tuple[Formation, ...]
+    by_name: dict[str, Formation]
+
+    @classmethod
+    def from_model(cls: type[Page], model: schedule.Page) -> Page:
+        interner = Interner()
+        formations = tuple(
+            Formation.from_model(form, interner)
+            for form in model.formations
+        )
+        by_name = {}
+
+        for form in formations:
+            # first one wins, like in a linear search
+            by_name.setdefault(form.name, form)
+
+        return cls(
+            kind=model.kind,
+            date=model.date,
+            formations=formations,
+            by_name=by_name
+        )
+
+    def names(self) -> list[str]:
+        return [formation.name for formation in self.formations]
+
+    def get_by_name(self, name: str) -> Optional[Formation]:
+        return self.by_name.get(name)
@@ -14,7 +14,7 @@ from src.data import (
     RepredBaseModel
 )
 from src.data.weekday import WEEKDAYS
-from src.data.range import Range
+from src.data.range import DateRange
 from src.data.schedule import (
     Weeked,
     GetDate,
@@ -140,7 +140,7 @@ class FormationCompare(RepredBaseModel):
             )
         )
     
-    def get_week_range(self) -> Optional[Range[datetime.date]]:
+    def get_week_range(self) -> Optional[DateRange]:
         try:
             if self.days_weekly_chunked.appeared:
                 return self.days_weekly_chunked.appeared[0].week
@@ -153,7 +153,7 @@ class FormationCompare(RepredBaseModel):
     
     def get_week_self(
         self,
-        rng: Range[datetime.date]
+        rng: DateRange
     ) -> Self:
         appeared = None
         disappeared = None
@@ -188,7 +188,7 @@ class FormationCompare(RepredBaseModel):
 
 
 class PageCompare(BaseModel):
-    date: PrimitiveChange[Range[datetime.date]] = Field(
+    date: PrimitiveChange[DateRange] = Field(
         default_factory=PrimitiveChange
     )
     formations: DetailedChanges[FormationCompare, Formation] = Field(
@@ -205,7 +205,7 @@ class PageCompare(BaseModel):
         for form in self.formations.changed:
             form._chunk_by_weeks()
     
-    def get_week_range(self) -> Optional[Range[datetime.date]]:
+    def get_week_range(self) -> Optional[DateRange]:
         try:
             if self.formations.appeared:
                 return self.formations.appeared[0].get_week_range()
@@ -216,7 +216,7 @@ class PageCompare(BaseModel):
         except (AttributeError, IndexError):
             return None
     
-    def get_week_self(self, rng: Range[datetime.date]) -> Self:
+    def get_week_self(self, rng: DateRange) -> Self:
         appeared = []
         disappeared = []
         changed = []
@@ -0,0 +1,248 @@
+"""
+# Local schedule comparison
+
+Produces the same `PageCompare` ktmuscrap sends in notifies,
+but from two pages the bot has,
+so changes made while the bot was away
+can still be broadcasted.
+
+Everything is matched through dicts
+(formations by name, days by date, subjects by name and number,
+attenders by name), and unchanged formations and days
+are skipped by comparing their keys,
+so no nested pairwise comparisons happen.
+"""
+from __future__ import annotations
+from typing import Any, Hashable, Optional, TypeVar
+
+from src.data.range import DateRange
+from src.data.schedule import (
+    Page,
+    Formation,
+    Day,
+    Subject,
+    Attender,
+    Cabinet
+)
+from src.data.schedule.compare import (
+    PageCompare,
+    FormationCompare,
+    DayCompare,
+    SubjectCompare,
+    AttenderCompare,
+    CabinetCompare,
+    DetailedChanges,
+    PrimitiveChange
+)
+
+
+T = TypeVar("T")
+
+
+def cabinet_key(cab: Cabinet) -> tuple:
+    return (cab.primary, cab.opposite)
+
+def attender_key(att: Attender) -> tuple:
+    return (att.name, att.kind, cabinet_key(att.cabinet))
+
+def subject_key(subj: Subject) -> tuple:
+    return (
+        subj.raw,
+        subj.name,
+        subj.num,
+        subj.format,
+        tuple(attender_key(att) for att in subj.attenders)
+    )
+
+def day_key(day: Day) -> tuple:
+    return tuple(subject_key(subj) for subj in day.subjects)
+
+def formation_key(form: Formation) -> tuple:
+    return tuple((day.date, day_key(day)) for day in form.days)
+
+
+def first_by(items: list[T], key: Any) -> dict[Hashable, T]:
+    """
+    # Map items by `key`, first one wins
+    """
+    mapping = {}
+    for item in items:
+        mapping.setdefault(key(item), item)
+    return mapping
+
+
+def primitive(
+    model: type[PrimitiveChange[T]],
+    old: T,
+    new: T
+) -> Optional[PrimitiveChange[T]]:
+    if old == new:
+        return None
+    return model(old=old, new=new)
+
+
+def cabinet(old: Cabinet, new: Cabinet) -> CabinetCompare:
+    return CabinetCompare(
+        primary=primitive(PrimitiveChange[str], old.primary, new.primary),
+        opposite=primitive(PrimitiveChange[str], old.opposite, new.opposite)
+    )
+
+
+def attenders(
+    old: list[Attender],
+    new: list[Attender]
+) -> Optional[DetailedChanges[AttenderCompare, Attender]]:
+    old_by_name = first_by(old, lambda att: att.name)
+    new_by_name = first_by(new, lambda att: att.name)
+    changes = DetailedChanges[AttenderCompare, Attender]()
+
+    for (name, att) in new_by_name.items():
+        old_att = old_by_name.get(name)
+
+        if old_att is None:
+            changes.appeared.append(att)
+        elif cabinet_key(old_att.cabinet) != cabinet_key(att.cabinet):
+            changes.changed.append(AttenderCompare(
+                name=name,
+                cabinet=cabinet(old_att.cabinet, att.cabinet)
+            ))
+
+    for (name, att) in old_by_name.items():
+        if name not in new_by_name:
+            changes.disappeared.append(att)
+
+    if not (changes.appeared or changes.disappeared or changes.changed):
+        return None
+
+    return changes
+
+
+def subject(old: Subject, new: Subject) -> Optional[SubjectCompare]:
+    num = primitive(PrimitiveChange[int], old.num, new.num)
+    atts = attenders(old.attenders, new.attenders)
+
+    if num is None and atts is None:
+        return None
+
+    return SubjectCompare(
+        raw=new.raw,
+        name=new.name,
+        num=num,
+        attenders=atts
+    )
+
+
+def subjects(
+    old: list[Subject],
+    new: list[Subject]
+) -> DetailedChanges[SubjectCompare, Subject]:
+    changes = DetailedChanges[SubjectCompare, Subject]()
+    old_keys = {subject_key(subj) for subj in old}
+    new_keys = {subject_key(subj) for subj in new}
+
+    # exactly the same ones aren't interesting
+    old_left = [subj for subj in old if subject_key(subj) not in new_keys]
+    new_left = [subj for subj in new if subject_key(subj) not in old_keys]
+
+    # same subject at the same time first,
+    # then the same subject moved to another time
+    pairs: list[tuple[Subject, Subject]] = []
+
+    for key in (
+        lambda subj: (subj.name, subj.num),
+        lambda subj: subj.name
+    ):
+        old_by_key: dict[Hashable, list[Subject]] = {}
+        for subj in old_left:
+            old_by_key.setdefault(key(subj), []).append(subj)
+
+        unmatched = []
+        for subj in new_left:
+            candidates = old_by_key.get(key(subj))
+            if candidates:
+                pairs.append((candidates.pop(0), subj))
+            else:
+                unmatched.append(subj)
+
+        new_left = unmatched
+        old_left = [
+            subj for candidates in old_by_key.values() for subj in candidates
+        ]
+
+    for (old_subj, new_subj) in pairs:
+        compared = subject(old_subj, new_subj)
+        if compared is not None:
+            changes.changed.append(compared)
+        else:
+            # differs only in what compare models
+            # can't show, like format or raw text
+            changes.disappeared.append(old_subj)
+            changes.appeared.append(new_subj)
+
+    changes.appeared.extend(new_left)
+    changes.disappeared.extend(old_left)
+
+    return changes
+
+
+def formation(old: Formation, new: Formation) -> Optional[FormationCompare]:
+    if formation_key(old) == formation_key(new):
+        return None
+
+    old_by_date = first_by(old.days, lambda day: day.date)
+    new_by_date = first_by(new.days, lambda day: day.date)
+    days = DetailedChanges[DayCompare, Day]()
+
+    for (date, day) in new_by_date.items():
+        old_day = old_by_date.get(date)
+
+        if old_day is None:
+            days.appeared.append(day)
+        elif day_key(old_day) != day_key(day):
+            days.changed.append(DayCompare(
+                date=date,
+                subjects=subjects(old_day.subjects, day.subjects)
+            ))
+
+    for (date, day) in old_by_date.items():
+        if date not in new_by_date:
+            days.disappeared.append(day)
+
+    if not (days.appeared or days.disappeared or days.changed):
+        return None
+
+    return FormationCompare(name=new.name, days=days)
+
+
+def page(old: Page, new: Page) -> PageCompare:
+    """
+    # Compare two versions of a page
+    ## Example
+    ```
+    page_cmp = diff.page(old=snapshot.groups, new=fresh_groups)
+    page_cmp._chunk_formations_by_week()
+    ```
+    """
+    old_by_name = first_by(old.formations, lambda form: form.name)
+    new_by_name = first_by(new.formations, lambda form: form.name)
+    formations = DetailedChanges[FormationCompare, Formation]()
+
+    for (name, form) in new_by_name.items():
+        old_form = old_by_name.get(name)
+
+        if old_form is None:
+            formations.appeared.append(form)
+            continue
+
+        compared = formation(old_form, form)
+        if compared is not None:
+            formations.changed.append(compared)
+
+    for (name, form) in old_by_name.items():
+        if name not in new_by_name:
+            formations.disappeared.append(form)
+
+    return PageCompare(
+        date=PrimitiveChange[DateRange](old=old.date, new=new.date),
+        formations=formations
+    )
@@ -1,5 +1,6 @@
 import datetime
 import difflib
+import functools
 from typing import (
     Optional,
     Union,
@@ -8,7 +9,7 @@ from typing import (
 )
 from dataclasses import dataclass
 from src import text, defs
-from src.data.range import Range
+from src.data.range import Range, DateRange
 from src.svc import telegram
 from src.svc.common import messages
 from src.data.schedule.compare import (
@@ -17,14 +18,14 @@ from src.data.schedule.compare import (
     PrimitiveChange,
 )
 from src.data.schedule import (
-    Formation,
     Day,
     Subject,
     Attender,
     AttenderKind,
     Format,
     FORMAT_LITERAL,
-    compare
+    compare,
+    compact
 )
 from src.data.weekday import (
     Weekday,
@@ -132,9 +133,12 @@ def week_bullets_from_bitmap(bitmap: list[bool]) -> str:
     
     return output
 
-def week_bullets_from_formation(form: Formation, pos: Range[datetime.date]) -> str:
-    bitmap = map(lambda weeked: weeked.week == pos, form.days_weekly_chunked)
-    return week_bullets_from_bitmap(bitmap)
+def week_bullets_from_formation(form: compact.Formation, pos: DateRange) -> str:
+    idx = form.week_position(pos)
+    return navigation_bullets(
+        count=form.week_count(),
+        idx=idx if idx is not None else -1
+    )
 
 
 def keycap_num(num: int) -> str:
@@ -169,7 +173,12 @@ def circle_keycap_num_range(range: Range[int]) -> str:
     return f"{start}{CIRCLE_KEYCAPS_RANGE_DASH}{end}"
 
 
+@functools.lru_cache(maxsize=1024)
 def navigation_bullets(count: int, idx: int) -> str:
+    """
+    # `count` bullets with the one at `idx` filled
+    Only a few combinations exist, so they're cached.
+    """
     output = ""
     
     for i in range(count):
@@ -232,31 +241,33 @@ def attender_cabinet(
 def attenders(
     atts: list[Attender],
     format: FORMAT_LITERAL,
-    entries: set[zoom.Data],
+    entries: zoom.Entries,
     add_recovered_suffix: bool = True,
     do_tg_markup: bool = False,
 ) -> list[str]:
-    str_entries = [entry.name.value for entry in entries]
+    str_entries: Optional[list[str]] = None
 
     fmt_attenders: list[str] = []
 
     for att in atts:
-        matches = difflib.get_close_matches(att.name, str_entries, cutoff=0.8)
+        # exact name is always the closest match
+        found_entry = entries.get(att.name)
+
+        if found_entry is None and entries.has_something:
+            if str_entries is None:
+                str_entries = entries.names()
 
-        if len(matches) < 1:
+            matches = difflib.get_close_matches(att.name, str_entries, cutoff=0.8)
+            if matches:
+                found_entry = entries.get(matches[0])
+
+        if found_entry is None:
             fmt_attenders.append(attender_cabinet(
                 att,
                 add_recovered_suffix=add_recovered_suffix
             ))
             continue
         
-        first_match = matches[0]
-        found_entry = None
-
-        for entry in entries:
-            if entry.name.value == first_match:
-                found_entry = entry
-        
         fmt_data = found_entry.format_inline(
             include_name=False,
             only_notes=format == Format.FULLTIME,
@@ -306,7 +317,7 @@ def subject_from_parts(
 
 def subject(
     subj: Subject,
-    entries: set[zoom.Data],
+    entries: zoom.Entries,
     rng: Optional[Range[Subject]] = None,
     weekday: Optional[WEEKDAY_LITERAL] = None,
     add_recovered_suffix: bool = True,
@@ -351,8 +362,7 @@ def subject(
         )
     
     num = keycap_num(subj.num)
-    raw_time = defs.settings.get_time_for(wkd=weekday, num=subj.num)
-    time = str(raw_time) if raw_time else ""
+    time = defs.settings.get_time_str_for(wkd=weekday, num=subj.num) or ""
     name = subj.name if subj.name else subj.raw
     if do_tg_markup: name = telegram.escape_html(name)
     attenders_ = attenders(
@@ -388,7 +398,7 @@ def subject(
 
 def days(
     day_list: list[Day],
-    entries: set[zoom.Data],
+    entries: zoom.Entries,
     add_recovered_suffix: bool = True,
     do_tg_markup: bool = False
 ) -> list[str]:
@@ -548,9 +558,9 @@ def days(
 
 
 def formation(
-    form: Optional[Formation],
-    week_pos: Range[datetime.date],
-    entries: list[zoom.Data],
+    form: Optional[compact.Formation],
+    week_pos: DateRange,
+    entries: zoom.Entries,
     mode: "MODE_LITERAL",
     do_tg_markup: bool = False,
     is_group_chat: bool = False,
@@ -617,7 +627,7 @@ def formation(
                 name_prefix=ZOOM_NAME_PREFIX,
                 only_notes=False,
                 do_tg_markup=do_tg_markup
-            ) for entry in entries
+            ) for entry in entries.list
         ])
 
     return (
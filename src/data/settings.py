@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import Optional, Any, Literal
+from typing import Optional, Any, Literal, Union
 from pydantic import BaseModel, Field as PydField
 import difflib
 
 from src.data import zoom as zoom_mod
 from src.svc import common
 from src.parse import pattern, group, teacher
+from src.parse.nameindex import NameIndex
 from src.svc.common.states import State, Values
 from src.svc.common.states.tree import INIT, SETTINGS as SettingsTree
 
@@ -32,7 +33,7 @@ class Teacher(BaseModel):
     valid: Optional[str] = None
     confirmed: Optional[str] = None
 
-    def generate_valid(self, reference: list[str]) -> bool:
+    def generate_valid(self, reference: Union[NameIndex, list[str]]) -> bool:
         self.valid = teacher.validate(self.typed, reference)
         return self.valid is not None
     
@@ -48,7 +49,7 @@ class Settings(Values):
     broadcast: Optional[bool] = None
     should_pin: Optional[bool] = None
 
-    def get_from_state(self, state: State) -> Any:
+    def tree_values(self) -> dict[State, Any]:
         storage = None
 
         if self.mode == Mode.GROUP:
@@ -56,7 +57,7 @@ class Settings(Values):
         elif self.mode == Mode.TEACHER:
             storage = self.tchr_zoom
         
-        VALUES = {
+        return {
             SettingsTree.II_MODE: self.mode,
             SettingsTree.II_GROUP: self.group.confirmed,
             SettingsTree.II_TEACHER: self.teacher.confirmed,
@@ -64,8 +65,6 @@ class Settings(Values):
             SettingsTree.III_SHOULD_PIN: self.should_pin,
             SettingsTree.II_ZOOM: len(storage.entries) if storage and storage.is_finished else None
         }
-
-        return VALUES.get(state)
     
     def defaults_from_everything(self, everything: common.CommonEverything):
         if SettingsTree.III_SHOULD_PIN in everything.navigator.ignored:
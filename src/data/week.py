@@ -1,26 +1,34 @@
 import datetime
+import functools
 from typing import Optional
-from src.data.range import Range
+from src.data.range import DateRange
 
 
-def current() -> Range[datetime.date]:
+def current() -> DateRange:
     today = datetime.date.today()
     # Today - Current weekday number = Monday
     start = today - datetime.timedelta(days=today.weekday())
     # Monday + 7 = Monday
     # (since Range is non-inclusive, it includes Sunday but not Monday)
     end = start + datetime.timedelta(days=7)
-    return Range(start=start, end=end)
+    return DateRange(start=start, end=end)
     
-def current_active() -> Range[datetime.date]:
+def current_active() -> DateRange:
     """
     # Get current active week
     ## Returns
     - current week if today's Monday - Saturday
     - next week if today's Sunday
     """
-    today = datetime.date.today()
-    
+    return active_for(datetime.date.today())
+
+@functools.lru_cache(maxsize=1)
+def active_for(today: datetime.date) -> DateRange:
+    """
+    # Get active week as if it was `today`
+    Only computed once a day,
+    the range is immutable so it's safe to share.
+    """
     # 6 == Sunday
     if today.weekday() == 6:
         # Sunday + 1 = Monday
@@ -32,46 +40,62 @@ def current_active() -> Range[datetime.date]:
     # Monday + 7 = Monday
     # (since Range is non-inclusive, it includes Sunday but not Monday)
     end = start + datetime.timedelta(days=7)
-    return Range(start=start, end=end)
+    return DateRange(start=start, end=end)
+
+def key_of(day: datetime.date) -> int:
+    """
+    # Ordinal of the Monday of `day`'s week
+    Same for every day of a week,
+    cheap to compare and hash.
+    """
+    return day.toordinal() - day.weekday()
+
+def from_key(key: int) -> DateRange:
+    """
+    # Get the week by `key_of()` of any of its days
+    """
+    start = datetime.date.fromordinal(key)
+    end = datetime.date.fromordinal(key + 7)
+    return DateRange(start=start, end=end)
 
-def from_day(day: datetime.date) -> Range[datetime.date]:
+def from_day(day: datetime.date) -> DateRange:
     """
     # Get the week of `day`
     """
     start = day - datetime.timedelta(days=day.weekday())
     end = start + datetime.timedelta(days=7)
-    return Range(start=start, end=end)
+    return DateRange(start=start, end=end)
 
-def index_day(rng: Range[datetime.date], idx: int) -> Optional[datetime.date]:
+def index_day(rng: DateRange, idx: int) -> Optional[datetime.date]:
     return rng.start + datetime.timedelta(days=idx)
 
-def previous(rng: Range[datetime.date]) -> Range[datetime.date]:
+def previous(rng: DateRange) -> DateRange:
     """
     # Get previous week
     """
     start = rng.start - datetime.timedelta(days=7)
     end = rng.end - datetime.timedelta(days=7)
-    return Range(start=start, end=end)
+    return DateRange(start=start, end=end)
 
-def next(rng: Range[datetime.date]) -> Range[datetime.date]:
+def next(rng: DateRange) -> DateRange:
     """
     # Get next week
     """
     start = rng.start + datetime.timedelta(days=7)
     end = rng.end + datetime.timedelta(days=7)
-    return Range(start=start, end=end)
+    return DateRange(start=start, end=end)
 
-def ensure_next_after_current(rng: Range[datetime.date]) -> Range[datetime.date]:
+def ensure_next_after_current(rng: DateRange) -> DateRange:
     return starting_from_day(index_day(current(), rng.start.weekday()))
 
-def starting_from_day(day: datetime.date) -> Range[datetime.date]:
+def starting_from_day(day: datetime.date) -> DateRange:
     """
     # A week starting from `day`
     """
     end = day + datetime.timedelta(days=7)
-    return Range(start=day, end=end)
+    return DateRange(start=day, end=end)
 
-def cover_today(idx: int) -> Range[datetime.date]:
+def cover_today(idx: int) -> DateRange:
     """
     # Make a range covering today's weekday, starting from `idx`
     """
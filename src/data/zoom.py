@@ -1,6 +1,7 @@
 from __future__ import annotations
+import functools
+import zlib
 
-import difflib
 from typing import (
     Callable,
     Literal,
@@ -9,16 +10,24 @@ from typing import (
     Any,
     ClassVar,
     TypeVar,
+    Dict,
     List,
     TYPE_CHECKING
 )
-from pydantic import BaseModel, Field as PydField
+from pydantic import (
+    BaseModel,
+    Field as PydField,
+    PrivateAttr,
+    model_serializer,
+    model_validator
+)
 from urllib.parse import urlparse
 from src import data
 from src.svc import common
 from src.data import error
 from src.data import Emojized, Translated, DataWarning, DataField
 from src.parse import pattern, zoom, teacher
+from src.parse.nameindex import NameIndex
 from src.svc import telegram as tg
 
 
@@ -29,6 +38,12 @@ if TYPE_CHECKING:
 
 NAME_LIMIT = 30
 VALUE_LIMIT = 500
+CHECK_VERSION = 1
+"""
+# Bump when `Data.check_*` rules change
+Makes every stored entry get checked again.
+"""
+INLINE_CACHE_SIZE = 4096
 
 
 NAME = (
@@ -63,6 +78,18 @@ def format_section(name: str, fields: list[str]):
     )
 
 
+class Checked(BaseModel):
+    """
+    # Stored results of `Data.check()`
+    """
+    version: int
+    """ # `CHECK_VERSION` they were made with """
+    digest: int
+    """ # `Data.check_digest()` they were made for """
+    warnings: dict[str, list[str]] = PydField(default_factory=dict)
+    """ # Warning anchors by field name, only for fields that have them """
+
+
 class Data(BaseModel, Translated, Emojized):
     name: DataField[str]
     url: DataField[Optional[str]] = PydField(
@@ -80,6 +107,10 @@ class Data(BaseModel, Translated, Emojized):
     notes: DataField[Optional[str]] = PydField(
         default_factory=lambda: DataField(value=None)
     )
+    checked: Optional[Checked] = None
+    """
+    # Results of the last `check()`
+    """
 
     __translation__: ClassVar[dict[str, str]] = {
         "name": "Имя",
@@ -160,27 +191,73 @@ class Data(BaseModel, Translated, Emojized):
 
         return warns
     
+    def check_digest(self, mode: "MODE_LITERAL") -> int:
+        """
+        # Checksum of everything `check()` looks at
+        Stable between runs, unlike `hash()`.
+        """
+        values = (mode, self.name.value, self.url.value, self.id.value)
+        joined = "\x1f".join(value or "" for value in values)
+        return zlib.crc32(joined.encode("utf8"))
+
     def check(self, mode: "MODE_LITERAL"):
+        """
+        # Fill in field warnings
+        Validators only run if checked fields
+        or `CHECK_VERSION` changed since the last time,
+        otherwise stored results are used.
+        """
         from src.data.settings import Mode
 
+        digest = self.check_digest(mode)
+
+        if (
+            self.checked is not None and
+            self.checked.version == CHECK_VERSION and
+            self.checked.digest == digest
+        ):
+            for (key, anchors) in self.checked.warnings.items():
+                getattr(self, key).warnings = [
+                    data.DataWarning.by_anchor[anchor] for anchor in anchors
+                ]
+            return
+
+        self.name.warnings = []
+        self.url.warnings = []
+        self.id.warnings = []
+
         if mode == Mode.GROUP:
-            for warn in self.check_name(self.name.value):
-                self.name.warnings.append(warn)
+            self.name.warnings = self.check_name(self.name.value)
 
-        if hasattr(self, "url") and self.url.value is not None:
-            for warn in self.check_url(self.url.value):
-                self.url.warnings.append(warn)
+        if self.url.value is not None:
+            self.url.warnings = self.check_url(self.url.value)
         
-        if hasattr(self, "id") and self.id.value is not None:
-            for warn in self.check_id(self.id.value):
-                self.id.warnings.append(warn)
+        if self.id.value is not None:
+            self.id.warnings = self.check_id(self.id.value)
+
+        self.checked = Checked(
+            version=CHECK_VERSION,
+            digest=digest,
+            warnings={
+                key: [warn.anchor for warn in field.warnings]
+                for (key, field) in (
+                    ("name", self.name),
+                    ("url", self.url),
+                    ("id", self.id)
+                )
+                if field.warnings
+            }
+        )
 
     def fields(
         self, 
         filter_: Callable[[tuple[str, Any]], bool] = lambda field: True
     ) -> list[tuple[str, DataField[Optional[str]]]]:
         #        tuple    tuple     generator of tuples       condition
-        return [field for field in self.__dict__.items() if filter_(field)]
+        return [
+            field for field in self.__dict__.items()
+            if isinstance(field[1], DataField) and filter_(field)
+        ]
 
     def all_fields_are_set(self, mode: "MODE_LITERAL") -> bool:
         from src.data.settings import Mode
@@ -300,53 +377,19 @@ class Data(BaseModel, Translated, Emojized):
         do_tg_markup: bool = False,
         return_empty_if_no_data: bool = True
     ) -> str:
-        data = []
-        if not only_notes:
-            if self.url.value is not None:
-                if do_tg_markup:
-                    data.append(tg.escape_html(self.url.value))
-                else:
-                    data.append(self.url.value)
-
-            if self.id.value is not None:
-                translation = self.__translation__.get("id")
-                if do_tg_markup:
-                    data.append(f"{translation}: <code>{tg.escape_html(self.id.value)}</code>")
-                else:
-                    data.append(f"{translation}: {self.id.value}")
-
-            if self.pwd.value is not None:
-                translation = self.__translation__.get("pwd").lower()
-                if do_tg_markup:
-                    data.append(f"{translation}: <code>{tg.escape_html(self.pwd.value)}</code>")
-                else:
-                    data.append(f"{translation}: {self.pwd.value}")
-            
-            if self.host_key.value is not None:
-                translation = self.__translation__.get("host_key").lower()
-                if do_tg_markup:
-                    data.append(f"{translation}: <code>{tg.escape_html(self.host_key.value)}</code>")
-                else:
-                    data.append(f"{translation}: {self.host_key.value}")
-
-        if self.notes.value is not None:
-            if do_tg_markup:
-                data.append(f"<code>{tg.escape_html(self.notes.value)}</code>")
-            else:
-                data.append(self.notes.value)
-
-        if not data and return_empty_if_no_data:
-            return ""
-        
-        fmt = ", ".join(data)
-
-        if include_name:
-            if name_prefix:
-                fmt = f"{name_prefix} {self.name.value} | {fmt}"
-            else:
-                fmt = f"{self.name.value} | {fmt}"
-        
-        return fmt
+        return format_inline(
+            name=self.name.value,
+            url=self.url.value,
+            id=self.id.value,
+            pwd=self.pwd.value,
+            host_key=self.host_key.value,
+            notes=self.notes.value,
+            include_name=include_name,
+            name_prefix=name_prefix,
+            only_notes=only_notes,
+            do_tg_markup=do_tg_markup,
+            return_empty_if_no_data=return_empty_if_no_data
+        )
 
     def dump_list(self) -> list[str]:
         fields: list[str] = []
@@ -381,11 +424,16 @@ class Data(BaseModel, Translated, Emojized):
 
 
 class Entries(BaseModel):
-    list: List[Data] = PydField(
-        default_factory=lambda *a, **kw: list(*a, *kw)
-    )
+    """
+    # Zoom entries by their names
+    Stored as `{"list": [...]}` like it used to,
+    so saved ctxs load as they are.
+    """
+    by_name: Dict[str, Data] = PydField(default_factory=dict)
     """
     # The collection of data itself
+    Insertion-ordered, so entries keep
+    the order they were added in
     """
     selected_name: Optional[str] = None
     """
@@ -393,36 +441,66 @@ class Entries(BaseModel):
     - used for selecting an entry from pagination,
     so we know what is being edited right now
     """
+    _name_index: Optional[NameIndex] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_stored_list(cls, values: Any) -> Any:
+        if not isinstance(values, dict) or "list" not in values:
+            return values
+
+        values = dict(values)
+        by_name = {}
+
+        for entry in values.pop("list") or []:
+            if not isinstance(entry, Data):
+                entry = Data.model_validate(entry)
+            # duplicates could get in before,
+            # `get` always returned the first one
+            by_name.setdefault(entry.name.value, entry)
+
+        values["by_name"] = by_name
+        return values
+
+    @model_serializer(mode="wrap")
+    def _to_stored_list(self, handler: Any) -> dict[str, Any]:
+        values = handler(self)
+        values["list"] = list(values.pop("by_name").values())
+        return values
 
     @classmethod
     def from_list(cls: type[Entries], list: list[Data]):
         return cls(list=list)
-    
+
+    @property
+    def list(self) -> List[Data]:
+        return [*self.by_name.values()]
+
+    def names(self) -> List[str]:
+        return [*self.by_name.keys()]
+
     @property
     def selected(self) -> Data:
         return self.get(self.selected_name)
 
     def change_name(self, old: str, new: str) -> None:
-        if old not in self.list:
+        if old not in self.by_name:
             raise error.ZoomNameNotInDatabase(
                 "tried to change inexistent name"
             )
         
-        if new in self.list:
+        if new in self.by_name:
             raise error.ZoomNameInDatabase(
                 "new name is already in the database"
             )
         
-        # get current data from old name
-        data = self.get(old)
-
-        # remove it from the actual set
-        self.remove(old)
+        # take the data out from under its old name
+        data = self.by_name.pop(old)
 
-        # change our backup with a new name
+        # change the name inside it
         data.name = DataField(value=new)
 
-        # add this backup with changed name back
+        # and put it back under a new one
         self.add(data)
 
     def select(self, name: str) -> Data:
@@ -448,66 +526,73 @@ class Entries(BaseModel):
         data: Union[Data, list[Data]], 
         overwrite: bool = False
     ):
-        if isinstance(data, (set, list)):
-            for data_obj in data:
-                if data_obj in self.list and overwrite:
-                    self.list.remove(data_obj)
+        if isinstance(data, Data):
+            data = [data]
 
-                self.list.append(data_obj)
-        
-        elif isinstance(data, Data):
-            if data in self.list and overwrite:
-                self.list.remove(data)
+        for data_obj in data:
+            name = data_obj.name.value
+
+            if name in self.by_name:
+                if not overwrite:
+                    continue
+                # overwritten ones go to the end,
+                # like they're added just now
+                del self.by_name[name]
 
-            self.list.append(data)
+            self.by_name[name] = data_obj
+
+        self._name_index = None
 
     def add_from_name(self, name: str):
         data = Data(name=DataField[str](value=name))
         self.add(data)
 
     def get(self, name: str) -> Optional[Data]:
-        for entry in self.list:
-            if entry.name == name:
-                return entry
-
-        return None
+        return self.by_name.get(name)
     
+    def name_index(self) -> NameIndex:
+        """
+        # Lookup over entry names
+        Rebuilt only if the names changed since the last call.
+        """
+        if self._name_index is None:
+            self._name_index = NameIndex.from_names(self.by_name.keys())
+
+        return self._name_index
+
     def get_approx(self, name: str, as_teacher: bool = True) -> Optional[Data]:
-        names = [entry.name.value for entry in self.list]
+        index = self.name_index()
         
         if as_teacher:
-            valid = teacher.validate(name, names)
+            valid = teacher.validate(name, index)
             return self.get(valid)
         else:
-            matches = difflib.get_close_matches(name, names, cutoff=0.8)
-            try: return self.get(matches[0])
-            except IndexError: return None
+            match = index.closest(name)
+            if match is None: return None
+            return self.get(match)
 
     def has(self, name: str) -> bool:
         """ ## If `name` in this container """
-        return name in self.list
+        return name in self.by_name
 
     @property
     def has_something(self) -> bool:
         """ ## If this container has something """
-        return len(self.list) > 0
+        return len(self.by_name) > 0
 
     def remove(self, name: Union[str, set[str]]):
-        if isinstance(name, set):
-            for n in name:
-                self.list.remove(n)
-            
-            return None
-
         if isinstance(name, str):
-            self.list.remove(name)
+            name = {name}
 
-            return None
+        for n in name:
+            del self.by_name[n]
+
+        self._name_index = None
     
     def format_compact(self, mode: "MODE_LITERAL") -> str:
         names: list[str] = []
 
-        for entry in self.list:
+        for entry in self.by_name.values():
             warns_text: Optional[str] = None
 
             if not entry.all_fields_without_warns():
@@ -524,23 +609,24 @@ class Entries(BaseModel):
         return "\n".join(names)
 
     def clear(self):
-        self.list = set()
+        self.by_name.clear()
+        self._name_index = None
     
     def dump(self) -> str:
         entries_dumps: list[str] = []
 
-        for entry in self.list:
+        for entry in self.by_name.values():
             dump = entry.dump_str()
             entries_dumps.append(dump)
         
         return "\n\n".join(entries_dumps)
     
     def check_all(self, mode: "MODE_LITERAL"):
-        for entry in self.list:
+        for entry in self.by_name.values():
             entry.check(mode)
 
     def __len__(self):
-        return len(self.list)
+        return len(self.by_name)
 
 
 class Storage:
@@ -624,7 +710,7 @@ class Container(BaseModel):
         # add data from `new_entries` to `entries`
         self.entries.add(self.new_entries.list, overwrite = True)
         # clear new entries
-        self.new_entries.list.clear()
+        self.new_entries.clear()
 
         self.finish()
 
@@ -655,15 +741,17 @@ class Container(BaseModel):
 
     @property
     def adding(self) -> Entries:
-        return Entries.from_list(
-            list(set(self.new_entries.list).difference(set(self.entries.list)))
-        )
+        return Entries.from_list([
+            entry for (name, entry) in self.new_entries.by_name.items()
+            if name not in self.entries.by_name
+        ])
 
     @property
     def overwriting(self) -> Entries:
-        return Entries.from_list(
-            list(set(self.entries.list).intersection(set(self.new_entries.list)))
-        )
+        return Entries.from_list([
+            entry for (name, entry) in self.entries.by_name.items()
+            if name in self.new_entries.by_name
+        ])
 
     def finish(self) -> None:
         """ ## Initial step of adding Zoom was completed """
@@ -699,7 +787,7 @@ def focus_auto(everything: common.CommonEverything):
     from src.data.settings import Mode
 
     # if "adding mass zoom" state in trace
-    if tree.ZOOM.I_MASS in everything.ctx.navigator.trace:
+    if everything.ctx.navigator.is_traced(tree.ZOOM.I_MASS):
         if everything.ctx.settings.mode == Mode.GROUP:
             return focus_to_new_entries(everything)
         elif everything.ctx.settings.mode == Mode.TEACHER:
@@ -735,3 +823,71 @@ def unselect(everything: common.CommonEverything):
         everything.ctx.settings.zoom.focus(Storage.ENTRIES)
 
     everything.ctx.settings.zoom.focused.unselect()
+
+
+@functools.lru_cache(maxsize=INLINE_CACHE_SIZE)
+def format_inline(
+    name: Optional[str],
+    url: Optional[str],
+    id: Optional[str],
+    pwd: Optional[str],
+    host_key: Optional[str],
+    notes: Optional[str],
+    include_name: bool = False,
+    name_prefix: Optional[str] = None,
+    only_notes: bool = False,
+    do_tg_markup: bool = False,
+    return_empty_if_no_data: bool = True
+) -> str:
+    """
+    # Entry values in one line
+    Same entries show up in lots of chats and pages,
+    so the text is cached by the values themselves.
+    """
+    data = []
+    if not only_notes:
+        if url is not None:
+            if do_tg_markup:
+                data.append(tg.escape_html(url))
+            else:
+                data.append(url)
+
+        if id is not None:
+            translation = Data.__translation__.get("id")
+            if do_tg_markup:
+                data.append(f"{translation}: <code>{tg.escape_html(id)}</code>")
+            else:
+                data.append(f"{translation}: {id}")
+
+        if pwd is not None:
+            translation = Data.__translation__.get("pwd").lower()
+            if do_tg_markup:
+                data.append(f"{translation}: <code>{tg.escape_html(pwd)}</code>")
+            else:
+                data.append(f"{translation}: {pwd}")
+        
+        if host_key is not None:
+            translation = Data.__translation__.get("host_key").lower()
+            if do_tg_markup:
+                data.append(f"{translation}: <code>{tg.escape_html(host_key)}</code>")
+            else:
+                data.append(f"{translation}: {host_key}")
+
+    if notes is not None:
+        if do_tg_markup:
+            data.append(f"<code>{tg.escape_html(notes)}</code>")
+        else:
+            data.append(notes)
+
+    if not data and return_empty_if_no_data:
+        return ""
+    
+    fmt = ", ".join(data)
+
+    if include_name:
+        if name_prefix:
+            fmt = f"{name_prefix} {name} | {fmt}"
+        else:
+            fmt = f"{name} | {fmt}"
+    
+    return fmt
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Never
+
+from src.logwriter import COLOR_ESCAPE_REGEX
+
+
+MESSAGE_LIMIT = 4000
+"""
+# Max length of a single digest, fits in one message
+"""
+
+
+@dataclass
+class ErrorGroup:
+    """
+    # Errors of the same type raised at the same place
+    """
+    kind: str
+    """
+    # Exception type name or `ERROR` for plain records
+    """
+    location: str
+    """
+    # `module:function:line` where it was raised
+    """
+    count: int = 0
+    first_at: float = 0.0
+    last_at: float = 0.0
+    sample: str = ""
+    """
+    # Full text of the first record
+    """
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.kind, self.location)
+
+    def merge(self, other: ErrorGroup) -> None:
+        self.count += other.count
+        self.first_at = min(self.first_at, other.first_at)
+        self.last_at = max(self.last_at, other.last_at)
+
+
+def group_from_record(record: dict[str, Any], text: str) -> ErrorGroup:
+    kind = "ERROR"
+    location = f"{record['name']}:{record['function']}:{record['line']}"
+
+    exception = record["exception"]
+    if exception is not None:
+        if exception.type is not None:
+            kind = exception.type.__name__
+
+        tb = exception.traceback
+        if tb is not None:
+            # the innermost frame is where it was raised
+            while tb.tb_next is not None:
+                tb = tb.tb_next
+            module = tb.tb_frame.f_globals.get("__name__", "?")
+            function = tb.tb_frame.f_code.co_name
+            location = f"{module}:{function}:{tb.tb_lineno}"
+
+    now = time.time()
+
+    return ErrorGroup(
+        kind=kind,
+        location=location,
+        count=1,
+        first_at=now,
+        last_at=now,
+        sample=COLOR_ESCAPE_REGEX.sub("", text)
+    )
+
+
+@dataclass
+class ErrorDigest:
+    """
+    # Forwards errors to admins as periodic digests
+
+    Every `interval` secs, all errors collected
+    since the last digest are grouped by type
+    and location, and admins get a single message
+    with counts of every group and a sample traceback
+    of the most frequent one.
+
+    No more than `max_per_minute` digests
+    are sent in any minute, if the limit is hit
+    errors keep piling up until the next slot.
+    """
+    interval: float = 60.0
+    max_per_minute: int = 5
+    groups: dict[tuple[str, str], ErrorGroup] = field(default_factory=dict)
+    sent_at: deque[float] = field(default_factory=deque)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, record: dict[str, Any], text: str) -> None:
+        """
+        # Collect an error record
+        Called from the logging thread.
+        """
+        group = group_from_record(record, text)
+
+        with self._lock:
+            existing = self.groups.get(group.key)
+            if existing is None:
+                self.groups[group.key] = group
+            else:
+                existing.merge(group)
+
+    def take(self) -> list[ErrorGroup]:
+        with self._lock:
+            groups = list(self.groups.values())
+            self.groups = {}
+
+        return sorted(groups, key=lambda group: group.count, reverse=True)
+
+    def has_slot(self) -> bool:
+        now = time.monotonic()
+
+        while self.sent_at and now - self.sent_at[0] > 60:
+            self.sent_at.popleft()
+
+        return len(self.sent_at) < self.max_per_minute
+
+    @staticmethod
+    def format(groups: list[ErrorGroup]) -> str:
+        total = sum(group.count for group in groups)
+        header = f"{total} errors in {len(groups)} places\n"
+        summary = "\n".join(
+            f"{group.count}× {group.kind} at {group.location}"
+            for group in groups
+        )
+
+        text = f"{header}\n{summary}"
+
+        # one sample for the most frequent one,
+        # others are usually caused by it anyway
+        room = MESSAGE_LIMIT - len(text) - 2
+        if groups and room > 0:
+            sample = groups[0].sample
+            if len(sample) > room:
+                sample = "…" + sample[-(room - 1):]
+            text += f"\n\n{sample}"
+
+        return text[:MESSAGE_LIMIT]
+
+    async def send(self, text: str) -> None:
+        from src import defs
+        from src.svc import vk, telegram
+        from src.svc.common import Source
+
+        for admin in defs.settings.logging.admins:
+            try:
+                if admin.src == Source.VK and defs.vk_bot:
+                    await vk.chunked_send(
+                        peer_id=admin.id,
+                        message=text,
+                    )
+                elif admin.src == Source.TG and defs.tg_bot:
+                    await telegram.chunked_send(
+                        chat_id=admin.id,
+                        text=text,
+                    )
+            except Exception:
+                # logging it would feed it back to us
+                ...
+
+    async def flush(self) -> None:
+        if not self.has_slot():
+            return
+
+        groups = self.take()
+        if not groups:
+            return
+
+        self.sent_at.append(time.monotonic())
+        await self.send(self.format(groups))
+
+    async def loop(self) -> Never:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import datetime
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, TextIO
+
+
+COLOR_ESCAPE_REGEX = re.compile(r"\x1b[[]\d{1,}m")
+
+
+class Overflow:
+    BLOCK = "block"
+    """
+    # Wait for the writer to catch up
+    Slows down whoever is logging.
+    """
+    DROP = "drop"
+    """
+    # Throw away new lines and count them
+    """
+
+
+@dataclass
+class LogWriter:
+    """
+    # Writes log lines to disk in batches
+
+    `loguru` calls the sink for every line,
+    so `put()` only appends to a bounded queue.
+    A single background thread takes lines
+    out of it in batches, strips color escapes,
+    writes and flushes once per batch,
+    and rotates the file when the byte counter
+    says it got too big.
+    """
+    path: Path
+    max_size: int = 1_048_576
+    """
+    # Rotate when the file gets bigger than this, in bytes
+    """
+    flush_size: int = 65_536
+    """
+    # Flush when this many bytes are waiting
+    """
+    flush_interval: float = 1.0
+    """
+    # Flush at least this often, in secs
+    """
+    queue_size: int = 10_000
+    """
+    # Max lines waiting to be written
+    """
+    overflow: str = Overflow.DROP
+    """
+    # What `put()` does when the queue is full, see `Overflow`
+    """
+    dropped: int = 0
+    """
+    # Lines dropped since the last write
+    """
+    _queue: Optional[queue.Queue[Optional[str]]] = None
+    _thread: Optional[threading.Thread] = None
+    _file: Optional[TextIO] = None
+    _size: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def start(self) -> None:
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._open()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="log-writer",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        # Write everything that's left and close the file
+        """
+        if self._thread is None:
+            return
+
+        # the sentinel has to get in
+        # no matter the overflow policy
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def put(self, line: str) -> None:
+        if self._queue is None:
+            return
+
+        if self.overflow == Overflow.BLOCK:
+            self._queue.put(line)
+            return
+
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _open(self) -> None:
+        self._file = open(self.path, mode="a", encoding="utf8", newline="\n")
+        self._size = self.path.stat().st_size
+
+    def _rotate(self) -> None:
+        now = datetime.datetime.now()
+        now_str = str(now)
+        now_str = now_str.replace(":", "_").replace("/", "_")
+
+        self._file.close()
+        self.path.rename(self.path.parent.joinpath(f"log_{now_str}.txt"))
+        self._open()
+
+    def _write(self, batch: list[str]) -> None:
+        with self._lock:
+            dropped = self.dropped
+            self.dropped = 0
+
+        if dropped:
+            batch.append(f"log writer dropped {dropped} lines\n")
+
+        # one regex pass per batch, not per line
+        text = COLOR_ESCAPE_REGEX.sub("", "".join(batch))
+
+        try:
+            self._file.write(text)
+            self._file.flush()
+            self._size += len(text.encode("utf8"))
+
+            if self._size > self.max_size:
+                self._rotate()
+        except Exception:
+            ...
+
+    def _run(self) -> None:
+        batch: list[str] = []
+        batch_size = 0
+        deadline = time.monotonic() + self.flush_interval
+        is_stopping = False
+
+        while not is_stopping:
+            timeout = max(deadline - time.monotonic(), 0)
+
+            try:
+                line = self._queue.get(timeout=timeout)
+
+                if line is None:
+                    is_stopping = True
+                else:
+                    batch.append(line)
+                    batch_size += len(line.encode("utf8"))
+
+                    # take whatever else is already waiting
+                    # without going back to sleep
+                    while batch_size < self.flush_size:
+                        line = self._queue.get_nowait()
+                        if line is None:
+                            is_stopping = True
+                            break
+                        batch.append(line)
+                        batch_size += len(line.encode("utf8"))
+            except queue.Empty:
+                ...
+
+            is_due = time.monotonic() >= deadline
+            is_full = batch_size >= self.flush_size
+
+            if batch and (is_due or is_full or is_stopping):
+                self._write(batch)
+                batch = []
+                batch_size = 0
+
+            if is_due or not batch:
+                deadline = time.monotonic() + self.flush_interval
+
+        self._file.close()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+import difflib
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+
+CUTOFF = 0.8
+"""
+# Same similarity cutoff `difflib.get_close_matches` was used with
+"""
+IGNORED_CHARS_REGEX = re.compile(r"[\s.\-]+")
+GRAM_SIZE = 2
+CANDIDATES = 16
+"""
+# How many best bigram matches are compared with `difflib`
+"""
+
+
+def normalize(name: str) -> str:
+    """
+    # Make a lookup key out of a name
+    ## Example
+    ```
+    assert normalize("Иванов И.И.") == normalize("иванов ии")
+    assert normalize("1-КДД-69") == normalize("1КДД69")
+    ```
+    """
+    name = name.casefold().replace("ё", "е")
+    return IGNORED_CHARS_REGEX.sub("", name)
+
+def last_name_of(name: str) -> str:
+    return name.split(" ")[0] if " " in name else name
+
+def grams(key: str) -> set[str]:
+    """
+    # Padded character bigrams of a key
+    ## Example
+    ```
+    assert grams("абв") == {"^а", "аб", "бв", "в$"}
+    ```
+    """
+    padded = f"^{key}$"
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - 1)}
+
+
+@dataclass
+class GramIndex:
+    """
+    # Inverted index of bigrams to keys
+    Only keys sharing bigrams with the query
+    are ever looked at.
+    """
+    postings: dict[str, list[str]] = field(default_factory=dict)
+
+    def add(self, key: str) -> None:
+        for gram in grams(key):
+            self.postings.setdefault(gram, []).append(key)
+
+    def candidates(self, key: str, limit: int) -> list[str]:
+        """
+        # Keys sharing the most bigrams with `key`
+        """
+        shared: dict[str, int] = {}
+
+        for gram in grams(key):
+            for candidate in self.postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        return heapq.nlargest(limit, shared, key=shared.__getitem__)
+
+
+@dataclass
+class NameIndex:
+    """
+    # Prebuilt lookup over teacher or group names
+
+    Built once per schedule update,
+    answers the same questions
+    `difflib.get_close_matches` used to,
+    without going through every name on every message.
+    """
+    names: list[str] = field(default_factory=list)
+    name_set: set[str] = field(default_factory=set)
+    by_key: dict[str, str] = field(default_factory=dict)
+    """
+    # Normalized full name -> name
+    """
+    by_last_name: dict[str, str] = field(default_factory=dict)
+    """
+    # Normalized last name -> name
+    """
+    keys_grams: GramIndex = field(default_factory=GramIndex)
+    last_names_grams: GramIndex = field(default_factory=GramIndex)
+
+    @classmethod
+    def from_names(cls: type[NameIndex], names: Iterable[str]) -> NameIndex:
+        self = cls(names=list(names))
+        self.name_set = set(self.names)
+
+        for name in self.names:
+            key = normalize(name)
+            last_name = normalize(last_name_of(name))
+
+            if key not in self.by_key:
+                self.by_key[key] = name
+                self.keys_grams.add(key)
+
+            if last_name not in self.by_last_name:
+                self.last_names_grams.add(last_name)
+            # the last one wins, just like it did
+            # when the map was built on every lookup
+            self.by_last_name[last_name] = name
+
+        return self
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.name_set
+
+    @staticmethod
+    def closest_key(index: GramIndex, key: str) -> Optional[str]:
+        """
+        # Key with the best `difflib` ratio above `CUTOFF`
+        Only keys sharing the most bigrams
+        with `key` are compared with `difflib`.
+        """
+        candidates = index.candidates(key, limit=CANDIDATES)
+        best = None
+        best_ratio = CUTOFF
+
+        # same checks `difflib.get_close_matches` does
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+
+        for candidate in candidates:
+            matcher.set_seq1(candidate)
+            if (
+                matcher.real_quick_ratio() >= best_ratio and
+                matcher.quick_ratio() >= best_ratio
+            ):
+                ratio = matcher.ratio()
+                if ratio >= best_ratio:
+                    best = candidate
+                    best_ratio = ratio
+
+        return best
+
+    def last_name(self, last_name: str) -> Optional[str]:
+        """
+        # Find a teacher by last name only, tolerating typos
+        """
+        key = normalize(last_name)
+
+        found = self.by_last_name.get(key)
+        if found is not None:
+            return found
+
+        closest = self.closest_key(self.last_names_grams, key)
+        if closest is None:
+            return None
+
+        return self.by_last_name[closest]
+
+    def closest(self, name: str) -> Optional[str]:
+        """
+        # Find a name, tolerating typos
+        """
+        key = normalize(name)
+
+        found = self.by_key.get(key)
+        if found is not None:
+            return found
+
+        closest = self.closest_key(self.keys_grams, key)
+        if closest is None:
+            return None
+
+        return self.by_key[closest]
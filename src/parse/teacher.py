@@ -1,9 +1,12 @@
-import difflib
-from typing import Optional
+from typing import Optional, Union
 from . import pattern
+from .nameindex import NameIndex
 
 
-def validate(raw: str, reference: list[str]) -> Optional[str]:
+def validate(
+    raw: str,
+    reference: Union[NameIndex, list[str]]
+) -> Optional[str]:
     teacher = pattern.TEACHER.search(raw)
     if teacher is not None:
         teacher: str = teacher.group()
@@ -43,22 +46,10 @@ def validate(raw: str, reference: list[str]) -> Optional[str]:
     teacher_last_name_case_ignored = pattern.TEACHER_LAST_NAME_CASE_IGNORED.search(raw)
     if teacher_last_name_case_ignored is not None:
         teacher_last_name_case_ignored: str = teacher_last_name_case_ignored.group()
-        capitalized = teacher_last_name_case_ignored.capitalize()
 
-        last_name_short_map = {}
-        for ref in reference:
-            short = ref.split(" ")[0] if " " in ref else ref
-            last_name_short_map[short] = ref
+        if not isinstance(reference, NameIndex):
+            reference = NameIndex.from_names(reference)
 
-        matches = difflib.get_close_matches(
-            capitalized,
-            [short for short in last_name_short_map.keys()],
-            cutoff=0.8
-        )
-        if len(matches) < 1:
-            return None
-
-        first_match = matches[0]
-        return last_name_short_map[first_match]
+        return reference.last_name(teacher_last_name_case_ignored)
     
     return None
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+# Message rate budgets
+
+A token bucket per platform, taken from
+before every message sent or edited.
+With redis backend the buckets live in Redis,
+so the interactive process, workers and the broadcaster
+all draw from the same budget.
+
+The broadcaster has a `reserve`: it waits
+once the bucket gets down to that part of it,
+so replies to users always have room
+even in the middle of a huge broadcast.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+from redis.asyncio import Redis
+
+
+if TYPE_CHECKING:
+    from src.settings import RateLimits
+    from src.storage import Storage
+
+
+KEY = "rate_limit:{name}"
+TTL = 60
+"""
+# Idle buckets are full anyway, let them expire
+"""
+
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local floor = tonumber(ARGV[3])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "at")
+local tokens = tonumber(state[1]) or capacity
+local at = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+
+local wait = 0
+if tokens - 1 >= floor then
+    tokens = tokens - 1
+else
+    wait = (floor + 1 - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "at", tostring(now))
+redis.call("EXPIRE", KEYS[1], ARGV[4])
+
+return tostring(wait)
+"""
+"""
+# Take a token or say how long to wait for one
+Uses Redis clock, so every process agrees on time.
+"""
+
+
+@dataclass
+class Bucket:
+    rate: float
+    """
+    # Tokens added per second
+    """
+    capacity: float
+    """
+    # Most tokens it can hold, how big a burst can be
+    """
+
+
+@dataclass
+class RateLimiter:
+    """
+    # Base for rate budgets
+    """
+    buckets: dict[str, Bucket] = field(default_factory=dict)
+    reserve: float = 0.0
+    """
+    # Part of each bucket this process leaves to others
+    - `0.0` for the interactive process
+    - `broadcast.reserve` for the broadcaster
+    """
+
+    async def wait_time(self, name: str, bucket: Bucket) -> float:
+        """
+        # Take a token
+        ## Returns
+        - `0` if taken
+        - secs to wait before trying again otherwise
+        """
+        raise NotImplementedError
+
+    def floor(self, bucket: Bucket) -> float:
+        # a bucket too small for the reserve
+        # should still let one token through
+        return min(bucket.capacity * self.reserve, bucket.capacity - 1)
+
+    async def take(self, name: str) -> None:
+        """
+        # Wait until we're allowed to send one more message
+        ## Example
+        ```
+        await defs.rate_limiter.take("tg")
+        await defs.tg_bot.send_message(...)
+        ```
+        """
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            return
+
+        while True:
+            wait = await self.wait_time(name, bucket)
+            if wait <= 0:
+                return
+
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class LocalRateLimiter(RateLimiter):
+    """
+    # Buckets in process memory
+    """
+    _state: dict[str, tuple[float, float]] = field(default_factory=dict)
+
+    async def wait_time(self, name: str, bucket: Bucket) -> float:
+        now = time.monotonic()
+        (tokens, at) = self._state.get(name, (bucket.capacity, now))
+        tokens = min(bucket.capacity, tokens + max(0.0, now - at) * bucket.rate)
+        floor = self.floor(bucket)
+
+        wait = 0.0
+        if tokens - 1 >= floor:
+            tokens -= 1
+        else:
+            wait = (floor + 1 - tokens) / bucket.rate
+
+        self._state[name] = (tokens, now)
+        return wait
+
+
+@dataclass
+class RedisRateLimiter(RateLimiter):
+    """
+    # Buckets shared by every process through Redis
+    """
+    redis: Optional[Redis] = None
+
+    def __post_init__(self):
+        self._take = self.redis.register_script(TAKE_SCRIPT)
+
+    async def wait_time(self, name: str, bucket: Bucket) -> float:
+        wait = await self._take(
+            keys=[KEY.format(name=name)],
+            args=[bucket.rate, bucket.capacity, self.floor(bucket), TTL]
+        )
+        return float(wait)
+
+
+def load(
+    limits: "RateLimits",
+    storage: "Storage",
+    reserve: float = 0.0
+) -> RateLimiter:
+    from src.storage.redisdb import RedisStorage
+
+    buckets = {
+        name: Bucket(rate=rate, capacity=max(rate * limits.burst, 1.0))
+        for (name, rate) in (("vk", limits.vk), ("tg", limits.tg))
+        if rate > 0
+    }
+
+    if isinstance(storage, RedisStorage):
+        return RedisRateLimiter(
+            buckets=buckets,
+            reserve=reserve,
+            redis=storage.redis
+        )
+
+    return LocalRateLimiter(buckets=buckets, reserve=reserve)
+
+
+async def take(name: str) -> None:
+    """
+    # `RateLimiter.take` of this process, if it has one
+    """
+    from src import defs
+
+    if defs.rate_limiter is not None:
+        await defs.rate_limiter.take(name)
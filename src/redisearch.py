@@ -0,0 +1,282 @@
+from __future__ import annotations
+import re
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
+from loguru import logger
+from redis.asyncio import Redis
+from redis import exceptions as rexeptions
+
+
+VERSIONED_NAME_REGEX = re.compile(r"^(?P<name>.+)_v(?P<version>\d+)$")
+INDEX_ERROR_MARKERS = (
+    "no such index",
+    "unknown index name",
+    "unknown: index name",
+)
+"""
+# Substrings of RediSearch errors caused by a missing index
+"""
+
+
+class FieldKind:
+    TAG = "TAG"
+    TEXT = "TEXT"
+
+
+@dataclass(frozen=True)
+class IndexField:
+    path: str
+    """
+    # JSON path of the indexed value
+    """
+    alias: str
+    """
+    # Name used in queries
+    """
+    kind: str
+    """
+    # `FieldKind` of the value
+    """
+
+    def to_args(self) -> list[str]:
+        return [self.path, "AS", self.alias, self.kind]
+
+
+@dataclass(frozen=True)
+class Index:
+    """
+    # RediSearch index definition
+
+    The physical index is created as `<name>_v<version>`
+    and `name` is an alias pointing to it.
+    Queries always go through the alias,
+    so the physical index can be rebuilt
+    in the background and swapped in
+    once it's fully indexed.
+
+    Bump `version` every time `schema` is changed.
+    """
+    name: str
+    version: int
+    schema: tuple[IndexField, ...]
+
+    @property
+    def physical_name(self) -> str:
+        return f"{self.name}_v{self.version}"
+
+    def to_args(self) -> list[str]:
+        args = ["FT.CREATE", self.physical_name, "ON", "JSON", "SCHEMA"]
+        for index_field in self.schema:
+            args += index_field.to_args()
+        return args
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf8")
+    return value
+
+def phrase(value: str) -> str:
+    """
+    # Quote `value` as an exact phrase for TEXT queries
+    Keeps names like `Иванов И.И.` from being
+    split into unrelated terms or breaking
+    `|` unions the phrase is a part of.
+    """
+    return '"' + value.replace('"', " ").replace("\\", " ") + '"'
+
+def version_from_physical_name(index: Index, physical_name: str) -> int:
+    """
+    # Get the version encoded in the physical index name
+    ## Returns
+    - `0` for legacy indexes
+    created without a version suffix
+    """
+    match = VERSIONED_NAME_REGEX.match(physical_name)
+    if match is None or match.group("name") != index.name:
+        return 0
+    return int(match.group("version"))
+
+def is_index_error(e: rexeptions.ResponseError) -> bool:
+    """
+    # If this error was caused by a missing index
+    """
+    e_str = str(e).lower()
+    return any(marker in e_str for marker in INDEX_ERROR_MARKERS)
+
+
+@dataclass
+class IndexRegistry:
+    """
+    # Tracks the state of RediSearch indexes
+
+    Indexes are verified once after connecting to Redis.
+    After that, the state is kept in memory
+    and indexes are only re-verified
+    when `invalidate()` was called,
+    which happens after a reconnect
+    or an index-related `ResponseError`.
+    """
+    indexes: list[Index]
+    is_verified: bool = False
+    """
+    # Were all indexes verified since the last invalidation
+    """
+    poll_period: float = 1.0
+    """
+    # How often to check if a rebuilt index is ready, in secs
+    """
+    _migrating: set[str] = field(default_factory=set)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def invalidate(self) -> None:
+        self.is_verified = False
+
+    async def ensure(self, redis: Redis) -> None:
+        """
+        # Make sure every index exists and is up to date
+        A no-op if the indexes were already verified.
+        """
+        if self.is_verified:
+            return
+
+        async with self._lock:
+            if self.is_verified:
+                return
+
+            for index in self.indexes:
+                await self.ensure_one(redis, index)
+
+            self.is_verified = True
+
+    async def ensure_one(self, redis: Redis, index: Index) -> None:
+        try:
+            info = await redis.ft(index.name).info()
+        except rexeptions.ResponseError:
+            await self.create(redis, index)
+            await redis.execute_command(
+                "FT.ALIASADD", index.name, index.physical_name
+            )
+            logger.info(
+                f"created redis \"{index.name}\" index "
+                f"(v{index.version})"
+            )
+            return
+
+        physical_name = decode(info.get("index_name"))
+        live_version = version_from_physical_name(index, physical_name)
+
+        if live_version >= index.version:
+            return
+
+        if index.name in self._migrating:
+            return
+
+        # keep serving the old index while
+        # the new one is being built
+        from src import defs
+        self._migrating.add(index.name)
+        defs.create_task(self.migrate(redis, index, physical_name))
+
+    async def create(self, redis: Redis, index: Index) -> None:
+        try:
+            await redis.execute_command(*index.to_args())
+        except rexeptions.ResponseError as e:
+            # left from an interrupted migration
+            if "already exists" not in str(e).lower():
+                raise e
+
+    async def is_indexing(self, redis: Redis, physical_name: str) -> bool:
+        info = await redis.ft(physical_name).info()
+        return str(decode(info.get("indexing"))) not in ("0", "0.0")
+
+    async def migrate(
+        self,
+        redis: Redis,
+        index: Index,
+        old_physical_name: str
+    ) -> None:
+        """
+        # Rebuild `index` and swap the alias once it's ready
+        """
+        try:
+            logger.info(
+                f"migrating redis \"{index.name}\" index "
+                f"{old_physical_name} -> {index.physical_name}"
+            )
+
+            await self.create(redis, index)
+
+            while await self.is_indexing(redis, index.physical_name):
+                await asyncio.sleep(self.poll_period)
+
+            if old_physical_name == index.name:
+                # legacy index has the name we want
+                # to use as an alias, so it has to go first
+                await redis.execute_command("FT.DROPINDEX", old_physical_name)
+                await redis.execute_command(
+                    "FT.ALIASADD", index.name, index.physical_name
+                )
+            else:
+                await redis.execute_command(
+                    "FT.ALIASUPDATE", index.name, index.physical_name
+                )
+                await redis.execute_command("FT.DROPINDEX", old_physical_name)
+
+            logger.info(f"migrated redis \"{index.name}\" index")
+        finally:
+            self._migrating.discard(index.name)
+
+
+def default_indexes() -> list[Index]:
+    from src import RedisName
+
+    is_registered = IndexField(
+        "$.is_registered", RedisName.IS_REGISTERED, FieldKind.TAG
+    )
+    broadcast = IndexField(
+        "$.settings.broadcast", RedisName.BROADCAST, FieldKind.TAG
+    )
+    mode = IndexField(
+        "$.settings.mode", RedisName.MODE, FieldKind.TEXT
+    )
+
+    return [
+        Index(
+            name=RedisName.BROADCAST,
+            version=1,
+            schema=(
+                is_registered,
+                broadcast,
+                mode,
+                IndexField(
+                    "$.settings.group.confirmed",
+                    RedisName.GROUP,
+                    FieldKind.TEXT
+                ),
+            )
+        ),
+        Index(
+            name=RedisName.TCHR_BROADCAST,
+            version=1,
+            schema=(
+                is_registered,
+                broadcast,
+                mode,
+                IndexField(
+                    "$.settings.teacher.confirmed",
+                    RedisName.TEACHER,
+                    FieldKind.TEXT
+                ),
+            )
+        ),
+        Index(
+            name=RedisName.GENERIC_BROADCAST,
+            version=1,
+            schema=(
+                is_registered,
+                broadcast,
+            )
+        ),
+    ]
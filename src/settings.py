@@ -1,8 +1,8 @@
 from __future__ import annotations
 import aiofiles
 import datetime
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Optional, Literal, Any
 from pathlib import Path
 from src.data.range import Range
 from src.data.weekday import Weekday, WEEKDAY_LITERAL
@@ -15,9 +15,65 @@ class Tokens(BaseModel):
 class Server(BaseModel):
     addr: str
 
+class DatabaseIndex:
+    REDISEARCH = "redisearch"
+    SETS = "sets"
+
+class DatabaseBackend:
+    REDIS = "redis"
+    SQLITE = "sqlite"
+    MEMORY = "memory"
+
 class Database(BaseModel):
-    addr: str
+    backend: Literal["redis", "sqlite", "memory"] = DatabaseBackend.REDIS
+    addr: Optional[str] = None
     password: Optional[str] = None
+    index: Literal["redisearch", "sets"] = DatabaseIndex.REDISEARCH
+    path: Optional[Path] = None
+    shared_zoom: bool = False
+    """
+    # Store each distinct zoom entry once for all chats
+    Ctxs keep only ids of their entries,
+    see `src.zoomdir`.
+    """
+
+class Workers(BaseModel):
+    count: int = 0
+    """
+    # How many processes handle updates
+    `0` keeps everything in one process.
+    Needs redis backend, see `src.workers`.
+    """
+    stream_size: int = 10_000
+    """
+    # Updates kept in each worker's stream
+    """
+
+class Broadcast(BaseModel):
+    separate: bool = False
+    """
+    # Run broadcasts in their own process
+    So fan-outs don't slow down replies.
+    Needs redis backend, see `src.broadcaster`.
+    """
+    reserve: float = 0.3
+    """
+    # Part of each rate budget broadcasts leave to replies
+    """
+
+class RateLimits(BaseModel):
+    vk: float = 18.0
+    """
+    # Messages per second, `0` to not limit
+    """
+    tg: float = 25.0
+    """
+    # Messages per second, `0` to not limit
+    """
+    burst: float = 1.0
+    """
+    # How many seconds worth of messages can go at once
+    """
 
 class Admins(BaseModel):
     id: int
@@ -27,6 +83,13 @@ class Logging(BaseModel):
     enabled: bool
     dir: Optional[Path] = None
     admins: list[Admins] = Field(default_factory=list)
+    max_size: int = 1_048_576
+    flush_size: int = 65_536
+    flush_interval: float = 1.0
+    queue_size: int = 10_000
+    overflow: Literal["block", "drop"] = "drop"
+    digest_interval: float = 60.0
+    digest_max_per_minute: int = 5
 
 class Urls(BaseModel):
     schedules: Optional[str] = None
@@ -49,33 +112,91 @@ class TimeMapping(BaseModel):
 class Time(BaseModel):
     schedules: list[TimeSchedule] = Field(default_factory=list)
     mapping: TimeMapping = Field(default_factory=TimeMapping)
+
+    _table: dict[WEEKDAY_LITERAL, list[Optional[Range[datetime.time]]]] = (
+        PrivateAttr(default_factory=dict)
+    )
+    """
+    # Weekday -> lesson number -> time
+    """
+    _formatted: dict[WEEKDAY_LITERAL, list[Optional[str]]] = (
+        PrivateAttr(default_factory=dict)
+    )
+    """
+    # Weekday -> lesson number -> ready to use time string
+    """
+
+    def model_post_init(self, __context: Any) -> None:
+        self.compile()
+
+    def schedule_names(self) -> dict[WEEKDAY_LITERAL, Optional[str]]:
+        return {
+            Weekday.MONDAY: self.mapping.monday,
+            Weekday.TUESDAY: self.mapping.tuesday,
+            Weekday.WEDNESDAY: self.mapping.wednesday,
+            Weekday.THURSDAY: self.mapping.thursday,
+            Weekday.FRIDAY: self.mapping.friday,
+            Weekday.SATURDAY: self.mapping.saturday,
+            Weekday.SUNDAY: self.mapping.sunday,
+        }
+
+    def compile(self) -> None:
+        """
+        # Build lookup tables out of `schedules` and `mapping`
+        Has to be called again if any of them were changed.
+        """
+        by_name: dict[str, TimeSchedule] = {}
+        for schedule in self.schedules:
+            # first one with the name wins
+            by_name.setdefault(schedule.name, schedule)
+
+        self._table = {}
+        self._formatted = {}
+
+        for (wkd, schedule_name) in self.schedule_names().items():
+            schedule = by_name.get(schedule_name)
+            if schedule is None:
+                continue
+
+            nums: dict[int, Range[datetime.time]] = {}
+            for (key, rng) in schedule.nums.items():
+                # lookups were done with `str(num)`,
+                # so "01" never matched anything
+                if key.isdigit() and str(int(key)) == key:
+                    nums[int(key)] = rng
+
+            row: list[Optional[Range[datetime.time]]] = [None] * (
+                max(nums, default=-1) + 1
+            )
+            for (num, rng) in nums.items():
+                row[num] = rng
+
+            self._table[wkd] = row
+            self._formatted[wkd] = [
+                str(rng) if rng else None for rng in row
+            ]
     
     def get_for(
         self,
         wkd: WEEKDAY_LITERAL,
         num: int
     ) -> Optional[Range[datetime.time]]:
-        schedule_name = None
-        
-        if wkd == Weekday.MONDAY:
-            schedule_name = self.mapping.monday
-        elif wkd == Weekday.TUESDAY:
-            schedule_name = self.mapping.tuesday
-        elif wkd == Weekday.WEDNESDAY:
-            schedule_name = self.mapping.wednesday
-        elif wkd == Weekday.THURSDAY:
-            schedule_name = self.mapping.thursday
-        elif wkd == Weekday.FRIDAY:
-            schedule_name = self.mapping.friday
-        elif wkd == Weekday.SATURDAY:
-            schedule_name = self.mapping.saturday
-        elif wkd == Weekday.SUNDAY:
-            schedule_name = self.mapping.sunday
-        
-        for schedule in self.schedules:
-            if schedule.name == schedule_name:
-                try: return schedule.nums[str(num)]
-                except KeyError: return None
+        row = self._table.get(wkd)
+        if row is None or num is None or not 0 <= num < len(row):
+            return None
+
+        return row[num]
+
+    def get_str_for(
+        self,
+        wkd: WEEKDAY_LITERAL,
+        num: int
+    ) -> Optional[str]:
+        row = self._formatted.get(wkd)
+        if row is None or num is None or not 0 <= num < len(row):
+            return None
+
+        return row[num]
             
 
 class Settings(BaseModel):
@@ -84,6 +205,9 @@ class Settings(BaseModel):
     server: Server
     database: Database
     logging: Optional[Logging] = None
+    workers: Workers = Field(default_factory=Workers)
+    broadcast: Broadcast = Field(default_factory=Broadcast)
+    rate_limits: RateLimits = Field(default_factory=RateLimits)
     urls: Optional[Urls] = None
     time: Optional[Time] = None
 
@@ -135,4 +259,14 @@ class Settings(BaseModel):
         if self.time is None:
             return None
         
-        return self.time.get_for(wkd=wkd, num=num)
\ No newline at end of file
+        return self.time.get_for(wkd=wkd, num=num)
+
+    def get_time_str_for(
+        self,
+        wkd: WEEKDAY_LITERAL,
+        num: int
+    ) -> Optional[str]:
+        if self.time is None:
+            return None
+        
+        return self.time.get_str_for(wkd=wkd, num=num)
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+# Startup phase timings
+
+Every phase of `Defs.init_all` is recorded with
+when it started and how long it took,
+so phases that ran at the same time
+show up next to each other:
+```
+startup took 2.41 s
+    0.000 s +  0.412 s  import handlers
+    0.415 s +  0.003 s  http
+    0.418 s +  1.980 s  storage
+    0.418 s +  0.311 s  vk bot info
+    0.418 s +  0.207 s  tg bot info
+```
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Iterator, Optional, TypeVar
+from loguru import logger
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class Phase:
+    name: str
+    started: float
+    elapsed: Optional[float] = None
+    """
+    # `None` while it's still running
+    """
+
+
+@dataclass
+class Profiler:
+    started: float = field(default_factory=time.perf_counter)
+    phases: list[Phase] = field(default_factory=list)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        """
+        # Time a block
+        ## Example
+        ```
+        with defs.startup.phase("import handlers"):
+            from src.svc.common.bps import admin, reset
+        ```
+        """
+        phase = Phase(name=name, started=time.perf_counter())
+        self.phases.append(phase)
+
+        try:
+            yield phase
+        finally:
+            phase.elapsed = time.perf_counter() - phase.started
+
+    async def run(self, name: str, aw: Awaitable[T]) -> T:
+        """
+        # Time an awaitable
+        Meant for `asyncio.gather`,
+        so concurrent phases are timed separately.
+        """
+        with self.phase(name):
+            return await aw
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def format(self) -> str:
+        lines = [f"startup took {self.elapsed:.2f} s"]
+
+        for phase in self.phases:
+            offset = phase.started - self.started
+            elapsed = (
+                f"{phase.elapsed:>6.3f} s"
+                if phase.elapsed is not None else "   ... "
+            )
+            lines.append(f"    {offset:.3f} s + {elapsed}  {phase.name}")
+
+        return "\n".join(lines)
+
+    def log(self) -> None:
+        logger.info(self.format())
@@ -0,0 +1,190 @@
+"""
+# Ctx storage backends
+
+Everything that reads or writes ctxs
+goes through `defs.storage`,
+so the bot doesn't care where ctxs live.
+
+- `redisdb.RedisStorage` - Redis,
+RediSearch indexes or bot-maintained sets
+- `sqlite.SqliteStorage` - embedded SQLite database
+- `memory.MemoryStorage` - plain dicts,
+for tests and benchmarks
+"""
+from __future__ import annotations
+import copy
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, AsyncIterator, Iterable, TYPE_CHECKING
+
+from src.subscriptions import Subscription
+
+
+if TYPE_CHECKING:
+    from src.settings import Database
+
+
+def set_at(doc: dict[str, Any], path: Iterable[str], value: Any) -> None:
+    """
+    # Set a nested value of a ctx document
+    ## Example
+    ```
+    doc = {"settings": {"broadcast": True}}
+    set_at(doc, ("settings", "broadcast"), False)
+    assert doc == {"settings": {"broadcast": False}}
+    ```
+    """
+    path = list(path)
+    target = doc
+
+    for name in path[:-1]:
+        target = target.setdefault(name, {})
+
+    target[path[-1]] = value
+
+
+@dataclass
+class Storage:
+    """
+    # Base for ctx storage backends
+
+    Ctxs are stored as JSON-compatible documents
+    (`DbBaseCtx` dumped to a dict)
+    under keys like `VK_123` or `TG_123`.
+    """
+
+    async def connect(self) -> None:
+        """
+        # Open connections, create tables and indexes
+        """
+        ...
+
+    async def close(self) -> None:
+        ...
+
+    async def is_online(self) -> bool:
+        """
+        # Check if the storage can be reached right now
+        """
+        return True
+
+    async def prepare(self) -> None:
+        """
+        # Make sure recipient queries will work
+        Called before every broadcast, should be cheap.
+        """
+        ...
+
+    async def recover(self, e: Exception) -> bool:
+        """
+        # Try to recover from a failed query
+        ## Returns
+        - if the query is worth retrying
+        """
+        return False
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        raise NotImplementedError
+
+    async def mget(self, keys: list[str]) -> list[Optional[dict[str, Any]]]:
+        """
+        # Get multiple documents at once
+        Missing keys are `None`.
+        """
+        return [await self.get(key) for key in keys]
+
+    async def exists(self, key: str) -> bool:
+        return await self.get(key) is not None
+
+    async def put(
+        self,
+        key: str,
+        doc: dict[str, Any],
+        previous: Optional[Subscription] = None
+    ) -> None:
+        """
+        # Store the whole document
+        ## Params
+        - `previous` - subscription this document
+        had when it was loaded, `None` if it wasn't stored,
+        lets backends skip reading the old document
+        """
+        raise NotImplementedError
+
+    async def update(
+        self,
+        key: str,
+        path: tuple[str, ...],
+        value: Any
+    ) -> None:
+        """
+        # Set a single field of a stored document
+        ## Example
+        ```
+        await storage.update("TG_123", ("settings", "broadcast"), False)
+        ```
+        """
+        doc = await self.get(key)
+        if doc is None:
+            return
+
+        previous = Subscription.from_dict(doc)
+        doc = copy.deepcopy(doc)
+        set_at(doc, path, value)
+
+        await self.put(key, doc, previous)
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def keys(self) -> list[str]:
+        raise NotImplementedError
+
+    async def iterate(
+        self,
+        batch_size: int = 100
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        # Go through every stored document
+        """
+        keys = await self.keys()
+
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            docs = await self.mget(batch)
+
+            for (key, doc) in zip(batch, docs):
+                if doc is None:
+                    continue
+                yield (key, doc)
+
+    async def who_needs(
+        self,
+        mode: str,
+        identifiers: list[str]
+    ) -> list[dict[str, Any]]:
+        """
+        # Get documents of chats subscribed to any of `identifiers`
+        """
+        raise NotImplementedError
+
+    async def who_enabled_broadcast(self) -> list[dict[str, Any]]:
+        """
+        # Get documents of every chat with broadcast enabled
+        """
+        raise NotImplementedError
+
+
+def load(database: "Database", data_dir: Path) -> Storage:
+    from src.settings import DatabaseBackend
+    from src.storage.redisdb import RedisStorage
+    from src.storage.sqlite import SqliteStorage
+    from src.storage.memory import MemoryStorage
+
+    if database.backend == DatabaseBackend.SQLITE:
+        path = database.path or data_dir.joinpath("ctx.sqlite3")
+        return SqliteStorage(path=path)
+    if database.backend == DatabaseBackend.MEMORY:
+        return MemoryStorage()
+
+    return RedisStorage()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from src import subscriptions
+from src.subscriptions import Subscription
+from src.storage import Storage
+
+
+@dataclass
+class MemoryStorage(Storage):
+    """
+    # Keeps everything in process memory
+
+    Nothing survives a restart,
+    meant for tests and benchmarks.
+    Documents are kept as is,
+    callers must not mutate what they get.
+    """
+    docs: dict[str, dict[str, Any]] = field(default_factory=dict)
+    sets: defaultdict[str, set[str]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        return self.docs.get(key)
+
+    async def mget(self, keys: list[str]) -> list[Optional[dict[str, Any]]]:
+        return [self.docs.get(key) for key in keys]
+
+    async def exists(self, key: str) -> bool:
+        return key in self.docs
+
+    def reindex(
+        self,
+        key: str,
+        old: Optional[Subscription],
+        new: Subscription
+    ) -> None:
+        old_keys = old.keys() if old else set()
+        new_keys = new.keys()
+
+        for set_key in old_keys - new_keys:
+            self.sets[set_key].discard(key)
+        for set_key in new_keys - old_keys:
+            self.sets[set_key].add(key)
+
+    async def put(
+        self,
+        key: str,
+        doc: dict[str, Any],
+        previous: Optional[Subscription] = None
+    ) -> None:
+        old_doc = self.docs.get(key)
+        # don't trust `previous`, we know better
+        old = Subscription.from_dict(old_doc) if old_doc else None
+
+        self.docs[key] = doc
+        self.reindex(key, old, Subscription.from_dict(doc))
+
+    async def delete(self, key: str) -> None:
+        old_doc = self.docs.pop(key, None)
+        if old_doc is None:
+            return
+
+        self.reindex(key, Subscription.from_dict(old_doc), Subscription())
+
+    async def keys(self) -> list[str]:
+        return list(self.docs.keys())
+
+    def members(self, set_keys: list[str]) -> list[dict[str, Any]]:
+        keys = set()
+        for set_key in set_keys:
+            keys |= self.sets.get(set_key, set())
+
+        return [self.docs[key] for key in sorted(keys)]
+
+    async def who_needs(
+        self,
+        mode: str,
+        identifiers: list[str]
+    ) -> list[dict[str, Any]]:
+        return self.members([
+            subscriptions.key_for(mode, identifier)
+            for identifier in identifiers
+        ])
+
+    async def who_enabled_broadcast(self) -> list[dict[str, Any]]:
+        return self.members([subscriptions.ALL])
@@ -0,0 +1,314 @@
+from __future__ import annotations
+import asyncio
+import json
+from json.encoder import JSONEncoder
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from loguru import logger
+from redis.asyncio import Redis
+from redis import exceptions as rexeptions
+from redis.commands.json.path import Path
+
+from src import RedisName, redisearch, subscriptions
+from src.redisearch import IndexRegistry, default_indexes
+from src.settings import DatabaseIndex
+from src.subscriptions import Subscription, SubscriptionIndex
+from src.storage import Storage
+
+
+SEARCH_LIMIT = 10000
+
+
+@dataclass
+class RedisStorage(Storage):
+    """
+    # Keeps ctxs in Redis
+
+    Documents are RedisJSON values if the module is loaded,
+    plain JSON strings otherwise.
+    Recipients are found either with RediSearch indexes
+    or with sets maintained by the bot,
+    depending on `database.index`.
+    """
+    redis: Optional[Redis] = None
+    indexes: IndexRegistry = field(
+        default_factory=lambda: IndexRegistry(indexes=default_indexes())
+    )
+    subscriptions: Optional[SubscriptionIndex] = None
+    """
+    # Recipient index for `database.index` set to `"sets"`
+    """
+    has_json: bool = True
+    """
+    # Is RedisJSON module loaded
+    If not, ctxs are stored as plain strings.
+    """
+    retry_period: float = 5.0
+
+    @property
+    def uses_redisearch(self) -> bool:
+        return self.subscriptions is None
+
+    async def connect(self) -> None:
+        from src import defs
+
+        invalid_addr_error = ValueError(
+            "invalid database address, "
+            "make sure it follows this format: 127.0.0.1:6379"
+        )
+
+        addr = defs.settings.database.addr
+        host_port = addr.split(":") if addr else None
+        if not host_port or len(host_port) < 2:
+            raise invalid_addr_error
+
+        host, port = host_port
+        password = defs.settings.database.password
+
+        self.redis = Redis(host=host, port=port, password=password)
+        await self.wait_until_online()
+        await self.check_modules()
+
+        if defs.settings.database.index == DatabaseIndex.SETS:
+            self.subscriptions = SubscriptionIndex(redis=self.redis)
+            # sets could've been left stale
+            # by a previous run in redisearch mode
+            await self.rebuild_subscriptions()
+
+        await self.prepare()
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    async def wait_until_online(self) -> None:
+        logged = False
+
+        host = self.redis.connection_pool.connection_kwargs["host"]
+        port = self.redis.connection_pool.connection_kwargs["port"]
+
+        while True:
+            if not await self.is_online():
+                if not logged:
+                    logger.opt(colors=True).error(
+                        f"unable to rech redis instance "
+                        f"at {host}:{port}, awaiting..."
+                    )
+                    logged = True
+
+                await asyncio.sleep(self.retry_period)
+            else:
+                logger.info(f"redis connected on {host}:{port}")
+                break
+
+    async def is_online(self) -> bool:
+        try:
+            await self.redis.ping()
+            return True
+        except rexeptions.ConnectionError:
+            # indexes could've been lost
+            # if the instance was restarted
+            self.indexes.invalidate()
+            return False
+
+    async def check_modules(self) -> None:
+        try:
+            modules = await self.redis.module_list()
+        except rexeptions.ResponseError:
+            modules = []
+
+        names = {
+            redisearch.decode(module.get(b"name") or module.get("name") or "")
+            .lower()
+            for module in modules
+        }
+        self.has_json = "rejson" in names
+
+        if not self.has_json:
+            logger.warning(
+                "RedisJSON module is not loaded, "
+                "ctxs will be stored as plain strings"
+            )
+
+    async def prepare(self) -> None:
+        """
+        ## Make sure RediSearch indexes exist and are up to date
+        Only talks to Redis if the indexes weren't verified
+        since startup, last reconnect or last index-related error.
+        """
+        if not self.uses_redisearch:
+            return
+
+        await self.indexes.ensure(self.redis)
+
+    async def recover(self, e: Exception) -> bool:
+        if not isinstance(e, rexeptions.ResponseError):
+            return False
+        if "Timeout" in str(e):
+            return True
+        if redisearch.is_index_error(e):
+            # index was dropped behind our back,
+            # verify and recreate them
+            self.indexes.invalidate()
+            await self.prepare()
+            return True
+        return False
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        if self.has_json:
+            return await self.redis.json().get(key)
+
+        return subscriptions.decode_doc(await self.redis.get(key))
+
+    async def mget(self, keys: list[str]) -> list[Optional[dict[str, Any]]]:
+        if not keys:
+            return []
+
+        if self.has_json:
+            raw_docs = await self.redis.json().mget(keys, Path.root_path())
+            return list(raw_docs)
+
+        raw_docs = await self.redis.mget(keys)
+        return [subscriptions.decode_doc(raw) for raw in raw_docs]
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.redis.exists(key))
+
+    async def put(
+        self,
+        key: str,
+        doc: dict[str, Any],
+        previous: Optional[Subscription] = None
+    ) -> None:
+        if self.has_json:
+            await self.redis.json(
+                encoder=JSONEncoder(default=str)
+            ).set(
+                key,
+                Path.root_path(),
+                doc,
+                decode_keys=True
+            )
+        else:
+            await self.redis.set(key, json.dumps(doc, default=str))
+
+        if self.subscriptions is not None:
+            await self.subscriptions.update(
+                key,
+                previous,
+                Subscription.from_dict(doc)
+            )
+
+    async def update(
+        self,
+        key: str,
+        path: tuple[str, ...],
+        value: Any
+    ) -> None:
+        # sets have to be diffed against
+        # the old document, take the slow path
+        if not self.has_json or self.subscriptions is not None:
+            return await super().update(key, path, value)
+
+        json_path = "$." + ".".join(path)
+        await self.redis.json(
+            encoder=JSONEncoder(default=str)
+        ).set(key, json_path, value)
+
+    async def delete(self, key: str) -> None:
+        if self.subscriptions is not None:
+            doc = await self.get(key)
+            if doc is not None:
+                await self.subscriptions.remove(
+                    key,
+                    Subscription.from_dict(doc)
+                )
+
+        if self.has_json:
+            await self.redis.json().delete(key)
+        else:
+            await self.redis.delete(key)
+
+    async def keys(self) -> list[str]:
+        keys = set()
+
+        for pattern in subscriptions.CTX_KEY_PATTERNS:
+            async for key in self.redis.scan_iter(match=pattern):
+                keys.add(key.decode("utf8"))
+
+        return sorted(keys)
+
+    async def rebuild_subscriptions(self) -> None:
+        keys = await self.keys()
+        docs = await self.mget(keys)
+
+        await self.subscriptions.rebuild(
+            (key, doc) for (key, doc) in zip(keys, docs) if doc is not None
+        )
+
+    async def search(self, index: str, query: str) -> list[dict[str, Any]]:
+        response: list = await self.redis.execute_command(
+            "FT.SEARCH",
+            index,
+            query,
+            "LIMIT",
+            "0",
+            str(SEARCH_LIMIT)
+        )
+
+        docs = []
+
+        # [total, key, [b"$", json], key, [b"$", json], ...]
+        for i, key_or_value in enumerate(response[1:]):
+            is_value = i % 2 == 1
+            if not is_value:
+                continue
+
+            docs.append(json.loads(key_or_value[1]))
+
+        return docs
+
+    async def who_needs(
+        self,
+        mode: str,
+        identifiers: list[str]
+    ) -> list[dict[str, Any]]:
+        from src.data.settings import Mode
+
+        if not identifiers:
+            return []
+
+        if self.subscriptions is not None:
+            keys = await self.subscriptions.who_needs(mode, identifiers)
+            return [doc for doc in await self.mget(keys) if doc is not None]
+
+        if mode == Mode.GROUP:
+            index = RedisName.BROADCAST
+            field_name = RedisName.GROUP
+        else:
+            index = RedisName.TCHR_BROADCAST
+            field_name = RedisName.TEACHER
+
+        identifiers_query = "|".join(
+            redisearch.phrase(identifier) for identifier in identifiers
+        )
+        query = (
+            f"@{RedisName.IS_REGISTERED}:""{true} "
+            f"@{RedisName.MODE}:{mode} "
+            f"@{RedisName.BROADCAST}:""{true} "
+            f"@{field_name}:({identifiers_query})"
+        )
+
+        return await self.search(index, query)
+
+    async def who_enabled_broadcast(self) -> list[dict[str, Any]]:
+        if self.subscriptions is not None:
+            keys = await self.subscriptions.who_enabled_broadcast()
+            return [doc for doc in await self.mget(keys) if doc is not None]
+
+        query = (
+            f"@{RedisName.IS_REGISTERED}:""{true} "
+            f"@{RedisName.BROADCAST}:""{true}"
+        )
+
+        return await self.search(RedisName.GENERIC_BROADCAST, query)
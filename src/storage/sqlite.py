@@ -0,0 +1,223 @@
+from __future__ import annotations
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Callable, TypeVar
+
+from src.subscriptions import Subscription
+from src.storage import Storage
+
+
+T = TypeVar("T")
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS ctx (
+        key TEXT PRIMARY KEY,
+        doc TEXT NOT NULL,
+        is_registered INTEGER NOT NULL,
+        broadcast INTEGER NOT NULL,
+        mode TEXT,
+        identifier TEXT
+    ) WITHOUT ROWID
+    """,
+    # covers both recipient queries:
+    # (broadcast, is_registered) and
+    # (broadcast, is_registered, mode, identifier)
+    """
+    CREATE INDEX IF NOT EXISTS ctx_recipients
+    ON ctx (broadcast, is_registered, mode, identifier)
+    """,
+)
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+)
+MAX_VARIABLES = 900
+"""
+# Stay under SQLite's limit of `?` per statement
+"""
+
+
+@dataclass
+class SqliteStorage(Storage):
+    """
+    # Keeps ctxs in an embedded SQLite database
+
+    Subscription fields are stored in their own
+    indexed columns next to the JSON document,
+    so recipient queries never parse documents.
+
+    `sqlite3` is blocking, so every call
+    runs in a single dedicated thread,
+    which also serializes access to the connection.
+    """
+    path: Path
+    _conn: Optional[sqlite3.Connection] = None
+    _executor: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="sqlite"
+        )
+    )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    async def connect(self) -> None:
+        await self.run(self._connect)
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+
+        await self.run(self._conn.close)
+        self._conn = None
+        self._executor.shutdown(wait=False)
+
+    def _select_docs(
+        self,
+        query: str,
+        params: tuple[Any, ...] = ()
+    ) -> list[tuple[str, str]]:
+        return self._conn.execute(query, params).fetchall()
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        rows = await self.run(
+            self._select_docs,
+            "SELECT key, doc FROM ctx WHERE key = ?",
+            (key,)
+        )
+        if not rows:
+            return None
+
+        return json.loads(rows[0][1])
+
+    def _mget(self, keys: list[str]) -> list[Optional[str]]:
+        found: dict[str, str] = {}
+
+        for i in range(0, len(keys), MAX_VARIABLES):
+            batch = keys[i:i + MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(batch))
+            found.update(self._select_docs(
+                f"SELECT key, doc FROM ctx WHERE key IN ({placeholders})",
+                tuple(batch)
+            ))
+
+        return [found.get(key) for key in keys]
+
+    async def mget(self, keys: list[str]) -> list[Optional[dict[str, Any]]]:
+        if not keys:
+            return []
+
+        raw_docs = await self.run(self._mget, keys)
+        return [json.loads(raw) if raw else None for raw in raw_docs]
+
+    async def exists(self, key: str) -> bool:
+        rows = await self.run(
+            self._select_docs,
+            "SELECT key, 1 FROM ctx WHERE key = ?",
+            (key,)
+        )
+        return bool(rows)
+
+    def _put(self, key: str, raw: str, sub: Subscription) -> None:
+        self._conn.execute(
+            """
+            INSERT INTO ctx (key, doc, is_registered, broadcast, mode, identifier)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                doc = excluded.doc,
+                is_registered = excluded.is_registered,
+                broadcast = excluded.broadcast,
+                mode = excluded.mode,
+                identifier = excluded.identifier
+            """,
+            (
+                key,
+                raw,
+                int(sub.is_registered),
+                int(sub.broadcast),
+                sub.mode,
+                sub.identifier
+            )
+        )
+
+    async def put(
+        self,
+        key: str,
+        doc: dict[str, Any],
+        previous: Optional[Subscription] = None
+    ) -> None:
+        raw = json.dumps(doc, default=str, ensure_ascii=False)
+        await self.run(self._put, key, raw, Subscription.from_dict(doc))
+
+    def _delete(self, key: str) -> None:
+        self._conn.execute("DELETE FROM ctx WHERE key = ?", (key,))
+
+    async def delete(self, key: str) -> None:
+        await self.run(self._delete, key)
+
+    async def keys(self) -> list[str]:
+        rows = await self.run(
+            self._select_docs,
+            "SELECT key, 1 FROM ctx ORDER BY key"
+        )
+        return [row[0] for row in rows]
+
+    def _who_needs(self, mode: str, identifiers: list[str]) -> list[tuple[str, str]]:
+        rows = []
+
+        for i in range(0, len(identifiers), MAX_VARIABLES):
+            batch = identifiers[i:i + MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(batch))
+            rows += self._select_docs(
+                f"""
+                SELECT key, doc FROM ctx
+                WHERE broadcast = 1
+                AND is_registered = 1
+                AND mode = ?
+                AND identifier IN ({placeholders})
+                """,
+                (mode, *batch)
+            )
+
+        return rows
+
+    async def who_needs(
+        self,
+        mode: str,
+        identifiers: list[str]
+    ) -> list[dict[str, Any]]:
+        if not identifiers:
+            return []
+
+        rows = await self.run(self._who_needs, mode, identifiers)
+        return [json.loads(row[1]) for row in rows]
+
+    async def who_enabled_broadcast(self) -> list[dict[str, Any]]:
+        rows = await self.run(
+            self._select_docs,
+            """
+            SELECT key, doc FROM ctx
+            WHERE broadcast = 1
+            AND is_registered = 1
+            """
+        )
+        return [json.loads(row[1]) for row in rows]
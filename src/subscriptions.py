@@ -0,0 +1,182 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from typing import Optional, Any, Iterable, TYPE_CHECKING
+from loguru import logger
+from redis.asyncio import Redis
+
+
+if TYPE_CHECKING:
+    from src.data.settings import Settings
+
+
+PREFIX = "subs"
+ALL = f"{PREFIX}:all"
+"""
+# Set of every chat with broadcast enabled
+"""
+CTX_KEY_PATTERNS = ("VK_*", "TG_*")
+"""
+# Patterns matching every stored ctx key
+"""
+
+
+def key_for(mode: str, identifier: str) -> str:
+    """
+    # Set of chats subscribed to `identifier` in `mode`
+    ## Example
+    ```
+    assert key_for("group", "1КДД69") == "subs:group:1КДД69"
+    ```
+    """
+    return f"{PREFIX}:{mode}:{identifier}"
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """
+    # Part of ctx that decides who gets broadcasts
+    """
+    is_registered: bool = False
+    broadcast: bool = False
+    mode: Optional[str] = None
+    identifier: Optional[str] = None
+
+    @classmethod
+    def from_settings(
+        cls: type[Subscription],
+        is_registered: bool,
+        settings: "Settings"
+    ) -> Subscription:
+        from src.data.settings import Mode
+
+        identifier = None
+        if settings.mode == Mode.GROUP:
+            identifier = settings.group.confirmed
+        elif settings.mode == Mode.TEACHER:
+            identifier = settings.teacher.confirmed
+
+        return cls(
+            is_registered=bool(is_registered),
+            broadcast=bool(settings.broadcast),
+            mode=settings.mode,
+            identifier=identifier
+        )
+
+    @classmethod
+    def from_dict(cls: type[Subscription], doc: dict[str, Any]) -> Subscription:
+        """
+        # Take subscription from a raw ctx document
+        Used to avoid validating whole ctxs when rebuilding.
+        """
+        settings: dict[str, Any] = doc.get("settings") or {}
+        mode = settings.get("mode")
+
+        identifier = None
+        if mode:
+            # mode is also the name of its settings field,
+            # `settings.group` or `settings.teacher`
+            identifier = (settings.get(mode) or {}).get("confirmed")
+
+        return cls(
+            is_registered=bool(doc.get("is_registered")),
+            broadcast=bool(settings.get("broadcast")),
+            mode=mode,
+            identifier=identifier
+        )
+
+    def keys(self) -> set[str]:
+        """
+        # Sets this chat should be a member of
+        """
+        if not (self.is_registered and self.broadcast):
+            return set()
+
+        keys = {ALL}
+        if self.mode and self.identifier:
+            keys.add(key_for(self.mode, self.identifier))
+
+        return keys
+
+
+def decode_doc(raw: Optional[bytes]) -> Optional[dict[str, Any]]:
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+@dataclass
+class SubscriptionIndex:
+    """
+    # Recipient index maintained by the bot itself
+
+    An alternative to RediSearch indexes:
+    every chat with broadcast enabled is stored
+    in a plain Redis set per mode and identifier,
+    so recipients are found with a single `SUNION`
+    and no tokenization gets in the way
+    of identifiers like `1КДД69` or `Иванов И.И.`.
+    """
+    redis: Redis
+
+    async def update(
+        self,
+        db_key: str,
+        old: Optional[Subscription],
+        new: Subscription
+    ) -> None:
+        old_keys = old.keys() if old else set()
+        new_keys = new.keys()
+
+        removed = old_keys - new_keys
+        added = new_keys - old_keys
+
+        if not removed and not added:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key in removed:
+            pipe.srem(key, db_key)
+        for key in added:
+            pipe.sadd(key, db_key)
+        await pipe.execute()
+
+    async def remove(self, db_key: str, sub: Optional[Subscription]) -> None:
+        if sub is None:
+            return
+        await self.update(db_key, sub, Subscription())
+
+    async def members(self, keys: Iterable[str]) -> list[str]:
+        keys = list(keys)
+        if not keys:
+            return []
+
+        members = await self.redis.sunion(keys)
+        return sorted(member.decode("utf8") for member in members)
+
+    async def who_needs(self, mode: str, identifiers: list[str]) -> list[str]:
+        return await self.members(
+            key_for(mode, identifier) for identifier in identifiers
+        )
+
+    async def who_enabled_broadcast(self) -> list[str]:
+        return await self.members([ALL])
+
+    async def rebuild(self, docs: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        """
+        # Recreate all sets from stored ctxs
+        """
+        pipe = self.redis.pipeline(transaction=True)
+
+        async for key in self.redis.scan_iter(match=f"{PREFIX}:*"):
+            pipe.delete(key)
+
+        count = 0
+        for (db_key, doc) in docs:
+            for key in Subscription.from_dict(doc).keys():
+                pipe.sadd(key, db_key)
+            count += 1
+
+        await pipe.execute()
+
+        logger.info(f"rebuilt subscription index from {count} ctxs")
@@ -5,7 +5,6 @@ import asyncio
 import json
 import datetime
 from copy import deepcopy
-from json.encoder import JSONEncoder
 from typing import Literal, Optional, Callable, Any, Coroutine, Awaitable, TypeVar, TYPE_CHECKING
 from copy import deepcopy
 from dataclasses import dataclass, field
@@ -15,16 +14,14 @@ from vkbottle_types.responses.messages import MessagesSendUserIdsResponseItem
 from vkbottle_types.codegen.objects import MessagesMessageActionStatus
 from aiogram.types import Message as TgMessage, CallbackQuery, ChatMemberUpdated
 from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
-from redis.commands.json.path import Path
-from redis.exceptions import ResponseError
-from src import defs, RedisName, text
+from src import defs, text, subscriptions
 from src.api.schedule import Notify
 from src.data import RepredBaseModel, HiddenVars, week
-from src.data.schedule import Schedule, format as sc_format, Page, Formation
+from src.data.schedule import Schedule, format as sc_format, Page, Formation, compact
 from src.data.schedule.raw import Kind, KIND_LITERAL
 from src.data.schedule.compare import PageCompare, FormationCompare
 from src.data.settings import Settings, Mode
-from src.data.range import Range
+from src.data.range import DateRange
 from src.svc import vk, telegram as tg
 from src.svc.vk.types_ import MessageV2 as VkMessage, RawEvent
 from src.svc.common.states import formatter as states_fmt, Values
@@ -181,9 +178,9 @@ class BaseCtx:
     pages: pagination.Container = field(default_factory=pagination.Container)
     """
     # Page storage for big data
-    Used to store generated pages
-    for massive data that can't
+    Used to paginate massive data that can't
     fit in one message (like zoom entries).
+    Pages are rendered on demand from `settings`.
     """
 
     last_call: float = field(default_factory=lambda: .0)
@@ -214,6 +211,16 @@ class BaseCtx:
     # Last teachers schedule message sent by the bot
     Used to reply to it when sending an updated one.
     """
+    subscription: Optional[subscriptions.Subscription] = None
+    """
+    # Subscription as it was last saved
+    Used to update recipient sets
+    only when it actually changes.
+    """
+
+    def __post_init__(self) -> None:
+        # settings could be replaced, so look them up every time
+        self.pages.bind(lambda: self.settings)
 
     @property
     def db_key(self) -> str:
@@ -234,7 +241,11 @@ class BaseCtx:
             last_everything=db.last_everything,
             last_bot_message=db.last_bot_message,
             last_groups_schedule=db.last_groups_schedule,
-            last_teachers_schedule=db.last_teachers_schedule
+            last_teachers_schedule=db.last_teachers_schedule,
+            subscription=subscriptions.Subscription.from_settings(
+                db.is_registered,
+                db.settings
+            )
         )
         
         db.last_everything.set_ctx(self)
@@ -266,13 +277,14 @@ class BaseCtx:
 
         self.last_everything.set_hidden_vars(hidden_vars)
 
-        await defs.redis.json(
-            encoder=JSONEncoder(default=str)
-        ).set(
-            self.db_key,
-            Path.root_path(),
-            self_db_dict,
-            decode_keys=True
+        if defs.zoom_directory is not None:
+            await defs.zoom_directory.shrink(self_db_dict)
+
+        await defs.storage.put(self.db_key, self_db_dict, self.subscription)
+
+        self.subscription = subscriptions.Subscription.from_settings(
+            self.is_registered,
+            self.settings
         )
         
     @property
@@ -308,9 +320,9 @@ class BaseCtx:
     @property
     def identifier_exists(self) -> bool:
         if self.is_group_mode:
-            return self.identifier in defs.schedule.group_names()
+            return self.identifier in defs.schedule.group_index()
         if self.is_teacher_mode:
-            return self.identifier in defs.schedule.teacher_names()
+            return self.identifier in defs.schedule.teacher_index()
 
     def register(self) -> None:
         self.is_registered = True
@@ -336,27 +348,27 @@ class BaseCtx:
         self.last_everything = everything
         self.navigator.set_everything(everything)
 
-    def get_schedule_as_group(self) -> Optional[Formation]:
+    def get_schedule_as_group(self) -> Optional[compact.Formation]:
         try:
             page = defs.schedule.get_groups()
             return page.get_by_name(self.identifier)
         except AttributeError:
             return None
 
-    def get_schedule_as_teacher(self) -> Optional[Formation]:
+    def get_schedule_as_teacher(self) -> Optional[compact.Formation]:
         try:
             page = defs.schedule.get_teachers()
             return page.get_by_name(self.identifier)
         except AttributeError:
             return None
 
-    def get_schedule(self) -> Optional[Formation]:
+    def get_schedule(self) -> Optional[compact.Formation]:
         if self.mode == Mode.GROUP:
             return self.get_schedule_as_group()
         if self.mode == Mode.TEACHER:
             return self.get_schedule_as_teacher()
     
-    def get_week_or_current(self) -> Range[datetime.date]:
+    def get_week_or_current(self) -> DateRange:
         try:
             unchecked_rng = self.schedule.get_week_or_current()
             for_unchecked = self.get_schedule().get_week(unchecked_rng)
@@ -376,7 +388,7 @@ class BaseCtx:
             return sc_format.formation(
                 form=self.get_schedule_as_group(),
                 week_pos=self.get_week_or_current(),
-                entries=self.settings.zoom.entries.list,
+                entries=self.settings.zoom.entries,
                 mode=self.settings.mode,
                 do_tg_markup=self.last_everything.is_from_tg_generally,
                 is_group_chat=self.last_everything.is_group_chat,
@@ -390,7 +402,7 @@ class BaseCtx:
             return sc_format.formation(
                 form=self.get_schedule_as_teacher(),
                 week_pos=self.get_week_or_current(),
-                entries=self.settings.tchr_zoom.entries.list,
+                entries=self.settings.tchr_zoom.entries,
                 mode=self.settings.mode,
                 do_tg_markup=self.last_everything.is_from_tg_generally,
                 is_group_chat=self.last_everything.is_group_chat,
@@ -409,14 +421,14 @@ class BaseCtx:
         """ # Is it allowed to view the previous week """
         try:
             form = self.get_schedule()
-            return form.first_week().week < self.get_week_or_current()
+            return form.has_week_before(self.get_week_or_current())
         except (AttributeError, IndexError, TypeError): return False
         
     def is_forward_week_shift_allowed(self) -> bool:
         """ # Is it allowed to view the next week """
         try:
             form = self.get_schedule()
-            return self.get_week_or_current() < form.last_week().week
+            return form.has_week_after(self.get_week_or_current())
         except (AttributeError, IndexError, TypeError): return False
     
     def shift_week_backward(self) -> bool:
@@ -489,7 +501,11 @@ class BaseCtx:
 
     async def disable_broadcast_and_save(self):
         self.settings.broadcast = False
-        await self.save()
+        await defs.storage.update(self.db_key, ("settings", "broadcast"), False)
+        self.subscription = subscriptions.Subscription.from_settings(
+            self.is_registered,
+            self.settings
+        )
 
     async def send_custom_broadcast(self, message: CommonBotMessage):
         from src.data.settings import Mode
@@ -680,7 +696,7 @@ class Ctx:
             src = "tg"
         elif everything.src.startswith("vk"):
             src = "vk"
-        return bool(await defs.redis.exists(f"{src.upper()}_{everything.chat_id}"))
+        return await defs.storage.exists(f"{src.upper()}_{everything.chat_id}")
 
     async def add_from_everything(self, everything: CommonEverything) -> BaseCtx:
         if everything.is_from_vk:
@@ -719,103 +735,28 @@ class Ctx:
         return ctx
 
     async def delete(self, key: str):
-        await defs.redis.json().delete(key)
-
-    async def get_who_needs_group_broadcast(
-        self,
-        groups: list[str]
-    ) -> Optional[list]:
-        from src.data.settings import Mode
-
-        if not groups:
-            return None
-
-        affected_groups_query = "|".join(groups)
-        query = (
-            f"@{RedisName.IS_REGISTERED}:""{true} "
-            f"@{RedisName.MODE}:{Mode.GROUP} "
-            f"@{RedisName.BROADCAST}:""{true} "
-            f"@{RedisName.GROUP}:({affected_groups_query})"
-        )
-        response: list = await defs.redis.execute_command(
-            f"FT.SEARCH",
-            f"{RedisName.BROADCAST}",
-            f"{query}",
-            f"LIMIT",
-            f"0",
-            f"10000" # fuck it
-        )
-
-        return response
-
-    async def get_who_needs_tchr_broadcast(
-        self,
-        teachers: list[str]
-    ) -> Optional[list]:
-        from src.data.settings import Mode
-
-        if not teachers:
-            return None
-
-        affected_teachers_query = "|".join(teachers)
-        query = (
-            f"@{RedisName.IS_REGISTERED}:""{true} "
-            f"@{RedisName.MODE}:{Mode.TEACHER} "
-            f"@{RedisName.BROADCAST}:""{true} "
-            f"@{RedisName.TEACHER}:({affected_teachers_query})"
-        )
-        response: list = await defs.redis.execute_command(
-            f"FT.SEARCH",
-            f"{RedisName.TCHR_BROADCAST}",
-            f"{query}",
-            f"LIMIT",
-            f"0",
-            f"10000" # fuck it
-        )
-
-        return response
-    
-    async def get_who_enabled_broadcast(self):
-        query = (
-            f"@{RedisName.IS_REGISTERED}:""{true} "
-            f"@{RedisName.BROADCAST}:""{true}"
-        )
-        response: list = await defs.redis.execute_command(
-            f"FT.SEARCH",
-            f"{RedisName.GENERIC_BROADCAST}",
-            f"{query}",
-            f"LIMIT",
-            f"0",
-            f"10000" # fuck it
-        )
+        await defs.storage.delete(key)
 
-        return response
-
-    async def get_everyone(self) -> Optional[list]:
-        all_keys = await defs.redis.keys()
-        all_raw_ctxs = await defs.redis.json().mget(all_keys, "$")
-        
-        return all_raw_ctxs
+    async def get_everyone(self) -> list[dict]:
+        return [doc async for (_, doc) in defs.storage.iterate()]
 
-    async def parse_redis_result(self, result: list) -> list[BaseCtx]:
+    async def parse_docs(self, docs: list[Optional[dict]]) -> list[BaseCtx]:
         ctxs: list[BaseCtx] = []
 
-        for i, key_or_value in enumerate(result[1:]):
-            even = i % 2
-            is_key = even == 0
-            is_value = even == 1
+        if defs.zoom_directory is not None:
+            docs = await defs.zoom_directory.expand(docs)
 
-            if is_key:
+        for doc in docs:
+            # deleted between the lookup and the read
+            if doc is None:
                 continue
 
-            value = key_or_value[1]
-
-            # convert ["string json" -> DbBaseCtx]
+            # convert [dict -> DbBaseCtx]
             # in executor
             db_ctx = await defs.loop.run_in_executor(
                 None,
-                DbBaseCtx.model_validate_json,
-                value
+                DbBaseCtx.model_validate,
+                doc
             )
             # convert [DbBaseCtx -> BaseCtx]
             # in executor
@@ -829,48 +770,24 @@ class Ctx:
         return ctxs
 
     async def get_who_needs_group_broadcast_parsed(self, groups: list[str]) -> list[BaseCtx]:
-        raw_result = await self.get_who_needs_group_broadcast(groups)
-        if raw_result is None: return []
-        return await self.parse_redis_result(raw_result)
+        from src.data.settings import Mode
+        docs = await defs.storage.who_needs(Mode.GROUP, groups)
+        return await self.parse_docs(docs)
 
     async def get_who_needs_tchr_broadcast_parsed(self, teachers: list[str]) -> list[BaseCtx]:
-        raw_result = await self.get_who_needs_tchr_broadcast(teachers)
-        if raw_result is None: return []
-        return await self.parse_redis_result(raw_result)
+        from src.data.settings import Mode
+        docs = await defs.storage.who_needs(Mode.TEACHER, teachers)
+        return await self.parse_docs(docs)
     
     async def get_who_enabled_broadcast_parsed(self) -> list[BaseCtx]:
-        raw_result = await self.get_who_enabled_broadcast()
-        if raw_result is None: return []
-        return await self.parse_redis_result(raw_result)
+        docs = await defs.storage.who_enabled_broadcast()
+        return await self.parse_docs(docs)
     
     async def get_everyone_parsed(self) -> list[BaseCtx]:
-        parsed = []
-        raw_result = await self.get_everyone()
-
-        if raw_result is None:
-            return []
-
-        for raw_ctx in raw_result:
-            # convert [dict -> DbBaseCtx]
-            # in executor
-            db_ctx = await defs.loop.run_in_executor(
-                None,
-                DbBaseCtx.model_validate,
-                raw_ctx[0]
-            )
-            # convert [DbBaseCtx -> BaseCtx]
-            # in executor
-            ctx = await defs.loop.run_in_executor(
-                None,
-                db_ctx.to_runtime
-            )
-
-            parsed.append(ctx)
-
-        return parsed
+        return await self.parse_docs(await self.get_everyone())
 
     @staticmethod
-    async def retry_redis_command(
+    async def retry_storage_query(
         fn: Callable[[], Awaitable[T]],
         args: tuple[Any] = (),
         max_tries: int = 3
@@ -879,10 +796,10 @@ class Ctx:
         while True:
             try:
                 return await fn(*args)
-            except ResponseError as e:
+            except Exception as e:
                 if tries > max_tries: raise e
                 tries += 1
-                if "Timeout" in str(e): continue
+                if await defs.storage.recover(e): continue
                 raise e
 
     async def broadcast_mappings(
@@ -904,10 +821,10 @@ class Ctx:
         teachers_args = (affected_teachers,)
 
         chats_that_need_group_broadcast = (
-            await self.retry_redis_command(fn=groups_fn, args=groups_args)
+            await self.retry_storage_query(fn=groups_fn, args=groups_args)
         )
         chats_that_need_tchr_broadcast = (
-            await self.retry_redis_command(fn=teachers_fn, args=teachers_args)
+            await self.retry_storage_query(fn=teachers_fn, args=teachers_args)
         )
 
         for chat in chats_that_need_group_broadcast:
@@ -933,7 +850,7 @@ class Ctx:
         header: str
     ):
         fn = self.get_who_enabled_broadcast_parsed
-        subscribers = await self.retry_redis_command(fn=fn)
+        subscribers = await self.retry_storage_query(fn=fn)
         
         for chat in subscribers:
             if chat.fmt_schedule() is None:
@@ -1098,7 +1015,9 @@ class BaseCommonEvent(HiddenVars):
         elif self.src.startswith("vk"):
             src = "vk"
         
-        db_ctx = await defs.redis.json().get(f"{src.upper()}_{self.chat_id}")
+        db_ctx = await defs.storage.get(f"{src.upper()}_{self.chat_id}")
+        if defs.zoom_directory is not None:
+            [db_ctx] = await defs.zoom_directory.expand([db_ctx])
         db_ctx_parsed = DbBaseCtx.parse_obj(db_ctx)
 
         self.set_ctx(db_ctx_parsed.to_runtime())
@@ -2440,14 +2359,28 @@ def run_forever():
 
             logger.info("starting vk polling again")
     
-    if defs.vk_bot:
-        defs.create_task(vk_run_polling())
-    if defs.tg_dispatch:
-        defs.create_task(tg_start_polling())
+    if defs.worker:
+        defs.create_task(defs.worker.consume())
+    elif defs.broadcaster:
+        defs.create_task(defs.broadcaster.consume())
+    elif defs.coordinator:
+        defs.coordinator.start(defs.supervisor)
+    else:
+        if defs.vk_bot:
+            defs.create_task(vk_run_polling())
+        if defs.tg_dispatch:
+            defs.create_task(tg_start_polling())
+
+    if defs.broadcast_queue and defs.is_main:
+        defs.create_task(defs.supervisor.keep("broadcaster", "--broadcaster"))
 
     try:
         loop.run_forever()
     except (KeyboardInterrupt, SystemExit):
-        if defs.log_file:
+        if defs.supervisor:
+            defs.supervisor.stop()
+        if defs.log_writer:
             logger.info("shutdown, closing log file")
-            defs.log_file.close()
+            # let loguru hand over what it has queued
+            logger.complete()
+            defs.log_writer.stop()
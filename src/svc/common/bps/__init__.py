@@ -70,8 +70,9 @@ async def page_previous(everything: CommonEverything):
     else:
         ctx.pages.current_num -= 1
         
-        answer_text = ctx.pages.current.text
-        answer_keyboard = ctx.pages.current.keyboard
+        page = ctx.pages.current
+        answer_text = page.text
+        answer_keyboard = page.keyboard
         
         return await everything.edit_or_answer(
             text=answer_text,
@@ -91,7 +92,7 @@ async def page_next(everything: CommonEverything):
     if is_hub:
         is_allowed = ctx.shift_week_forward()
     else:
-        is_allowed = ctx.pages.current_num < len(ctx.pages.list) - 1
+        is_allowed = ctx.pages.current_num < ctx.pages.last_num
 
     if not is_allowed:
         return await everything.event.pong()
@@ -104,8 +105,9 @@ async def page_next(everything: CommonEverything):
     else:
         ctx.pages.current_num += 1
         
-        answer_text = ctx.pages.current.text
-        answer_keyboard = ctx.pages.current.keyboard
+        page = ctx.pages.current
+        answer_text = page.text
+        answer_keyboard = page.keyboard
         
         return await everything.edit_or_answer(
             text=answer_text,
@@ -138,8 +140,9 @@ async def page_jump_previous(everything: CommonEverything):
     else:
         ctx.pages.current_num = 0
         
-        answer_text = ctx.pages.current.text
-        answer_keyboard = ctx.pages.current.keyboard
+        page = ctx.pages.current
+        answer_text = page.text
+        answer_keyboard = page.keyboard
         
         return await everything.edit_or_answer(
             text=answer_text,
@@ -159,7 +162,7 @@ async def page_jump_next(everything: CommonEverything):
     if is_hub:
         is_allowed = ctx.jump_week_forward()
     else:
-        is_allowed = ctx.pages.current_num < len(ctx.pages.list) - 1
+        is_allowed = ctx.pages.current_num < ctx.pages.last_num
 
     if not is_allowed:
         return await everything.event.pong()
@@ -170,10 +173,11 @@ async def page_jump_next(everything: CommonEverything):
             allow_edit=ctx.last_bot_message.can_edit
         )
     else:
-        ctx.pages.current_num = len(ctx.pages.list) - 1
+        ctx.pages.current_num = ctx.pages.last_num
         
-        answer_text = ctx.pages.current.text
-        answer_keyboard = ctx.pages.current.keyboard
+        page = ctx.pages.current
+        answer_text = page.text
+        answer_keyboard = page.keyboard
         
         return await everything.edit_or_answer(
             text=answer_text,
@@ -42,7 +42,7 @@ async def hub(
             if group_match is None:
                 valid_teacher = teacher.validate(
                     everything.message.text,
-                    defs.schedule.teacher_names()
+                    defs.schedule.teacher_index()
                 )
                 identifier_match = pattern.TEACHER.match(
                     valid_teacher
@@ -63,13 +63,13 @@ async def hub(
             
             if (
                 ctx.schedule.temp_mode == Mode.GROUP and
-                identifier not in defs.schedule.group_names()
+                identifier not in defs.schedule.group_index()
             ):
                 return
 
             if (
                 ctx.schedule.temp_mode == Mode.TEACHER and
-                identifier not in defs.schedule.teacher_names()
+                identifier not in defs.schedule.teacher_index()
             ):
                 return
             
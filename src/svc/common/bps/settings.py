@@ -1,5 +1,6 @@
 from src import defs
 from src.parse import pattern
+from src.parse.nameindex import NameIndex
 from src.svc.common import CommonEverything, messages
 from src.svc.common.bps import zoom as zoom_bp
 from src.data import zoom as zoom_data
@@ -18,7 +19,7 @@ async def auto_route(everything: CommonEverything):
     previous_space = ctx.navigator.previous_space
     current_state = ctx.navigator.current
 
-    if SETTINGS.I_MAIN in ctx.navigator.trace:
+    if ctx.navigator.is_traced(SETTINGS.I_MAIN):
         ctx.navigator.jump_back_to(SETTINGS.I_MAIN)
 
         return await main(everything)
@@ -244,7 +245,7 @@ async def approve_pin(everything: CommonEverything):
 async def should_pin(everything: CommonEverything):
     ctx = everything.ctx
     is_should_pin_set = everything.ctx.settings.should_pin is not None
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
 
     answer_text = (
         messages.Builder()
@@ -342,7 +343,7 @@ async def approve_broadcast(everything: CommonEverything):
 async def broadcast(everything: CommonEverything):
     ctx = everything.ctx
     is_broadcast_set = everything.ctx.settings.broadcast is not None
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
 
     answer_text = (
         messages.Builder()
@@ -400,7 +401,7 @@ async def confirm_unknown_teacher(everything: CommonEverything):
 async def unknown_teacher(everything: CommonEverything):
     ctx = everything.ctx
     teacher = everything.ctx.settings.teacher.valid
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
 
     if everything.is_from_message:
         message = everything.message
@@ -451,7 +452,7 @@ async def switch_to_group_mode(everything: CommonEverything):
 async def teacher(everything: CommonEverything):
     ctx = everything.ctx
     is_teacher_set = ctx.settings.teacher.confirmed is not None
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
     is_show_names_payload = (
         everything.is_from_event and
         everything.event.payload == kb.Payload.SHOW_NAMES
@@ -516,9 +517,9 @@ async def teacher(everything: CommonEverything):
             )
 
         if defs.schedule.is_cached_available:
-            teachers = defs.schedule.teacher_names()
+            teachers = defs.schedule.teacher_index()
         else:
-            teachers = []
+            teachers = NameIndex()
 
         # add user's teacher to context as typed teacher
         ctx.settings.teacher.typed = teacher_match.group()
@@ -629,7 +630,7 @@ async def confirm_unknown_group(everything: CommonEverything):
 async def unknown_group(everything: CommonEverything):
     ctx = everything.ctx
     group = everything.ctx.settings.group.valid
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
 
     if everything.is_from_message:
         message = everything.message
@@ -680,7 +681,7 @@ async def switch_to_teacher_mode(everything: CommonEverything):
 async def group(everything: CommonEverything):
     ctx = everything.ctx
     is_group_set = ctx.settings.group.confirmed is not None
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
     is_show_names_payload = (
         everything.is_from_event and
         everything.event.payload == kb.Payload.SHOW_NAMES
@@ -823,7 +824,7 @@ async def me_teacher_mode(everything: CommonEverything):
 async def mode(everything: CommonEverything):
     ctx = everything.ctx
     is_mode_set = everything.ctx.settings.mode is not None
-    is_from_hub = HUB.I_MAIN in ctx.navigator.trace
+    is_from_hub = ctx.navigator.is_traced(HUB.I_MAIN)
 
     answer_text = (
         messages.Builder()
@@ -9,7 +9,7 @@ from src.svc.common.states import formatter as states_fmt
 from src.svc.common.states.tree import ZOOM, Space
 from src.svc.common.router import router
 from src.svc.common.filters import PayloadFilter, StateFilter, UnionFilter
-from src.svc.common import keyboard as kb, template
+from src.svc.common import keyboard as kb
 from src.data import zoom, DataField, error
 
 
@@ -99,7 +99,7 @@ async def remove_entry(everything: CommonEverything):
     focused.remove(selected.name.value)
     everything.navigator.back(trace_it=False)
 
-    if ZOOM.I_MASS in everything.navigator.trace and not focused.has_something:
+    if everything.navigator.is_traced(ZOOM.I_MASS) and not focused.has_something:
         return await to_mass(everything)
     else:
         return await to_browse(everything)
@@ -550,11 +550,11 @@ async def to_name(everything: CommonEverything):
 
 @router.on_everything(StateFilter(ZOOM.III_ENTRY))
 async def entry(everything: CommonEverything):
-    ignored_keys = []
+    ignored_keys = ["checked"]
     field_filter = lambda field: field[0] not in ["name"]
     if everything.ctx.settings.mode == Mode.GROUP:
         storage = everything.ctx.settings.zoom
-        ignored_keys = ["host_key"]
+        ignored_keys = ["host_key", "checked"]
         field_filter = lambda field: field[0] not in ["name", "host_key"]
     elif everything.ctx.settings.mode == Mode.TEACHER:
         storage = everything.ctx.settings.tchr_zoom
@@ -613,7 +613,7 @@ async def browse(
     is_init_space = Space.INIT in ctx.navigator.spaces
     is_hub_space = Space.HUB in ctx.navigator.spaces
     
-    add_quick_lookup_hint = len(storage.entries.list) > 0
+    add_quick_lookup_hint = storage.entries.has_something
     quick_lookup_hint = None
     
     if (
@@ -671,20 +671,9 @@ async def browse(
             storage.focused.selected_name = requested_entry.name.value
 
             # jump to the page where the entry is located
-            for page in everything.ctx.pages.list:
-                if page.metadata is None:
-                    continue
-
-                page_num_names_map: dict[int, list[str]] = page.metadata.get(
-                    template.MetadataKeys.PAGE_NUM_NAMES_MAP
-                )
-
-                if page_num_names_map is None:
-                    continue
-
-                for (page_num, page_map) in page_num_names_map.items():
-                    if requested_entry.name.value in page_map:
-                        everything.ctx.pages.current_num = page_num
+            page_num = everything.ctx.pages.page_of(requested_entry.name.value)
+            if page_num is not None:
+                everything.ctx.pages.current_num = page_num
 
             return await to_entry(everything)
 
@@ -693,8 +682,8 @@ async def browse(
         if everything.is_from_message and is_first_call:
             return await mass(everything)
         
-        ctx.pages.list = pagination.from_zoom(
-            data=storage.new_entries.list,
+        ctx.pages.use(pagination.from_zoom(
+            storage=zoom.Storage.NEW_ENTRIES,
             mode=ctx.settings.mode,
             per_page=4 if everything.is_from_tg_generally else 2,
             text_footer=text_footer if text_footer else quick_lookup_hint,
@@ -703,11 +692,11 @@ async def browse(
                 [kb.BACK_BUTTON],
             ],
             do_tg_markup=everything.is_from_tg_generally
-        )
+        ))
     elif storage.is_focused_on_entries and not is_jump_call:
         # user came here to view current active entries
-        ctx.pages.list = pagination.from_zoom(
-            data=storage.entries.list,
+        ctx.pages.use(pagination.from_zoom(
+            storage=zoom.Storage.ENTRIES,
             mode=ctx.settings.mode,
             per_page=4 if everything.is_from_tg_generally else 2,
             text_footer=text_footer if text_footer else quick_lookup_hint,
@@ -721,11 +710,13 @@ async def browse(
                 [kb.BACK_BUTTON],
             ],
             do_tg_markup=everything.is_from_tg_generally
-        )
+        ))
+
+    page = ctx.pages.current
 
     return await everything.edit_or_answer(
-        text=ctx.pages.current.text,
-        keyboard=ctx.pages.current.keyboard,
+        text=page.text,
+        keyboard=page.keyboard,
     )
 
 async def to_browse(
@@ -753,7 +744,7 @@ async def mass(everything: CommonEverything):
     elif ctx.settings.mode == Mode.TEACHER:
         storage = ctx.settings.tchr_zoom
 
-    if ZOOM.I_MASS not in ctx.navigator.trace:
+    if not ctx.navigator.is_traced(ZOOM.I_MASS):
         return None
 
     if everything.is_from_event:
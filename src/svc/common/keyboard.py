@@ -439,11 +439,13 @@ class Keyboard(BaseModel):
         schema_row: list[Button] = []
         schema: list[Button] = []
 
-        for index, (key, value) in enumerate(dataclass.__dict__.items()):
-            if key in ignored_keys:
-                continue
-            
-            is_last = index + 1 == len(dataclass.__dict__)
+        items = [
+            (key, value) for (key, value) in dataclass.__dict__.items()
+            if key not in ignored_keys
+        ]
+
+        for index, (key, value) in enumerate(items):
+            is_last = index + 1 == len(items)
             emoji = None
 
             if isinstance(value, DataField):
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import datetime
 import html
 from typing import Any, Optional, TYPE_CHECKING
 from src import defs
 from src.data import zoom, format as fmt
 from src.data.settings import Settings
 from src.data.schedule import compare
-from src.data.range import Range
+from src.data.range import DateRange
 from src.parse.zoom import Key
 from src.svc import telegram as tg, common
 from src.svc.common.states import State
@@ -968,7 +967,7 @@ MSG_GROUP_CHANGED_IN_SCHEDULE = (
 )
 def format_group_changed_in_schedule(
     change: compare.ChangeType,
-    date_range: Optional[Range[datetime.date]] = None
+    date_range: Optional[DateRange] = None
 ):
     if change == compare.ChangeType.APPEARED:
         repr_change = "появилась"
@@ -989,7 +988,7 @@ MSG_TEACHER_CHANGED_IN_SCHEDULE = (
 )
 def format_teacher_changed_in_schedule(
     change: compare.ChangeType,
-    date_range: Optional[Range[datetime.date]] = None
+    date_range: Optional[DateRange] = None
 ):
     if change == compare.ChangeType.APPEARED:
         repr_change = "появился"
@@ -39,8 +39,8 @@ class BotMentionFilter(Middleware):
 @router.middleware()
 class CtxCheck(Middleware):
     async def pre(self, everything: CommonEverything):
-        if not await defs.is_redis_online():
-            logger.error("redis instance is offline, aborting...")
+        if not await defs.storage.is_online():
+            logger.error("ctx storage is offline, aborting...")
             self.stop()
             
         if not await defs.ctx.is_added(everything):
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections import Counter
 from typing import Optional, Callable
 from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
@@ -58,6 +59,20 @@ class Navigator:
     ## Used
     - to pass it to `on_enter`, `on_exit` methods of states
     """
+    _traced: Counter[State] = field(default_factory=Counter, repr=False)
+    """
+    # How many times each state is in `trace`
+    So membership checks don't walk the list.
+    """
+    _back_traced: Counter[State] = field(default_factory=Counter, repr=False)
+    """
+    # Same as `_traced`, but for `back_trace`
+    """
+
+    def __post_init__(self):
+        self.ignored = set(self.ignored)
+        self._traced = Counter(self.trace)
+        self._back_traced = Counter(self.back_trace)
 
 
     @property
@@ -91,6 +106,41 @@ class Navigator:
         
         return self.back_trace[-1]
 
+    def is_traced(self, state: State) -> bool:
+        """
+        ## Same as `state in self.trace`, but O(1)
+        """
+        return self._traced[state] > 0
+
+    def is_back_traced(self, state: State) -> bool:
+        """
+        ## Same as `state in self.back_trace`, but O(1)
+        """
+        return self._back_traced[state] > 0
+
+    def _push_trace(self, state: State):
+        self.trace.append(state)
+        self._traced[state] += 1
+
+    def _del_trace(self, index: int):
+        self._uncount(self._traced, self.trace[index])
+        del self.trace[index]
+
+    def _push_back_trace(self, state: State):
+        self.back_trace.append(state)
+        self._back_traced[state] += 1
+
+    def _del_back_trace(self, index: int):
+        self._uncount(self._back_traced, self.back_trace[index])
+        del self.back_trace[index]
+
+    @staticmethod
+    def _uncount(counter: Counter[State], state: State):
+        counter[state] -= 1
+
+        if counter[state] < 1:
+            del counter[state]
+
     @property
     def space(self) -> SPACE_LITERAL:
         """
@@ -131,7 +181,7 @@ class Navigator:
         if self.current:
             self.current.on_traced_exit(self.everything)
     
-        self.trace.append(state)
+        self._push_trace(state)
 
         # we entered a state
         # for the first time,
@@ -159,14 +209,14 @@ class Navigator:
             return None
 
         if trace_it and self.trace[-1].back_trace:
-            self.back_trace.append(self.current)
+            self._push_back_trace(self.current)
 
         if execute_actions:
             # this state won't be in trace
             # anymore, so we call `on_exit`
             self.current.on_exit(self.everything)
 
-        del self.trace[-1]
+        self._del_trace(-1)
 
         if execute_actions:
             # state we just got to was
@@ -176,29 +226,29 @@ class Navigator:
     def next(self):
         if len(self.back_trace) > 0:
             self.append_no_checks(self.current_back_trace)
-            del self.back_trace[-1]
+            self._del_back_trace(-1)
     
     def delete(self, state: State) -> bool:
-        for (i, traced_state) in enumerate(self.trace):
-            if traced_state == state:
-                # MOTHERFUCKER GETS EJECTED
-                traced_state.on_delete(self.everything)
+        if not self.is_traced(state):
+            return False
 
-                del self.trace[i]
-                return True
-        
-        return False
+        i = self.trace.index(state)
+        # MOTHERFUCKER GETS EJECTED
+        self.trace[i].on_delete(self.everything)
+
+        self._del_trace(i)
+        return True
     
     def delete_back_trace(self, state: State) -> bool:
-        for (i, traced_state) in enumerate(self.back_trace):
-            if traced_state == state:
-                # MOTHERFUCKER GETS EJECTED
-                traced_state.on_delete(self.everything)
-    
-                del self.back_trace[i]
-                return True
-        
-        return False
+        if not self.is_back_traced(state):
+            return False
+
+        i = self.back_trace.index(state)
+        # MOTHERFUCKER GETS EJECTED
+        self.back_trace[i].on_delete(self.everything)
+
+        self._del_back_trace(i)
+        return True
 
     def delete_back_trace_fn(self, fn: Callable[[State], bool], do_short: bool = True) -> bool:
         result = False
@@ -207,7 +257,7 @@ class Navigator:
                 # MOTHERFUCKER GETS EJECTED
                 traced_state.on_delete(self.everything)
     
-                del self.back_trace[i]
+                self._del_back_trace(i)
                 result = True
                 if do_short:
                     return result
@@ -222,6 +272,8 @@ class Navigator:
             if not target:
                 continue
             
+            self._uncount(self._back_traced, traced_state)
+            self._back_traced[target] += 1
             self.back_trace[i] = target
             result = True
         
@@ -229,12 +281,7 @@ class Navigator:
 
     @property
     def spaces(self) -> set[SPACE_LITERAL]:
-        unique_spaces: set[SPACE_LITERAL] = set()
-
-        for state in self.trace:
-            unique_spaces.add(state.space)
-        
-        return unique_spaces
+        return {state.space for state in self._traced}
 
     def is_space_mixed(self) -> bool:        
         return len(self.spaces) > 1
@@ -245,7 +292,7 @@ class Navigator:
         trace_it: bool = False, 
         execute_actions: bool = True
     ):
-        if state not in self.trace:
+        if not self.is_traced(state):
             raise error.ThisStateNotInTrace(
                 "you tried to jump back to state "
                 "that is not in trace"
@@ -285,9 +332,12 @@ class Navigator:
         self.trace = []
         self.back_trace = []
         self.ignored = set()
+        self._traced = Counter()
+        self._back_traced = Counter()
 
     def clear_back_trace(self) -> None:
         self.back_trace = []
+        self._back_traced = Counter()
     
     def set_everything(self, everything: common.CommonEverything):
         should_auto_ignore = False
@@ -315,7 +365,7 @@ class Navigator:
         return cls(
             trace=[states.from_encoded(state) for state in db.trace],
             back_trace=[states.from_encoded(state) for state in db.back_trace],
-            ignored=[states.from_encoded(state) for state in db.ignored],
+            ignored={states.from_encoded(state) for state in db.ignored},
             everything=everything
         )
     
@@ -1,14 +1,16 @@
 from __future__ import annotations
+from collections import OrderedDict
+from itertools import islice
 from typing import (
+    Callable,
     Generator,
-    Union,
     TypeVar,
     Optional,
     List,
     TYPE_CHECKING
 )
 from dataclasses import dataclass
-from pydantic import BaseModel, Field as PydField
+from pydantic import BaseModel, Field as PydField, PrivateAttr
 from src.svc.common.keyboard import (
     BACK_BUTTON,
     Keyboard,
@@ -22,15 +24,12 @@ from src.svc.common.keyboard import (
     PAGE_PREVIOUS_DEAD_END_BUTTON,
     PAGE_NEXT_DEAD_END_BUTTON,
 )
-from src.svc.common.template import (
-    CommonBotTemplate,
-    MetadataKeys
-)
+from src.svc.common.template import CommonBotTemplate
 from src.svc.common import error, messages
 from src.data import zoom
 
 if TYPE_CHECKING:
-    from src.data.settings import MODE_LITERAL
+    from src.data.settings import MODE_LITERAL, Settings
 
 T = TypeVar("T")
 
@@ -40,35 +39,124 @@ def chunks(lst: list[T], n: int) -> Generator[list[T], None, None]:
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
-class Container(BaseModel):
-    list: List[CommonBotTemplate] = PydField(
-        default_factory=lambda *a, **kw: list(*a, **kw)
+CACHE_SIZE = 3
+""" # How many rendered pages a container keeps """
+
+
+class ZoomSource(BaseModel):
+    """
+    # What to paginate and how
+    Pages are rendered from it on demand,
+    so only this is stored with ctx.
+    """
+    mode: "MODE_LITERAL"
+    storage: zoom.STORAGE
+    """ # Which `zoom.Container` storage entries are taken from """
+    per_page: int = 2
+    text_footer: Optional[str] = None
+    keyboard_width: int = 2
+    keyboard_header: List[List[Optional[Button]]] = PydField(
+        default_factory=lambda: [[]]
     )
-    """ ## List of pages, containing messsage templates """
+    keyboard_footer: List[List[Optional[Button]]] = PydField(
+        default_factory=lambda: [[BACK_BUTTON]]
+    )
+    do_tg_markup: bool = False
+
+    def entries(self, settings: Settings) -> zoom.Entries:
+        from src.data.settings import Mode
+
+        if self.mode == Mode.TEACHER:
+            container = settings.tchr_zoom
+        else:
+            container = settings.zoom
+
+        return getattr(container, self.storage)
+
+    def page_count(self, entries: zoom.Entries) -> int:
+        # even with no entries there's
+        # one page saying it's empty
+        return max(1, -(-len(entries) // self.per_page))
+
+
+class Container(BaseModel):
+    source: Optional[ZoomSource] = None
+    """ ## What pages are rendered from """
     current_num: int = 0
     """ ## On which page number user is currently on """
 
+    _settings: Optional[Callable[[], Settings]] = PrivateAttr(default=None)
+    _cache: OrderedDict[int, CommonBotTemplate] = PrivateAttr(
+        default_factory=OrderedDict
+    )
 
-    def keep_num_in_range(self) -> None:
-        last_page_index = len(self.list) - 1
+    def bind(self, settings: Callable[[], Settings]) -> None:
+        """
+        # Tell where entries should be taken from
+        Called by ctx, since settings may be replaced.
+        """
+        self._settings = settings
 
-        if last_page_index < self.current_num:
-            self.current_num = last_page_index
+    def use(self, source: ZoomSource) -> None:
+        """ ## Paginate `source` from now on """
+        self.source = source
+        self._cache.clear()
 
     @property
-    def current(self):
-        """ ## Current page """
-        if len(self.list) < 1:
+    def entries(self) -> zoom.Entries:
+        if self.source is None or self._settings is None:
             raise error.NoPages(
                 "no pages in container, can't return current page"
             )
 
+        return self.source.entries(self._settings())
+
+    @property
+    def page_count(self) -> int:
+        if self.source is None:
+            return 0
+
+        return self.source.page_count(self.entries)
+
+    @property
+    def last_num(self) -> int:
+        return self.page_count - 1
+
+    def keep_num_in_range(self) -> None:
+        if self.last_num < self.current_num:
+            self.current_num = self.last_num
+
+    def page_of(self, name: str) -> Optional[int]:
+        """ ## Number of the page `name` is on """
+        for (idx, entry_name) in enumerate(self.entries.by_name):
+            if entry_name == name:
+                return idx // self.source.per_page
+
+        return None
+
+    def page(self, num: int) -> CommonBotTemplate:
+        cached = self._cache.get(num)
+        if cached is not None:
+            self._cache.move_to_end(num)
+            return cached
+
+        rendered = render_zoom_page(self.entries, self.source, num)
+
+        self._cache[num] = rendered
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+        return rendered
+
+    @property
+    def current(self) -> CommonBotTemplate:
+        """ ## Current page """
         self.keep_num_in_range()
 
-        return self.list[self.current_num]
+        return self.page(self.current_num)
 
 def from_zoom(
-    data: Union[list[zoom.Data], set[zoom.Data]], 
+    storage: zoom.STORAGE,
     mode: "MODE_LITERAL",
     per_page: int = 2, 
     text_footer: Optional[str] = None,
@@ -76,127 +164,133 @@ def from_zoom(
     keyboard_header: list[list[Button]] = [[]],
     keyboard_footer: list[list[Button]] = [[BACK_BUTTON]],
     do_tg_markup: bool = False
-) -> list[CommonBotTemplate]:
+) -> ZoomSource:
+    return ZoomSource(
+        mode=mode,
+        storage=storage,
+        per_page=per_page,
+        text_footer=text_footer,
+        keyboard_width=keyboard_width,
+        keyboard_header=keyboard_header,
+        keyboard_footer=keyboard_footer,
+        do_tg_markup=do_tg_markup
+    )
+
+def render_zoom_page(
+    entries: zoom.Entries,
+    source: ZoomSource,
+    page_num: int
+) -> CommonBotTemplate:
     from src.data.settings import Mode
 
-    if isinstance(data, set):
-        data = list(data)
+    mode = source.mode
 
     if mode == Mode.GROUP:
         field_filter = lambda field: field[0] not in ["name", "host_key"]
     elif mode == Mode.TEACHER:
         field_filter = lambda field: field[0] not in ["name"]
 
-    # the output of this function
-    msgs = []
-    # split whole data into pages
-    pages = [page for page in chunks(data, per_page)]
-
-    is_single_page = len(pages) < 2
-
-    if len(pages) < 1:
-        pages = [[]]
-
-    page_num_names_map: dict[int, list[str]] = {}
-
-    # iterate for each chunk, a list of zoom data classes
-    for (page_num, page) in enumerate(pages):
-        this_page_names = [entry.name.value for entry in page]
-        page_num_names_map[page_num] = this_page_names
-
-        is_first_page = page_num == 0
-        is_last_page = page_num + 1 == len(pages)
-
-        if len(page) > 0:
-            # call `format()` on each zoom data and separate them with "\n\n"
-            text = "\n\n".join([section.format(mode, field_filter, do_tg_markup) for section in page])
-        else:
-            text = messages.format_empty_page()
-
-        # add custom text footer
-        if text_footer is not None:
-            text += "\n\n"
-            text += text_footer
-
-        # add page number at the bottom
+    page_count = source.page_count(entries)
+    is_single_page = page_count < 2
+    is_first_page = page_num == 0
+    is_last_page = page_num + 1 == page_count
+
+    # only this page's entries, the rest aren't touched
+    first_idx = page_num * source.per_page
+    page = list(islice(
+        entries.by_name.values(),
+        first_idx,
+        first_idx + source.per_page
+    ))
+
+    if len(page) > 0:
+        # call `format()` on each zoom data and separate them with "\n\n"
+        text = "\n\n".join([
+            section.format(mode, field_filter, source.do_tg_markup)
+            for section in page
+        ])
+    else:
+        text = messages.format_empty_page()
+
+    # add custom text footer
+    if source.text_footer is not None:
         text += "\n\n"
-        text += messages.format_page_num(
-            current=page_num + 1, 
-            last=len(pages)
-        )
+        text += source.text_footer
 
-        # whole keyboard schema
-        kb_schema = []
-        # current row
-        cur_row = []
-
-        # append keyboard header
-        for row in keyboard_header:
-            kb_schema.append(row)
-
-        if not is_single_page:
-            back_button = PAGE_PREVIOUS_BUTTON
-            back_jump_button = PAGE_PREVIOUS_JUMP_BUTTON
-            next_button = PAGE_NEXT_BUTTON
-            next_jump_button = PAGE_NEXT_JUMP_BUTTON
-            
-            if is_first_page:
-                back_button = PAGE_PREVIOUS_DEAD_END_BUTTON
-                back_jump_button = PAGE_PREVIOUS_DEAD_END_BUTTON
-            if is_last_page:
-                next_button = PAGE_NEXT_DEAD_END_BUTTON
-                next_jump_button = PAGE_NEXT_DEAD_END_BUTTON
-
-            # make a row with navigation
-            kb_schema.append([
-                back_button, 
-                back_jump_button,
-                next_jump_button,
-                next_button,
-            ])
-
-        # iterate for each section in current page (2D array)
-        #                  [..., ...]         [ [..., ...], [..., ...] ]
-        for (section_i, section) in enumerate(page):
-            is_last_section = section_i + 1 == len(page)
-
-            name_emoji = section.name_emoji(
-                mode,
-                warn_sources = lambda entry: [
-                    entry.name,
-                    entry.url,
-                    entry.id,
-                    entry.pwd
-                ]
-            )
+    # add page number at the bottom
+    text += "\n\n"
+    text += messages.format_page_num(
+        current=page_num + 1, 
+        last=page_count
+    )
 
-            button = Button(
-                text=f"{name_emoji} {section.name.__repr_name__()}", 
-                callback=section.name.__repr_name__(),
-                color=Color.BLUE
-            )
+    # whole keyboard schema
+    kb_schema = []
+    # current row
+    cur_row = []
+
+    # append keyboard header
+    for row in source.keyboard_header:
+        kb_schema.append(row)
+
+    if not is_single_page:
+        back_button = PAGE_PREVIOUS_BUTTON
+        back_jump_button = PAGE_PREVIOUS_JUMP_BUTTON
+        next_button = PAGE_NEXT_BUTTON
+        next_jump_button = PAGE_NEXT_JUMP_BUTTON
+        
+        if is_first_page:
+            back_button = PAGE_PREVIOUS_DEAD_END_BUTTON
+            back_jump_button = PAGE_PREVIOUS_DEAD_END_BUTTON
+        if is_last_page:
+            next_button = PAGE_NEXT_DEAD_END_BUTTON
+            next_jump_button = PAGE_NEXT_DEAD_END_BUTTON
+
+        # make a row with navigation
+        kb_schema.append([
+            back_button, 
+            back_jump_button,
+            next_jump_button,
+            next_button,
+        ])
+
+    # iterate for each section in current page
+    for (section_i, section) in enumerate(page):
+        is_last_section = section_i + 1 == len(page)
+
+        name_emoji = section.name_emoji(
+            mode,
+            warn_sources = lambda entry: [
+                entry.name,
+                entry.url,
+                entry.id,
+                entry.pwd
+            ]
+        )
 
-            cur_row.append(button)
+        button = Button(
+            text=f"{name_emoji} {section.name.__repr_name__()}", 
+            callback=section.name.__repr_name__(),
+            color=Color.BLUE
+        )
 
-            # if current row is equal to max keyboard width 
-            # or it's the last section
-            if len(cur_row) == keyboard_width or is_last_section:
-                # append this row to whole schema
-                kb_schema.append(cur_row)
-                # clean current row
-                cur_row = []
+        cur_row.append(button)
 
-        for row in keyboard_footer:
-            if not row:
-                continue
+        # if current row is equal to max keyboard width 
+        # or it's the last section
+        if len(cur_row) == source.keyboard_width or is_last_section:
+            # append this row to whole schema
+            kb_schema.append(cur_row)
+            # clean current row
+            cur_row = []
 
-            kb_schema.append(row)
+    for row in source.keyboard_footer:
+        if not row:
+            continue
 
-        message = CommonBotTemplate(
-            text=text,
-            keyboard=Keyboard(kb_schema, add_back=False),
-            metadata={MetadataKeys.PAGE_NUM_NAMES_MAP: page_num_names_map}
-        )
-        msgs.append(message)
+        kb_schema.append(row)
 
-    return msgs
+    return CommonBotTemplate(
+        text=text,
+        keyboard=Keyboard(kb_schema, add_back=False)
+    )
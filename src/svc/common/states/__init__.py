@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pydantic import BaseModel
-from typing import Callable, ClassVar, Optional, Literal, Iterable
+from typing import Any, Callable, ClassVar, Optional, Literal, Iterable
 
 from src.data import zoom
 from src.svc import common
@@ -45,7 +45,14 @@ SPACE_LITERAL = Literal["init", "settings", "hub", "zoom", "reset"]
 
 
 class Values(BaseModel):
-    def get_from_state(self, state: State): ...
+    def tree_values(self) -> dict[State, Any]:
+        """
+        # Values shown next to states in a tree
+        """
+        return {}
+
+    def get_from_state(self, state: State) -> Any:
+        return self.tree_values().get(state)
 
 def default_action(everything: common.CommonEverything) -> None: ...
 def default_condition(everything: common.CommonEverything) -> bool: return True
@@ -255,12 +262,9 @@ class Tree:
         return len(name.split("_")[0])
 
 def from_encoded(encoded: str) -> Optional[State]:
-    from .tree import from_str
-
-    (str_tree, str_state) = encoded.split(":")
-    class_tree = from_str(str_tree)
+    from .tree import REGISTRY
 
-    return class_tree.from_str(str_state)
+    return REGISTRY.get(encoded)
 
 INIT_MAIN = {
     "name": "Категорически приветствую",
@@ -1,13 +1,22 @@
-from typing import Any, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, TYPE_CHECKING
 
 from src.data import format as fmt
 from src.svc.common.navigator import Navigator
-from src.svc.common.states import State, Values
+from src.svc.common.states import State, Tree, Values, default_condition
 
 if TYPE_CHECKING:
     from src.svc.common import CommonEverything
 
 
+CACHE_SIZE = 1024
+"""
+# How many rendered trees to keep
+"""
+_rendered: OrderedDict[Hashable, str] = OrderedDict()
+_conditional: dict[type[Tree], list[State]] = {}
+
+
 def tabs(level: int) -> str:
     return "  " * (level - 1)
 
@@ -38,6 +47,22 @@ def upcoming(state: State, value: Optional[Any] = None) -> str:
 
     return add_value(text, value)
 
+def conditional_states(tree: Tree) -> list[State]:
+    """
+    # States that are only shown sometimes
+    Ones with their own `should_display_in_tree`.
+    """
+    states = _conditional.get(type(tree))
+
+    if states is None:
+        states = [
+            state for state in tree.__states__
+            if state.should_display_in_tree is not default_condition
+        ]
+        _conditional[type(tree)] = states
+
+    return states
+
 def tree(
     navigator: Navigator,
     everything: "CommonEverything",
@@ -46,51 +71,85 @@ def tree(
 ):
     """
     ## Convert tree to a nice readable text
+    Same trace, values and shown states
+    always give the same text, so it's only made once.
     """
+    current_tree = navigator.current_tree
+    tree_values = values.tree_values() if values else {}
+    hidden = frozenset(
+        state for state in conditional_states(current_tree)
+        if not state.should_display_in_tree(everything)
+    )
+
+    key = (
+        type(current_tree),
+        tuple(navigator.trace),
+        frozenset(navigator.ignored),
+        hidden,
+        tuple(tree_values.items()),
+        base_lvl
+    )
+
+    output = _rendered.get(key)
+    if output is not None:
+        _rendered.move_to_end(key)
+        return output
+
+    output = render(
+        tree=current_tree,
+        trace=navigator.trace,
+        skipped=hidden | navigator.ignored,
+        tree_values=tree_values,
+        base_lvl=base_lvl
+    )
+
+    _rendered[key] = output
+    if len(_rendered) > CACHE_SIZE:
+        _rendered.popitem(last=False)
 
-    formatted_states: list[str] = []
-    output = ""
+    return output
 
-    trace = navigator.trace
-    ignored = navigator.ignored
+def render(
+    tree: Tree,
+    trace: list[State],
+    skipped: frozenset[State],
+    tree_values: dict[State, Any],
+    base_lvl: int = 1
+) -> str:
+    """
+    ## Walk the tree and format each state
+    """
+    formatted_states: list[str] = []
 
-    current_state = navigator.current
-    tree = navigator.current_tree
+    trace_set = set(trace)
+    current_state = trace[-1]
     last_lvl = base_lvl
     last_branch: list[State] = []
     was_in_last_branch = False
 
     for i, tree_state in enumerate(tree.__states__):
-        if tree_state in ignored:
-            continue
-
-        if not tree_state.should_display_in_tree(everything):
+        if tree_state in skipped:
             continue
 
         tree_state: State
         is_last = (i + 1) == len(tree.__states__)
 
         def choose_state_format(state: State) -> str:
-            we_in_this_state_child_branch = False
+            we_in_this_state_child_branch = any(
+                child in trace_set and current_state.level == child.level
+                for child in state.child
+            )
 
-            for child in state.child:
-                if child in trace and current_state.level == child.level:
-                    we_in_this_state_child_branch = True
-                    break
-            
-            value = None
-
-            if values:
-                value = values.get_from_state(state)
+            value = tree_values.get(state)
 
-                if value is not None:
-                    value = fmt.value_repr(value)
+            if value is not None:
+                value = fmt.value_repr(value)
 
             if state == current_state:
                 return current(state, value)
             elif we_in_this_state_child_branch:
                 return unfolded(state, value)
-            elif state in trace:
+            elif state in trace_set:
                 return completed(state, value)
             else:
                 return upcoming(state, value)
@@ -119,11 +178,7 @@ def tree(
             return tree_state.level < last_lvl and tree_state.level == base_lvl
 
         def is_branch_in_users_path() -> bool:
-            for trace_state in trace:
-                if trace_state in last_branch:
-                    return True
-                
-            return False
+            return not trace_set.isdisjoint(last_branch)
 
 
         if is_just_jumped_to_branch():
@@ -151,6 +206,4 @@ def tree(
             state = construct_state(tree_state)
             formatted_states.append(state)
 
-    output = "\n".join(formatted_states)
-
-    return output
+    return "\n".join(formatted_states)
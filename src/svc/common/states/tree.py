@@ -75,5 +75,18 @@ STR_MAP = {
     Admin.__name__: ADMIN,
 }
 
+REGISTRY: dict[str, State] = {
+    str(state): state
+    for class_tree in STR_MAP.values()
+    for state in class_tree
+}
+"""
+# Every state by its encoded name
+## Example
+```
+REGISTRY["Settings:II_GROUP"] is SETTINGS.II_GROUP
+```
+"""
+
 def from_str(tree: str) -> Optional[Tree]:
     return STR_MAP.get(tree)
@@ -3,10 +3,6 @@ from pydantic import BaseModel
 from src.svc.common.keyboard import Keyboard
 
 
-class MetadataKeys:
-    PAGE_NUM_NAMES_MAP = "page_num_names_map"
-
-
 class CommonBotTemplate(BaseModel):
     """
     ## Container of message to send later
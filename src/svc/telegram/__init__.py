@@ -17,7 +17,7 @@ from aiogram.types import (
 )
 from aiogram.client.default import Default
 import html
-from src import defs, text as text_utils
+from src import defs, ratelimit, text as text_utils
 
 
 T = TypeVar("T")
@@ -65,6 +65,8 @@ async def chunked_send(
         is_first = index == 0
         is_last = (index + 1) == len(chunks)
 
+        await ratelimit.take("tg")
+
         result = await defs.tg_bot.send_message(
             chat_id=chat_id,
             text=chunk,
@@ -98,6 +100,7 @@ async def chunked_edit(
         is_last = (index + 1) == len(chunks)
 
         if not is_used_first_edit:
+            await ratelimit.take("tg")
             result = await defs.tg_bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=message_id,
@@ -109,6 +112,7 @@ async def chunked_edit(
             edit_result = result
             is_used_first_edit = True
         else:
+            await ratelimit.take("tg")
             result = await defs.tg_bot.send_message(
                 chat_id=chat_id,
                 text=chunk,
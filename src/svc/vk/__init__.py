@@ -9,7 +9,7 @@ from aiohttp import TCPConnector
 import random
 import asyncio
 
-from src import defs, text
+from src import defs, ratelimit, text
 from src.svc.vk.types_ import RawEvent, MessageV2
 
 
@@ -60,6 +60,8 @@ async def chunked_send(
         is_first = index == 0
         is_last = (index + 1) == len(chunks)
 
+        await ratelimit.take("vk")
+
         api_responses: list[MessagesSendUserIdsResponseItem] = (
             await defs.vk_bot.api.messages.send(
                 random_id=random.randint(0, 99999),
@@ -94,6 +96,7 @@ async def chunked_edit(
         is_last = (index + 1) == len(chunks)
 
         if not used_first_edit:
+            await ratelimit.take("vk")
             response: BaseBoolInt = (await defs.vk_bot.api.messages.edit(
                 peer_id=peer_id,
                 conversation_message_id=conversation_message_id,
@@ -104,6 +107,7 @@ async def chunked_edit(
             edit_response = response
             used_first_edit = True
         else:
+            await ratelimit.take("vk")
             api_responses: list[MessagesSendUserIdsResponseItem] = (
                 await defs.vk_bot.api.messages.send(
                     random_id=random.randint(0, 99999),
@@ -1,11 +1,10 @@
 from __future__ import annotations
 import aiofiles
-import datetime
 from typing import Optional
 from typing_extensions import Self
 from pathlib import Path
 from src.data import week
-from src.data.range import Range
+from src.data.range import DateRange
 from src.persistence import Persistence
 
 
@@ -13,14 +12,14 @@ BASE_WEEKDAY = 6
 
 
 class WeekCast(Persistence):
-    covered: Optional[Range[datetime.date]] = None
+    covered: Optional[DateRange] = None
 
     @classmethod
     def load(cls, path: Path) -> Self:
         this = super().load(path)
         if this.covered is None:
             covered = week.cover_today(idx=BASE_WEEKDAY)
-            this.covered = Range[datetime.date](
+            this.covered = DateRange(
                 start=covered.start,
                 end=covered.end
             )
@@ -31,5 +30,5 @@ class WeekCast(Persistence):
     @classmethod
     def load_or_init(cls: type[WeekCast], path: Path) -> Self:
         covered = week.cover_today(idx=BASE_WEEKDAY)
-        init_fn = lambda: WeekCast(covered=Range[datetime.date](start=covered.start, end=covered.end))
+        init_fn = lambda: WeekCast(covered=DateRange(start=covered.start, end=covered.end))
         return super().load_or_init(path=path, init_fn=init_fn)
\ No newline at end of file
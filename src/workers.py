@@ -0,0 +1,360 @@
+"""
+# Sharded worker processes
+
+With `workers.count` set, the process started
+with `python -m src` becomes a coordinator:
+- it polls VK and Telegram, but doesn't handle anything
+- it puts raw updates to Redis streams,
+one stream per worker, picked by a hash of the chat key,
+so a chat always ends up in the same worker
+- it owns the ktmuscrap websocket, saves schedule snapshots
+and does broadcasts, same as a single process would
+- it starts workers and restarts them if they die
+
+Workers (`python -m src --shard N`) read their stream,
+feed updates to the usual handlers
+and reload the schedule snapshot every time
+the coordinator replaces it.
+```
+coordinator --XADD updates:0--> worker 0
+            --XADD updates:1--> worker 1
+            ...
+```
+"""
+from __future__ import annotations
+import asyncio
+import json
+import sys
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Never, Optional, TYPE_CHECKING
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+
+if TYPE_CHECKING:
+    from vkbottle import Bot as VkBot
+    from aiogram import Bot as TgBot
+
+
+STREAM = "updates:{shard}"
+GROUP = "workers"
+READ_COUNT = 100
+READ_BLOCK_MS = 5000
+RESTART_DELAY = 1.0
+
+TG_CHAT_UPDATES = (
+    "message",
+    "edited_message",
+    "channel_post",
+    "edited_channel_post",
+    "my_chat_member",
+    "chat_member",
+)
+
+
+def stream(shard: int) -> str:
+    return STREAM.format(shard=shard)
+
+def tg_chat_id(update: dict[str, Any]) -> Optional[int]:
+    for kind in TG_CHAT_UPDATES:
+        if kind in update:
+            return update[kind]["chat"]["id"]
+
+    query = update.get("callback_query")
+    if query is None:
+        return None
+    if query.get("message") is not None:
+        return query["message"]["chat"]["id"]
+
+    return query["from"]["id"]
+
+def vk_chat_id(update: dict[str, Any]) -> Optional[int]:
+    obj = update.get("object") or {}
+
+    if "message" in obj:
+        return obj["message"].get("peer_id")
+
+    return obj.get("peer_id")
+
+def chat_key(src: str, update: dict[str, Any]) -> Optional[str]:
+    """
+    # Same key ctxs are stored under
+    ## Example
+    ```
+    chat_key("tg", {"message": {"chat": {"id": 42}, ...}})
+    # "TG_42"
+    ```
+    """
+    from src.svc.common import Source
+
+    if src == Source.TG:
+        chat_id = tg_chat_id(update)
+    elif src == Source.VK:
+        chat_id = vk_chat_id(update)
+    else:
+        chat_id = None
+
+    if chat_id is None:
+        return None
+
+    return f"{src.upper()}_{chat_id}"
+
+def shard_of(key: Optional[str], count: int) -> int:
+    if key is None:
+        return 0
+
+    return zlib.crc32(key.encode("utf8")) % count
+
+async def ensure_group(redis: Redis, stream: str, group: str) -> None:
+    try:
+        await redis.xgroup_create(stream, group, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def consume_group(
+    redis: Redis,
+    stream: str,
+    group: str,
+    consumer: str,
+    handle: Callable[[bytes, dict[bytes, bytes]], Awaitable[None]],
+    count: int = READ_COUNT,
+    block: int = READ_BLOCK_MS
+) -> Never:
+    """
+    # Feed entries of a consumer group to `handle`
+    First goes through entries this consumer
+    got before but didn't ack (previous run crashed),
+    then switches to new ones.
+
+    Reading history with an explicit id
+    never blocks and gives an empty list once
+    there's nothing left, that's when we switch to `>`.
+    """
+    await ensure_group(redis, stream, group)
+    last_id = "0"
+
+    while True:
+        try:
+            read = await redis.xreadgroup(
+                group,
+                consumer,
+                {stream: last_id},
+                count=count,
+                block=block
+            )
+        except Exception as e:
+            logger.warning(f"CAUGHT {stream} READ ERROR: {e}")
+            await asyncio.sleep(1)
+            continue
+
+        entries = read[0][1] if read else []
+
+        if last_id != ">" and not entries:
+            # nothing left from before
+            last_id = ">"
+            continue
+
+        for (entry_id, fields) in entries:
+            await handle(entry_id, fields)
+
+        if last_id != ">":
+            # pending ones are handed out again
+            # until acked, move past them
+            last_id = entries[-1][0]
+
+
+@dataclass
+class Supervisor:
+    """
+    # Keeps child processes running
+    """
+    _procs: dict[str, asyncio.subprocess.Process] = field(default_factory=dict)
+    _stopping: bool = False
+
+    async def keep(self, name: str, *args: str) -> None:
+        """
+        # Run `python -m src *args`, restart it if it exits
+        """
+        while not self._stopping:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "src", *args
+            )
+            self._procs[name] = proc
+            logger.info(f"started {name} (pid {proc.pid})")
+
+            code = await proc.wait()
+            del self._procs[name]
+
+            if self._stopping:
+                break
+
+            logger.error(f"{name} exited with {code}, restarting")
+            await asyncio.sleep(RESTART_DELAY)
+
+    def stop(self) -> None:
+        self._stopping = True
+
+        for proc in self._procs.values():
+            proc.terminate()
+
+
+@dataclass
+class Coordinator:
+    redis: Redis
+    count: int
+    stream_size: int = 10_000
+
+    async def forward(self, src: str, update: dict[str, Any]) -> None:
+        shard = shard_of(chat_key(src, update), self.count)
+
+        await self.redis.xadd(
+            stream(shard),
+            {"src": src, "update": json.dumps(update, ensure_ascii=False)},
+            maxlen=self.stream_size,
+            approximate=True
+        )
+
+    async def vk_intake(self, bot: "VkBot") -> Never:
+        from src.svc.common import Source
+
+        while True:
+            try:
+                async for event in bot.polling.listen():
+                    for update in event["updates"]:
+                        await self.forward(Source.VK, update)
+            except Exception as e:
+                logger.warning(f"CAUGHT VK INTAKE ERROR: {e}")
+                await asyncio.sleep(1)
+
+            logger.info("starting vk intake again")
+
+    async def tg_intake(self, bot: "TgBot") -> Never:
+        from aiogram.exceptions import TelegramRetryAfter
+        from src.svc.common import Source
+
+        offset = None
+
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30)
+            except TelegramRetryAfter as e:
+                logger.warning(f"CAUGHT TELEGRAM RETRY AFTER {e.retry_after}")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except Exception as e:
+                logger.warning(f"CAUGHT TELEGRAM INTAKE ERROR {e}")
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                for update in updates:
+                    await self.forward(Source.TG, update.model_dump(
+                        mode="json",
+                        by_alias=True,
+                        exclude_none=True
+                    ))
+                    # only once it's in a stream, otherwise
+                    # telegram gives it to us again next time
+                    offset = update.update_id + 1
+            except Exception as e:
+                logger.warning(f"CAUGHT TELEGRAM FORWARD ERROR {e}")
+                await asyncio.sleep(1)
+
+    def start(self, supervisor: Supervisor) -> None:
+        from src import defs
+
+        for shard in range(self.count):
+            defs.create_task(
+                supervisor.keep(f"worker {shard}", "--shard", str(shard))
+            )
+
+        if defs.vk_bot:
+            defs.create_task(self.vk_intake(defs.vk_bot))
+        if defs.tg_bot:
+            defs.create_task(self.tg_intake(defs.tg_bot))
+
+
+@dataclass
+class Worker:
+    redis: Redis
+    shard: int
+
+    @property
+    def stream(self) -> str:
+        return stream(self.shard)
+
+    @property
+    def consumer(self) -> str:
+        return f"worker-{self.shard}"
+
+    async def handle(self, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        from src import defs
+        from src.svc.common import Source
+
+        src = fields[b"src"].decode()
+        update = json.loads(fields[b"update"])
+
+        try:
+            if src == Source.TG and defs.tg_dispatch is not None:
+                await defs.tg_dispatch.feed_raw_update(defs.tg_bot, update)
+            elif src == Source.VK and defs.vk_bot is not None:
+                await defs.vk_bot.router.route(update, defs.vk_bot.api)
+        finally:
+            await self.redis.xack(self.stream, GROUP, entry_id)
+
+    async def consume(self) -> Never:
+        """
+        # Handle updates from our stream
+        Starts with the ones the previous
+        run of this worker didn't finish.
+        """
+        from src import defs
+
+        async def spawn(entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+            defs.create_task(self.handle(entry_id, fields))
+
+        await consume_group(
+            self.redis,
+            self.stream,
+            GROUP,
+            self.consumer,
+            spawn
+        )
+
+
+def load(shard: Optional[int] = None) -> tuple[Optional[Coordinator], Optional[Worker]]:
+    """
+    # Coordinator or worker for this process
+    Both `None` if sharding is off,
+    the storage can't do it
+    or this is the broadcaster.
+    """
+    from src import defs
+    from src.storage.redisdb import RedisStorage
+
+    settings = defs.settings.workers
+
+    if settings.count < 1 or defs.is_broadcaster:
+        return (None, None)
+
+    if not isinstance(defs.storage, RedisStorage):
+        logger.warning(
+            "workers need redis backend, "
+            "running everything in one process"
+        )
+        return (None, None)
+
+    if shard is not None:
+        return (None, Worker(redis=defs.storage.redis, shard=shard))
+
+    return (
+        Coordinator(
+            redis=defs.storage.redis,
+            count=settings.count,
+            stream_size=settings.stream_size
+        ),
+        None
+    )
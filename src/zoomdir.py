@@ -0,0 +1,280 @@
+"""
+# Zoom entries shared between chats
+
+Lots of chats keep the very same entries
+(same teacher, same link, same password).
+With `database.shared_zoom` enabled, each distinct entry
+is stored once, under an id made from its contents,
+and ctx documents only keep a list of ids:
+```
+{"settings": {"zoom": {"entries": {"list": [{...}, {...}]}}}}
+# becomes
+{"settings": {"zoom": {"entries": {"refs": ["3f2a...", "9c0d..."]}}}}
+```
+An edited entry simply gets a new id,
+so stored entries never change
+and can be cached in memory for as long as needed.
+
+Entries that are not referenced anymore are left in place,
+there's not many of them and they're small.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, TYPE_CHECKING
+from loguru import logger
+from redis.asyncio import Redis
+
+
+if TYPE_CHECKING:
+    from src.settings import Database
+    from src.storage import Storage
+
+
+KEY = "zoom_directory"
+"""
+# Redis hash of every shared entry, by id
+"""
+ENTRIES_PATHS = (
+    ("settings", "zoom", "entries"),
+    ("settings", "tchr_zoom", "entries"),
+)
+"""
+# Where shared entries are in a ctx document
+Unconfirmed `new_entries` are short-lived, they stay inline.
+"""
+
+
+def record_id(entry: dict[str, Any]) -> str:
+    """
+    # Id of a dumped `zoom.Data`, made from its contents
+    """
+    canonical = json.dumps(
+        entry,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.blake2b(canonical.encode("utf8"), digest_size=12).hexdigest()
+
+
+def get_at(doc: dict[str, Any], path: tuple[str, ...]) -> Optional[Any]:
+    for name in path:
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(name)
+
+    return doc
+
+
+def replaced_at(
+    doc: dict[str, Any],
+    path: tuple[str, ...],
+    value: Any
+) -> dict[str, Any]:
+    """
+    # Copy of `doc` with a nested value replaced
+    Only dicts along the `path` are copied,
+    `doc` itself is left untouched.
+    """
+    if not path:
+        return value
+
+    return {**doc, path[0]: replaced_at(doc.get(path[0]) or {}, path[1:], value)}
+
+
+@dataclass
+class ZoomDirectory:
+    """
+    # Base for shared entry stores
+    """
+    share: bool = True
+    """
+    # Should entries be moved here on save
+    If not, documents shared before
+    can still be read.
+    """
+    cache_size: int = 10_000
+    _cache: OrderedDict[str, dict[str, Any]] = field(
+        default_factory=OrderedDict
+    )
+    """
+    # Recently used entries by id
+    Anything in here is known to be stored already.
+    """
+
+    async def fetch(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        """
+        # Get stored entries, missing ones are left out
+        """
+        raise NotImplementedError
+
+    async def store(self, records: dict[str, dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def remember(self, id: str, record: dict[str, Any]) -> None:
+        self._cache[id] = record
+        self._cache.move_to_end(id)
+
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def shrink(self, doc: dict[str, Any]) -> None:
+        """
+        # Replace entries of a ctx document with their ids
+        Mutates `doc`, stores entries that aren't stored yet.
+        """
+        if not self.share:
+            return
+
+        new_records: dict[str, dict[str, Any]] = {}
+
+        for path in ENTRIES_PATHS:
+            entries = get_at(doc, path)
+            if not isinstance(entries, dict) or "list" not in entries:
+                continue
+
+            refs = []
+
+            for entry in entries.pop("list"):
+                id = record_id(entry)
+                refs.append(id)
+
+                if id not in self._cache:
+                    new_records[id] = entry
+
+            entries["refs"] = refs
+
+        if new_records:
+            await self.store(new_records)
+
+        for (id, record) in new_records.items():
+            self.remember(id, record)
+
+    async def expand(
+        self,
+        docs: list[Optional[dict[str, Any]]]
+    ) -> list[Optional[dict[str, Any]]]:
+        """
+        # Put entries back into ctx documents
+        Everything missing from memory is fetched at once.
+        Given documents are not mutated,
+        since storages may hand out what they keep.
+        """
+        wanted: set[str] = set()
+
+        for doc in docs:
+            if doc is None:
+                continue
+            for path in ENTRIES_PATHS:
+                entries = get_at(doc, path)
+                if isinstance(entries, dict):
+                    wanted.update(entries.get("refs") or [])
+
+        if not wanted:
+            return docs
+
+        missing = [id for id in wanted if id not in self._cache]
+        if missing:
+            for (id, record) in (await self.fetch(missing)).items():
+                self.remember(id, record)
+
+        expanded = []
+
+        for doc in docs:
+            if doc is not None:
+                doc = self.expand_one(doc)
+            expanded.append(doc)
+
+        return expanded
+
+    def expand_one(self, doc: dict[str, Any]) -> dict[str, Any]:
+        for path in ENTRIES_PATHS:
+            entries = get_at(doc, path)
+            if not isinstance(entries, dict) or "refs" not in entries:
+                continue
+
+            records = []
+
+            for id in entries["refs"]:
+                record = self._cache.get(id)
+
+                if record is None:
+                    logger.warning(f"shared zoom entry {id} is missing")
+                    continue
+
+                records.append(record)
+
+            new_entries = {
+                key: value for (key, value) in entries.items() if key != "refs"
+            }
+            new_entries["list"] = records
+
+            doc = replaced_at(doc, path, new_entries)
+
+        return doc
+
+
+@dataclass
+class RedisZoomDirectory(ZoomDirectory):
+    """
+    # Shared entries in a Redis hash
+    """
+    redis: Optional[Redis] = None
+
+    async def fetch(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        values = await self.redis.hmget(KEY, ids)
+
+        return {
+            id: json.loads(value)
+            for (id, value) in zip(ids, values)
+            if value is not None
+        }
+
+    async def store(self, records: dict[str, dict[str, Any]]) -> None:
+        await self.redis.hset(KEY, mapping={
+            id: json.dumps(record, ensure_ascii=False)
+            for (id, record) in records.items()
+        })
+
+
+@dataclass
+class MemoryZoomDirectory(ZoomDirectory):
+    """
+    # Shared entries in process memory, for tests and benchmarks
+    """
+    records: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    async def fetch(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        return {id: self.records[id] for id in ids if id in self.records}
+
+    async def store(self, records: dict[str, dict[str, Any]]) -> None:
+        self.records.update(records)
+
+
+def load(database: "Database", storage: "Storage") -> Optional[ZoomDirectory]:
+    """
+    # Directory for the storage backend
+    Made even with sharing disabled where possible,
+    so ctxs saved while it was enabled still load.
+    """
+    from src.storage.redisdb import RedisStorage
+    from src.storage.memory import MemoryStorage
+
+    share = database.shared_zoom
+
+    if isinstance(storage, RedisStorage):
+        return RedisZoomDirectory(share=share, redis=storage.redis)
+    if isinstance(storage, MemoryStorage):
+        return MemoryZoomDirectory(share=share)
+
+    if not share:
+        return None
+
+    logger.warning(
+        f"shared zoom entries are not supported "
+        f"by {database.backend} backend, keeping them in ctxs"
+    )
+    return None
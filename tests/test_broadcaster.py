@@ -0,0 +1,50 @@
+"""
+# Broadcaster job loop against a stream stub
+
+Run from the repo root:
+```
+python -m unittest tests.test_broadcaster
+```
+"""
+import asyncio
+import unittest
+
+from src.broadcaster import Broadcaster
+from tests.test_workers import StreamStub
+
+
+class RecordingBroadcaster(Broadcaster):
+    def __init__(self, redis: StreamStub, last: bytes):
+        super().__init__(redis=redis)
+        self.last = last
+        self.handled: list[bytes] = []
+        self.done = asyncio.Event()
+
+    async def handle(self, kind: str, payload: str) -> None:
+        self.handled.append(payload.encode())
+        if payload.encode() == self.last:
+            self.done.set()
+
+
+class BroadcasterConsumeTest(unittest.TestCase):
+    def test_unfinished_job_then_new_ones(self):
+        redis = StreamStub(pending=[b"1-0"], new=[b"2-0", b"3-0"])
+        for fields in [*redis.pending.values(), *(f for (_, f) in redis.new)]:
+            fields.update({b"kind": b"notify", b"payload": fields[b"n"]})
+
+        async def main() -> RecordingBroadcaster:
+            broadcaster = RecordingBroadcaster(redis, last=b"3-0")
+            task = asyncio.create_task(broadcaster.consume())
+            await asyncio.wait_for(broadcaster.done.wait(), timeout=2)
+            task.cancel()
+            return broadcaster
+
+        broadcaster = asyncio.run(main())
+
+        self.assertEqual(broadcaster.handled, [b"1-0", b"2-0", b"3-0"])
+        self.assertEqual(redis.asked[:4], ["0", b"1-0", ">", ">"])
+        self.assertEqual(redis.pending, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
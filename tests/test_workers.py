@@ -0,0 +1,105 @@
+"""
+# Consumer group loop against a stream stub
+
+Run from the repo root:
+```
+python -m unittest tests.test_workers
+```
+"""
+import asyncio
+import unittest
+
+from src.workers import consume_group
+
+
+class Done(Exception):
+    ...
+
+
+class StreamStub:
+    """
+    # One stream with one consumer group, the way Redis does it
+    - `>` gives entries never delivered and marks them pending
+    - an explicit id gives pending entries after it,
+    without blocking, empty list once there's none
+    """
+    def __init__(self, pending: list[bytes], new: list[bytes]):
+        self.pending = {entry_id: {b"n": entry_id} for entry_id in pending}
+        self.new = [(entry_id, {b"n": entry_id}) for entry_id in new]
+        self.asked: list[str | bytes] = []
+
+    async def xgroup_create(self, *args, **kwargs):
+        ...
+
+    async def xreadgroup(self, group, consumer, streams, count, block):
+        [(stream, last_id)] = streams.items()
+        self.asked.append(last_id)
+
+        if last_id == ">":
+            if not self.new:
+                await asyncio.sleep(block / 1000)
+                return []
+
+            entries = self.new[:count]
+            del self.new[:count]
+            self.pending.update(entries)
+            return [[stream, entries]]
+
+        entries = sorted(
+            (entry_id, fields)
+            for (entry_id, fields) in self.pending.items()
+            if last_id == "0" or entry_id > last_id
+        )
+        return [[stream, entries[:count]]]
+
+    async def xack(self, stream, group, entry_id):
+        self.pending.pop(entry_id, None)
+
+
+class ConsumeGroupTest(unittest.TestCase):
+    def run_until(self, redis: StreamStub, last: bytes, count: int) -> list[bytes]:
+        handled: list[bytes] = []
+
+        async def handle(entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+            handled.append(entry_id)
+            await redis.xack("s", "g", entry_id)
+            if entry_id == last:
+                raise Done
+
+        async def main():
+            with self.assertRaises(Done):
+                await asyncio.wait_for(
+                    consume_group(redis, "s", "g", "c", handle, count=count, block=10),
+                    timeout=2
+                )
+
+        asyncio.run(main())
+        return handled
+
+    def test_pending_then_live(self):
+        redis = StreamStub(pending=[b"1-0", b"2-0"], new=[b"3-0"])
+
+        handled = self.run_until(redis, last=b"3-0", count=100)
+
+        self.assertEqual(handled, [b"1-0", b"2-0", b"3-0"])
+        self.assertEqual(redis.asked, ["0", b"2-0", ">"])
+
+    def test_pending_in_batches(self):
+        redis = StreamStub(pending=[b"1-0", b"2-0", b"3-0"], new=[b"4-0"])
+
+        handled = self.run_until(redis, last=b"4-0", count=1)
+
+        self.assertEqual(handled, [b"1-0", b"2-0", b"3-0", b"4-0"])
+        self.assertEqual(redis.asked, ["0", b"1-0", b"2-0", b"3-0", ">"])
+
+    def test_nothing_pending(self):
+        redis = StreamStub(pending=[], new=[b"1-0"])
+
+        handled = self.run_until(redis, last=b"1-0", count=100)
+
+        self.assertEqual(handled, [b"1-0"])
+        self.assertEqual(redis.asked, ["0", ">"])
+
+
+if __name__ == "__main__":
+    unittest.main()